@@ -2,21 +2,108 @@
 数据库基础模型
 """
 from datetime import datetime
-from sqlalchemy import Column, Integer, DateTime, Boolean
+from operator import attrgetter
+from typing import Any, Callable, Dict, Optional, Tuple
+from sqlalchemy import Column, Integer, DateTime, Boolean, Date
 from app.utils.database import Base
 
+# 序列化器缓存：(模型类, 关联关系, 排除字段) -> 序列化函数
+_serializers: Dict[Tuple[type, Tuple[str, ...], Tuple[str, ...]], Callable[[Any], dict]] = {}
+
+
+def _compile_serializer(model: type, relationships: Tuple[str, ...], exclude: Tuple[str, ...]) -> Callable[[Any], dict]:
+    """
+    为模型类生成序列化函数
+    
+    字段列表、属性取值器和需要转换的日期时间字段在生成时一次性确定，
+    序列化单行时只做一次批量取值和一次日期转换，不再遍历表结构。
+    
+    Args:
+        model: 模型类
+        relationships: 要包含的关联关系
+        exclude: 不输出的字段
+        
+    Returns:
+        Callable[[Any], dict]: 序列化函数
+    """
+    mapper = model.__mapper__
+    names = []
+    keys = []
+    # 日期时间字段在同一次序列化中转换为 ISO 格式
+    temporal = []
+    for column in model.__table__.columns:
+        if column.name in exclude:
+            continue
+        names.append(column.name)
+        keys.append(mapper.get_property_by_column(column).key)
+        if isinstance(column.type, (DateTime, Date)):
+            temporal.append(column.name)
+    names = tuple(names)
+    temporal = tuple(temporal)
+    getter = attrgetter(*keys)
+    if len(keys) == 1:
+        single_getter = getter
+        getter = lambda obj: (single_getter(obj),)
+    
+    # 关联关系计划：(名称, 是否集合)，不存在的关联关系直接忽略
+    plans = tuple(
+        (name, mapper.relationships[name].uselist)
+        for name in relationships
+        if name in mapper.relationships
+    )
+    
+    def serialize(obj: Any) -> dict:
+        result = dict(zip(names, getter(obj)))
+        for name in temporal:
+            value = result[name]
+            if value is not None:
+                result[name] = value.isoformat()
+        for name, uselist in plans:
+            value = getattr(obj, name)
+            if value is None:
+                continue
+            if uselist:
+                result[name] = [item.to_dict() for item in value]
+            else:
+                result[name] = value.to_dict()
+        return result
+    
+    return serialize
+
+
+def get_serializer(model: type, relationships: Optional[Tuple[str, ...]] = None, exclude: Tuple[str, ...] = ()) -> Callable[[Any], dict]:
+    """
+    获取模型类的序列化函数，每种组合只生成一次
+    
+    Args:
+        model: 模型类
+        relationships: 要包含的关联关系
+        exclude: 不输出的字段
+        
+    Returns:
+        Callable[[Any], dict]: 序列化函数
+    """
+    cache_key = (model, relationships or (), exclude)
+    serializer = _serializers.get(cache_key)
+    if serializer is None:
+        serializer = _serializers[cache_key] = _compile_serializer(model, *cache_key[1:])
+    return serializer
+
 
 class BaseModel(Base):
     """数据库基础模型类"""
     __abstract__ = True
     
+    # 默认不输出的字段，子类按需覆盖
+    __serialize_exclude__: Tuple[str, ...] = ()
+    
     id = Column(Integer, primary_key=True, index=True, comment="主键ID")
     created_at = Column(DateTime, default=datetime.utcnow, comment="创建时间")
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, comment="更新时间")
     is_deleted = Column(Boolean, default=False, comment="是否删除")
     
     def to_dict(self, include_relationships: list = None) -> dict:
-        """转换为字典
+        """转换为字典，日期时间字段输出为 ISO 格式字符串
         
         Args:
             include_relationships: 要包含的关联关系列表
@@ -24,26 +111,5 @@ class BaseModel(Base):
         Returns:
             dict: 字典形式的数据
         """
-        # 序列化基本字段
-        result = {
-            column.name: getattr(self, column.name)
-            for column in self.__table__.columns
-        }
-        
-        # 序列化关联数据
-        if include_relationships:
-            for rel_name in include_relationships:
-                if hasattr(self, rel_name):
-                    rel_value = getattr(self, rel_name)
-                    if rel_value is not None:
-                        if isinstance(rel_value, list):
-                            # 一对多或多对多关系
-                            result[rel_name] = [
-                                item.to_dict() if hasattr(item, 'to_dict') else str(item)
-                                for item in rel_value
-                            ]
-                        else:
-                            # 一对一关系
-                            result[rel_name] = rel_value.to_dict() if hasattr(rel_value, 'to_dict') else str(rel_value)
-        
-        return result
\ No newline at end of file
+        relationships = tuple(include_relationships) if include_relationships else None
+        return get_serializer(type(self), relationships, self.__serialize_exclude__)(self)
@@ -1,7 +1,7 @@
 """
 菜单相关数据库模型
 """
-from sqlalchemy import Column, String, Boolean, Integer, ForeignKey, Table
+from sqlalchemy import Column, String, Boolean, Integer, ForeignKey, Table, Index
 from sqlalchemy.orm import relationship
 from app.models.base import BaseModel
 from app.models.associations import role_menu_association
@@ -10,12 +10,16 @@ from app.models.associations import role_menu_association
 class Menu(BaseModel):
     """菜单模型"""
     __tablename__ = "menus"
+    __table_args__ = (
+        # 游标分页按（排序号, ID）定位
+        Index("ix_menus_order_num_id", "order_num", "id"),
+    )
     
     name = Column(String(50), nullable=False,unique=True, comment="菜单名称")
     path = Column(String(255), nullable=True,unique=True, comment="菜单路径")
     component = Column(String(255), nullable=True, comment="组件路径")
     icon = Column(String(100), nullable=True, comment="菜单图标")
-    order_num = Column(Integer, default=0, comment="排序号")
+    order_num = Column(Integer, nullable=False, default=0, server_default="0", comment="排序号")
     parent_id = Column(Integer, ForeignKey('menus.id'), nullable=True, comment="父菜单ID")
     menu_type = Column(String(20), default='menu', comment="菜单类型：menu菜单，button按钮")
     permission = Column(String(100), nullable=True, comment="权限标识")
@@ -3,12 +3,14 @@
 """
 from sqlalchemy import Column, String, Boolean, Integer, ForeignKey, Table
 from sqlalchemy.orm import relationship
-from app.models.base import BaseModel
+from app.models.base import BaseModel, get_serializer
 from app.models.associations import user_role_association
 
 class User(BaseModel):
     """用户模型"""
     __tablename__ = "users"
+    # 密码哈希只在 include_password=True 时输出
+    __serialize_exclude__ = ("hashed_password",)
     
     username = Column(String(50), unique=True, index=True, nullable=False, comment="用户名")
     email = Column(String(100), unique=True, index=True, nullable=False, comment="邮箱")
@@ -27,10 +29,10 @@ class User(BaseModel):
     
     def to_dict(self, include_password: bool = False, include_relationships: list = None) -> dict:
         """转换为字典，默认不包含密码"""
-        data = super().to_dict(include_relationships=include_relationships)
         if not include_password:
-            data.pop('hashed_password', None)
-        return data
+            return super().to_dict(include_relationships=include_relationships)
+        relationships = tuple(include_relationships) if include_relationships else None
+        return get_serializer(User, relationships)(self)
 
 
 class Role(BaseModel):
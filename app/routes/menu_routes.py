@@ -2,16 +2,19 @@
 菜单相关路由
 """
 from typing import Optional, List
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.utils.database import get_db
-from app.utils.dependencies import get_current_user, get_current_superuser
-from app.utils.response import ResponseUtil, BusinessException, NotFoundException
+from app.utils.dependencies import get_current_user, get_current_superuser, get_read_db
+from app.schemas.user import UserPrincipal
+from app.utils.response import ApiJSONResponse, ResponseUtil, dump_model, BusinessException, NotFoundException
+from app.utils.compression import payload_response
+from app.utils.export import export_response
 from app.services.menu_service import MenuService
 from app.schemas.menu import (
     MenuCreate, MenuUpdate, Menu, MenuTree, MenuPermissionCheck
 )
-from app.models.user import User as UserModel
+from app.schemas.common import ApiResult, PageData
 
 router = APIRouter(prefix="/api/menus", tags=["菜单管理"])
 
@@ -19,14 +22,14 @@ router = APIRouter(prefix="/api/menus", tags=["菜单管理"])
 @router.post("", response_model=dict, summary="创建菜单")
 async def create_menu(
     menu_data: MenuCreate,
-    current_user: UserModel = Depends(get_current_superuser),
+    current_user: UserPrincipal = Depends(get_current_superuser),
     db: AsyncSession = Depends(get_db)
 ):
     """创建菜单（需要超级管理员权限）"""
     try:
         menu = await MenuService.create_menu(db, menu_data)
         response = ResponseUtil.created(menu, "菜单创建成功")
-        return response.to_dict()
+        return ApiJSONResponse(response)
         
     except BusinessException as e:
         response = ResponseUtil.bad_request(e.message)
@@ -36,22 +39,28 @@ async def create_menu(
         raise HTTPException(status_code=500, detail=response.to_dict())
 
 
-@router.get("", response_model=dict, summary="分页获取菜单列表")
+@router.get("", response_model=ApiResult[PageData[Menu]], summary="分页获取菜单列表")
 async def get_menus(
     page: int = Query(1, ge=1, description="页码"),
     per_page: int = Query(10, ge=1, le=100, description="每页数量"),
     search: Optional[str] = Query(None, description="搜索关键词"),
-    current_user: UserModel = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="分页游标，传入时按游标分页并忽略页码"),
+    include_total: bool = Query(True, description="是否统计总数"),
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """分页获取菜单列表"""
     try:
-        result = await MenuService.get_menus_paginated(db, page, per_page, search)
+        result = await MenuService.get_menus_paginated(db, page, per_page, search, cursor, include_total)
         response = ResponseUtil.paginated_response(
-            result["items"], page, per_page, result["total"], "查询成功"
+            result["items"], page, per_page, result["total"], "查询成功",
+            next_cursor=result["next_cursor"], has_next=result["has_next"]
         )
-        return response.to_dict()
+        return ApiJSONResponse(response)
         
+    except BusinessException as e:
+        response = ResponseUtil.bad_request(e.message)
+        raise HTTPException(status_code=400, detail=response.to_dict())
     except Exception as e:
         response = ResponseUtil.internal_error(f"查询失败: {str(e)}")
         raise HTTPException(status_code=500, detail=response.to_dict())
@@ -59,14 +68,17 @@ async def get_menus(
 
 @router.get("/tree", response_model=dict, summary="获取菜单树形结构")
 async def get_menu_tree(
-    current_user: UserModel = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    request: Request,
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """获取菜单树形结构"""
+    """获取菜单树形结构（支持 ETag / If-None-Match 协商缓存）"""
     try:
-        tree = await MenuService.get_menu_tree(db)
-        response = ResponseUtil.success(tree, "查询成功")
-        return response.to_dict()
+        payload, etag = await MenuService.get_menu_tree_payload(db)
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache", "Vary": "Accept-Encoding"}
+        if ResponseUtil.etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+        return payload_response(request, payload, headers)
         
     except Exception as e:
         response = ResponseUtil.internal_error(f"查询失败: {str(e)}")
@@ -76,8 +88,9 @@ async def get_menu_tree(
 @router.get("/user/{user_id}", response_model=dict, summary="获取用户可访问的菜单")
 async def get_user_menus(
     user_id: int,
-    current_user: UserModel = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    request: Request,
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """获取用户可访问的菜单"""
     try:
@@ -86,9 +99,8 @@ async def get_user_menus(
             response = ResponseUtil.forbidden("无权限查看其他用户的菜单")
             raise HTTPException(status_code=403, detail=response.to_dict())
         
-        menus = await MenuService.get_user_menus(db, user_id)
-        response = ResponseUtil.success(menus, "查询成功")
-        return response.to_dict()
+        payload = await MenuService.get_user_menus_payload(db, user_id)
+        return payload_response(request, payload)
         
     except HTTPException:
         raise
@@ -99,25 +111,39 @@ async def get_user_menus(
 
 @router.get("/me", response_model=dict, summary="获取当前用户可访问的菜单")
 async def get_current_user_menus(
-    current_user: UserModel = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    request: Request,
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """获取当前用户可访问的菜单"""
     try:
-        menus = await MenuService.get_user_menus(db, current_user.id)
-        response = ResponseUtil.success(menus, "查询成功")
-        return response.to_dict()
+        payload = await MenuService.get_user_menus_payload(db, current_user.id)
+        return payload_response(request, payload)
         
     except Exception as e:
         response = ResponseUtil.internal_error(f"查询失败: {str(e)}")
         raise HTTPException(status_code=500, detail=response.to_dict())
 
 
-@router.get("/{menu_id}", response_model=dict, summary="获取指定菜单信息")
+@router.get("/export", summary="导出菜单")
+async def export_menus(
+    format: str = Query("ndjson", description="导出格式：ndjson 或 csv"),
+    current_user: UserPrincipal = Depends(get_current_superuser)
+):
+    """流式导出全部菜单（需要超级管理员权限），数据量再大也不会一次性加载到内存"""
+    try:
+        return export_response("menus", format, current_user.id)
+        
+    except BusinessException as e:
+        response = ResponseUtil.bad_request(e.message)
+        raise HTTPException(status_code=400, detail=response.to_dict())
+
+
+@router.get("/{menu_id}", response_model=ApiResult[Menu], summary="获取指定菜单信息")
 async def get_menu_by_id(
     menu_id: int,
-    current_user: UserModel = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """获取指定菜单信息"""
     try:
@@ -126,9 +152,9 @@ async def get_menu_by_id(
             response = ResponseUtil.not_found("菜单不存在")
             raise HTTPException(status_code=404, detail=response.to_dict())
         
-        menu_data = menu.to_dict()
+        menu_data = dump_model(Menu, menu)
         response = ResponseUtil.success(menu_data, "查询成功")
-        return response.to_dict()
+        return ApiJSONResponse(response)
         
     except HTTPException:
         raise
@@ -141,14 +167,14 @@ async def get_menu_by_id(
 async def update_menu(
     menu_id: int,
     menu_data: MenuUpdate,
-    current_user: UserModel = Depends(get_current_superuser),
+    current_user: UserPrincipal = Depends(get_current_superuser),
     db: AsyncSession = Depends(get_db)
 ):
     """更新菜单信息（需要超级管理员权限）"""
     try:
         updated_menu = await MenuService.update_menu(db, menu_id, menu_data)
         response = ResponseUtil.success(updated_menu, "更新成功")
-        return response.to_dict()
+        return ApiJSONResponse(response)
         
     except BusinessException as e:
         response = ResponseUtil.bad_request(e.message)
@@ -164,7 +190,7 @@ async def update_menu(
 @router.delete("/{menu_id}", response_model=dict, summary="删除菜单")
 async def delete_menu(
     menu_id: int,
-    current_user: UserModel = Depends(get_current_superuser),
+    current_user: UserPrincipal = Depends(get_current_superuser),
     db: AsyncSession = Depends(get_db)
 ):
     """删除菜单（需要超级管理员权限）"""
@@ -172,7 +198,7 @@ async def delete_menu(
         await MenuService.delete_menu(db, menu_id)
         result = {"id": menu_id, "deleted": True}
         response = ResponseUtil.success(result, "删除成功")
-        return response.to_dict()
+        return ApiJSONResponse(response)
         
     except BusinessException as e:
         response = ResponseUtil.bad_request(e.message)
@@ -5,14 +5,15 @@ from typing import Optional, List
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.utils.database import get_db
-from app.utils.dependencies import get_current_user, get_current_superuser
-from app.utils.response import ResponseUtil, BusinessException, NotFoundException
+from app.utils.dependencies import get_current_user, get_current_superuser, get_read_db
+from app.schemas.user import UserPrincipal
+from app.utils.response import ApiJSONResponse, ResponseUtil, BusinessException, NotFoundException
+from app.utils.export import export_response
 from app.services.role_service import RoleService
 from app.schemas.role import (
     RoleCreate, RoleUpdate, Role, RoleWithMenus, 
     RoleAssignUsers, RoleAssignMenus
 )
-from app.models.user import User as UserModel
 
 router = APIRouter(prefix="/api/roles", tags=["角色管理"])
 
@@ -20,14 +21,14 @@ router = APIRouter(prefix="/api/roles", tags=["角色管理"])
 @router.post("", response_model=dict, summary="创建角色")
 async def create_role(
     role_data: RoleCreate,
-    current_user: UserModel = Depends(get_current_superuser),
+    current_user: UserPrincipal = Depends(get_current_superuser),
     db: AsyncSession = Depends(get_db)
 ):
     """创建角色（需要超级管理员权限）"""
     try:
         role = await RoleService.create_role(db, role_data)
         response = ResponseUtil.created(role, "角色创建成功")
-        return response.to_dict()
+        return ApiJSONResponse(response)
         
     except BusinessException as e:
         response = ResponseUtil.bad_request(e.message)
@@ -42,38 +43,57 @@ async def get_roles(
     page: int = Query(1, ge=1, description="页码"),
     per_page: int = Query(10, ge=1, le=100, description="每页数量"),
     search: Optional[str] = Query(None, description="搜索关键词"),
-    current_user: UserModel = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="分页游标，传入时按游标分页并忽略页码"),
+    include_total: bool = Query(True, description="是否统计总数"),
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """分页获取角色列表"""
     try:
-        result = await RoleService.get_roles_paginated(db, page, per_page, search)
+        result = await RoleService.get_roles_paginated(db, page, per_page, search, cursor, include_total)
         response = ResponseUtil.paginated_response(
-            result["items"], page, per_page, result["total"], "查询成功"
+            result["items"], page, per_page, result["total"], "查询成功",
+            next_cursor=result["next_cursor"], has_next=result["has_next"]
         )
-        return response.to_dict()
+        return ApiJSONResponse(response)
         
+    except BusinessException as e:
+        response = ResponseUtil.bad_request(e.message)
+        raise HTTPException(status_code=400, detail=response.to_dict())
     except Exception as e:
         response = ResponseUtil.internal_error(f"查询失败: {str(e)}")
         raise HTTPException(status_code=500, detail=response.to_dict())
 
 
+@router.get("/export", summary="导出角色")
+async def export_roles(
+    format: str = Query("ndjson", description="导出格式：ndjson 或 csv"),
+    current_user: UserPrincipal = Depends(get_current_superuser)
+):
+    """流式导出全部角色（需要超级管理员权限），数据量再大也不会一次性加载到内存"""
+    try:
+        return export_response("roles", format, current_user.id)
+        
+    except BusinessException as e:
+        response = ResponseUtil.bad_request(e.message)
+        raise HTTPException(status_code=400, detail=response.to_dict())
+
+
 @router.get("/{role_id}", response_model=dict, summary="获取指定角色信息")
 async def get_role_by_id(
     role_id: int,
-    current_user: UserModel = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """获取指定角色信息"""
     try:
-        role = await RoleService.get_role_by_id(db, role_id)
-        if not role:
+        role_data = await RoleService.get_role_detail(db, role_id)
+        if not role_data:
             response = ResponseUtil.not_found("角色不存在")
             raise HTTPException(status_code=404, detail=response.to_dict())
         
-        role_data = role.to_dict()
         response = ResponseUtil.success(role_data, "查询成功")
-        return response.to_dict()
+        return ApiJSONResponse(response)
         
     except HTTPException:
         raise
@@ -82,18 +102,47 @@ async def get_role_by_id(
         raise HTTPException(status_code=500, detail=response.to_dict())
 
 
+@router.get("/{role_id}/users", response_model=dict, summary="分页获取角色成员")
+async def get_role_users(
+    role_id: int,
+    per_page: int = Query(10, ge=1, le=100, description="每页数量"),
+    cursor: Optional[str] = Query(None, description="分页游标，取上一页返回的 next_cursor"),
+    include_total: bool = Query(True, description="是否统计总数"),
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """按用户ID游标分页获取角色成员"""
+    try:
+        result = await RoleService.get_role_users(db, role_id, per_page, cursor, include_total)
+        response = ResponseUtil.paginated_response(
+            result["items"], 1, per_page, result["total"], "查询成功",
+            next_cursor=result["next_cursor"], has_next=result["has_next"]
+        )
+        return ApiJSONResponse(response)
+        
+    except NotFoundException as e:
+        response = ResponseUtil.not_found(e.message)
+        raise HTTPException(status_code=404, detail=response.to_dict())
+    except BusinessException as e:
+        response = ResponseUtil.bad_request(e.message)
+        raise HTTPException(status_code=400, detail=response.to_dict())
+    except Exception as e:
+        response = ResponseUtil.internal_error(f"查询失败: {str(e)}")
+        raise HTTPException(status_code=500, detail=response.to_dict())
+
+
 @router.put("/{role_id}", response_model=dict, summary="更新角色信息")
 async def update_role(
     role_id: int,
     role_data: RoleUpdate,
-    current_user: UserModel = Depends(get_current_superuser),
+    current_user: UserPrincipal = Depends(get_current_superuser),
     db: AsyncSession = Depends(get_db)
 ):
     """更新角色信息（需要超级管理员权限）"""
     try:
         updated_role = await RoleService.update_role(db, role_id, role_data)
         response = ResponseUtil.success(updated_role, "更新成功")
-        return response.to_dict()
+        return ApiJSONResponse(response)
         
     except BusinessException as e:
         response = ResponseUtil.bad_request(e.message)
@@ -109,7 +158,7 @@ async def update_role(
 @router.delete("/{role_id}", response_model=dict, summary="删除角色")
 async def delete_role(
     role_id: int,
-    current_user: UserModel = Depends(get_current_superuser),
+    current_user: UserPrincipal = Depends(get_current_superuser),
     db: AsyncSession = Depends(get_db)
 ):
     """删除角色（需要超级管理员权限）"""
@@ -117,7 +166,7 @@ async def delete_role(
         await RoleService.delete_role(db, role_id)
         result = {"id": role_id, "deleted": True}
         response = ResponseUtil.success(result, "删除成功")
-        return response.to_dict()
+        return ApiJSONResponse(response)
         
     except NotFoundException as e:
         response = ResponseUtil.not_found(e.message)
@@ -131,14 +180,14 @@ async def delete_role(
 async def assign_role_users(
     role_id: int,
     assign_data: RoleAssignUsers,
-    current_user: UserModel = Depends(get_current_superuser),
+    current_user: UserPrincipal = Depends(get_current_superuser),
     db: AsyncSession = Depends(get_db)
 ):
     """为角色分配用户（需要超级管理员权限）"""
     try:
         await RoleService.assign_users(db, role_id, assign_data.user_ids)
         response = ResponseUtil.success(None, "用户分配成功")
-        return response.to_dict()
+        return ApiJSONResponse(response)
         
     except NotFoundException as e:
         response = ResponseUtil.not_found(e.message)
@@ -152,18 +201,102 @@ async def assign_role_users(
 async def assign_role_menus(
     role_id: int,
     assign_data: RoleAssignMenus,
-    current_user: UserModel = Depends(get_current_superuser),
+    current_user: UserPrincipal = Depends(get_current_superuser),
     db: AsyncSession = Depends(get_db)
 ):
     """为角色分配菜单（需要超级管理员权限）"""
     try:
         await RoleService.assign_menus(db, role_id, assign_data.menu_ids)
         response = ResponseUtil.success(None, "菜单分配成功")
-        return response.to_dict()
+        return ApiJSONResponse(response)
         
     except NotFoundException as e:
         response = ResponseUtil.not_found(e.message)
         raise HTTPException(status_code=404, detail=response.to_dict())
     except Exception as e:
         response = ResponseUtil.internal_error(f"分配失败: {str(e)}")
-        raise HTTPException(status_code=500, detail=response.to_dict())
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=response.to_dict())
+
+
+@router.post("/{role_id}/users:add", response_model=dict, summary="为角色增量添加用户")
+async def add_role_users(
+    role_id: int,
+    assign_data: RoleAssignUsers,
+    current_user: UserPrincipal = Depends(get_current_superuser),
+    db: AsyncSession = Depends(get_db)
+):
+    """为角色添加用户，已拥有该角色的用户忽略（需要超级管理员权限）"""
+    try:
+        count = await RoleService.add_users(db, role_id, assign_data.user_ids)
+        response = ResponseUtil.success({"role_id": role_id, "added": count}, "用户添加成功")
+        return ApiJSONResponse(response)
+        
+    except NotFoundException as e:
+        response = ResponseUtil.not_found(e.message)
+        raise HTTPException(status_code=404, detail=response.to_dict())
+    except Exception as e:
+        response = ResponseUtil.internal_error(f"添加失败: {str(e)}")
+        raise HTTPException(status_code=500, detail=response.to_dict())
+
+
+@router.post("/{role_id}/users:remove", response_model=dict, summary="从角色中移除用户")
+async def remove_role_users(
+    role_id: int,
+    assign_data: RoleAssignUsers,
+    current_user: UserPrincipal = Depends(get_current_superuser),
+    db: AsyncSession = Depends(get_db)
+):
+    """从角色中移除用户（需要超级管理员权限）"""
+    try:
+        count = await RoleService.remove_users(db, role_id, assign_data.user_ids)
+        response = ResponseUtil.success({"role_id": role_id, "removed": count}, "用户移除成功")
+        return ApiJSONResponse(response)
+        
+    except NotFoundException as e:
+        response = ResponseUtil.not_found(e.message)
+        raise HTTPException(status_code=404, detail=response.to_dict())
+    except Exception as e:
+        response = ResponseUtil.internal_error(f"移除失败: {str(e)}")
+        raise HTTPException(status_code=500, detail=response.to_dict())
+
+
+@router.post("/{role_id}/menus:add", response_model=dict, summary="为角色增量添加菜单")
+async def add_role_menus(
+    role_id: int,
+    assign_data: RoleAssignMenus,
+    current_user: UserPrincipal = Depends(get_current_superuser),
+    db: AsyncSession = Depends(get_db)
+):
+    """为角色添加菜单权限，已拥有的菜单忽略（需要超级管理员权限）"""
+    try:
+        count = await RoleService.add_menus(db, role_id, assign_data.menu_ids)
+        response = ResponseUtil.success({"role_id": role_id, "added": count}, "菜单添加成功")
+        return ApiJSONResponse(response)
+        
+    except NotFoundException as e:
+        response = ResponseUtil.not_found(e.message)
+        raise HTTPException(status_code=404, detail=response.to_dict())
+    except Exception as e:
+        response = ResponseUtil.internal_error(f"添加失败: {str(e)}")
+        raise HTTPException(status_code=500, detail=response.to_dict())
+
+
+@router.post("/{role_id}/menus:remove", response_model=dict, summary="从角色中移除菜单")
+async def remove_role_menus(
+    role_id: int,
+    assign_data: RoleAssignMenus,
+    current_user: UserPrincipal = Depends(get_current_superuser),
+    db: AsyncSession = Depends(get_db)
+):
+    """移除角色的菜单权限（需要超级管理员权限）"""
+    try:
+        count = await RoleService.remove_menus(db, role_id, assign_data.menu_ids)
+        response = ResponseUtil.success({"role_id": role_id, "removed": count}, "菜单移除成功")
+        return ApiJSONResponse(response)
+        
+    except NotFoundException as e:
+        response = ResponseUtil.not_found(e.message)
+        raise HTTPException(status_code=404, detail=response.to_dict())
+    except Exception as e:
+        response = ResponseUtil.internal_error(f"移除失败: {str(e)}")
+        raise HTTPException(status_code=500, detail=response.to_dict())
@@ -0,0 +1,56 @@
+"""
+系统监控相关路由
+"""
+from fastapi import APIRouter, Depends, HTTPException
+from app.utils.dependencies import get_current_superuser
+from app.utils.response import ApiJSONResponse, ResponseUtil
+from app.utils.search_index import search_index_stats
+from app.utils.database import get_pool_metrics
+from app.utils.cache import cache_stats
+from app.utils.auth import token_cache
+from app.schemas.user import UserPrincipal
+
+router = APIRouter(prefix="/api/system", tags=["系统监控"])
+
+
+@router.get("/search-index", response_model=dict, summary="获取搜索索引统计")
+async def get_search_index_stats(
+    current_user: UserPrincipal = Depends(get_current_superuser)
+):
+    """获取搜索索引规模和内存占用（需要超级管理员权限）"""
+    try:
+        response = ResponseUtil.success(search_index_stats(), "查询成功")
+        return ApiJSONResponse(response)
+        
+    except Exception as e:
+        response = ResponseUtil.internal_error(f"查询失败: {str(e)}")
+        raise HTTPException(status_code=500, detail=response.to_dict())
+
+
+@router.get("/db-pool", response_model=dict, summary="获取数据库连接池统计")
+async def get_db_pool_metrics(
+    current_user: UserPrincipal = Depends(get_current_superuser)
+):
+    """获取连接池占用、溢出、等待次数和等待耗时分布（需要超级管理员权限）"""
+    try:
+        response = ResponseUtil.success(get_pool_metrics(), "查询成功")
+        return ApiJSONResponse(response)
+        
+    except Exception as e:
+        response = ResponseUtil.internal_error(f"查询失败: {str(e)}")
+        raise HTTPException(status_code=500, detail=response.to_dict())
+
+
+@router.get("/cache", response_model=dict, summary="获取缓存统计")
+async def get_cache_stats(
+    current_user: UserPrincipal = Depends(get_current_superuser)
+):
+    """获取各缓存命名空间及令牌校验缓存的条目数、命中次数、回源次数和命中率（需要超级管理员权限）"""
+    try:
+        stats = {**cache_stats(), "tokens": token_cache.stats()}
+        response = ResponseUtil.success(stats, "查询成功")
+        return ApiJSONResponse(response)
+        
+    except Exception as e:
+        response = ResponseUtil.internal_error(f"查询失败: {str(e)}")
+        raise HTTPException(status_code=500, detail=response.to_dict())
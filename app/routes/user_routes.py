@@ -2,16 +2,19 @@
 用户相关路由
 """
 from typing import Optional, List
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.utils.database import get_db
-from app.utils.dependencies import get_current_user, get_current_superuser
-from app.utils.response import ResponseUtil, BusinessException, NotFoundException
+from app.utils.dependencies import get_current_user, get_current_superuser, get_current_user_entity, get_read_db
+from app.utils.response import ApiJSONResponse, ResponseUtil, dump_model, BusinessException, NotFoundException, ServiceUnavailableException
+from app.utils.export import export_response
 from app.services.user_service import UserService
+from app.utils.bulk_import import detect_format, parse_import_rows
 from app.schemas.user import (
     UserCreate, UserUpdate, UserChangePassword, UserLogin, UserRegister,
-    User, Token, UserWithRoles
+    User, Token, UserWithRoles, UserPrincipal, UserDetail
 )
+from app.schemas.common import ApiResult
 from app.models.user import User as UserModel
 
 router = APIRouter(prefix="/api/users", tags=["用户管理"])
@@ -39,11 +42,14 @@ async def register(
         # 创建用户
         user = await UserService.create_user(db, create_data)
         response = ResponseUtil.created(user, "注册成功")
-        return response.to_dict()
+        return ApiJSONResponse(response)
         
     except BusinessException as e:
         response = ResponseUtil.bad_request(e.message)
         raise HTTPException(status_code=400, detail=response.to_dict())
+    except ServiceUnavailableException as e:
+        response = ResponseUtil.service_unavailable(e.message)
+        raise HTTPException(status_code=503, detail=response.to_dict())
     except Exception as e:
         response = ResponseUtil.internal_error(f"注册失败: {str(e)}")
         raise HTTPException(status_code=500, detail=response.to_dict())
@@ -65,42 +71,45 @@ async def login(
         # 创建令牌
         token_data = await UserService.create_tokens(user)
         response = ResponseUtil.success(token_data, "登录成功")
-        return response.to_dict()
+        return ApiJSONResponse(response)
         
     except BusinessException as e:
         response = ResponseUtil.bad_request(e.message)
         raise HTTPException(status_code=400, detail=response.to_dict())
+    except ServiceUnavailableException as e:
+        response = ResponseUtil.service_unavailable(e.message)
+        raise HTTPException(status_code=503, detail=response.to_dict())
     except Exception as e:
         response = ResponseUtil.internal_error(f"登录失败: {str(e)}")
         raise HTTPException(status_code=500, detail=response.to_dict())
 
 
-@router.get("/me", response_model=dict, summary="获取当前用户信息")
+@router.get("/me", response_model=ApiResult[User], summary="获取当前用户信息")
 async def get_current_user_info(
-    current_user: UserModel = Depends(get_current_user)
+    current_user: UserModel = Depends(get_current_user_entity)
 ):
     """获取当前用户信息"""
     try:
-        user_data = current_user.to_dict()
+        user_data = dump_model(User, current_user)
         response = ResponseUtil.success(user_data, "获取成功")
-        return response.to_dict()
+        return ApiJSONResponse(response)
         
     except Exception as e:
         response = ResponseUtil.internal_error(f"获取用户信息失败: {str(e)}")
         raise HTTPException(status_code=500, detail=response.to_dict())
 
 
-@router.put("/me", response_model=dict, summary="更新当前用户信息")
+@router.put("/me", response_model=ApiResult[UserDetail], summary="更新当前用户信息")
 async def update_current_user_info(
     user_data: UserUpdate,
-    current_user: UserModel = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """更新当前用户信息"""
     try:
         updated_user = await UserService.update_user(db, current_user.id, user_data)
         response = ResponseUtil.success(updated_user, "更新成功")
-        return response.to_dict()
+        return ApiJSONResponse(response)
         
     except BusinessException as e:
         response = ResponseUtil.bad_request(e.message)
@@ -116,14 +125,14 @@ async def update_current_user_info(
 @router.put("/me/password", response_model=dict, summary="修改当前用户密码")
 async def change_current_user_password(
     password_data: UserChangePassword,
-    current_user: UserModel = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """修改当前用户密码"""
     try:
         await UserService.change_password(db, current_user.id, password_data)
         response = ResponseUtil.success(None, "密码修改成功")
-        return response.to_dict()
+        return ApiJSONResponse(response)
         
     except BusinessException as e:
         response = ResponseUtil.bad_request(e.message)
@@ -131,6 +140,9 @@ async def change_current_user_password(
     except NotFoundException as e:
         response = ResponseUtil.not_found(e.message)
         raise HTTPException(status_code=404, detail=response.to_dict())
+    except ServiceUnavailableException as e:
+        response = ResponseUtil.service_unavailable(e.message)
+        raise HTTPException(status_code=503, detail=response.to_dict())
     except Exception as e:
         response = ResponseUtil.internal_error(f"密码修改失败: {str(e)}")
         raise HTTPException(status_code=500, detail=response.to_dict())
@@ -141,17 +153,27 @@ async def get_users(
     page: int = Query(1, ge=1, description="页码"),
     per_page: int = Query(10, ge=1, le=100, description="每页数量"),
     search: Optional[str] = Query(None, description="搜索关键词"),
-    current_user: UserModel = Depends(get_current_superuser),
-    db: AsyncSession = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="分页游标，传入时按游标分页并忽略页码"),
+    include_total: bool = Query(True, description="是否统计总数"),
+    include: Optional[str] = Query(None, description="附加数据，逗号分隔，目前支持 menus（角色的菜单列表）"),
+    current_user: UserPrincipal = Depends(get_current_superuser),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """分页获取用户列表（需要超级管理员权限）"""
     try:
-        result = await UserService.get_users_paginated(db, page, per_page, search)
+        include_menus = "menus" in {part.strip() for part in (include or "").split(",")}
+        result = await UserService.get_users_paginated(
+            db, page, per_page, search, cursor, include_total, include_menus
+        )
         response = ResponseUtil.paginated_response(
-            result["items"], page, per_page, result["total"], "查询成功"
+            result["items"], page, per_page, result["total"], "查询成功",
+            next_cursor=result["next_cursor"], has_next=result["has_next"]
         )
-        return response.to_dict()
+        return ApiJSONResponse(response)
         
+    except BusinessException as e:
+        response = ResponseUtil.bad_request(e.message)
+        raise HTTPException(status_code=400, detail=response.to_dict())
     except Exception as e:
         response = ResponseUtil.internal_error(f"查询失败: {str(e)}")
         raise HTTPException(status_code=500, detail=response.to_dict())
@@ -160,28 +182,73 @@ async def get_users(
 @router.post("", response_model=dict, summary="创建用户")
 async def create_user(
     user_data: UserCreate,
-    current_user: UserModel = Depends(get_current_superuser),
+    current_user: UserPrincipal = Depends(get_current_superuser),
     db: AsyncSession = Depends(get_db)
 ):
     """创建用户（需要超级管理员权限）"""
     try:
         user = await UserService.create_user(db, user_data)
         response = ResponseUtil.created(user, "创建成功")
-        return response.to_dict()
+        return ApiJSONResponse(response)
         
     except BusinessException as e:
         response = ResponseUtil.bad_request(e.message)
         raise HTTPException(status_code=400, detail=response.to_dict())
+    except ServiceUnavailableException as e:
+        response = ResponseUtil.service_unavailable(e.message)
+        raise HTTPException(status_code=503, detail=response.to_dict())
     except Exception as e:
         response = ResponseUtil.internal_error(f"创建失败: {str(e)}")
         raise HTTPException(status_code=500, detail=response.to_dict())
 
 
-@router.get("/{user_id}", response_model=dict, summary="获取指定用户信息")
+@router.post("/bulk", response_model=dict, summary="批量导入用户")
+async def bulk_import_users(
+    request: Request,
+    format: Optional[str] = Query(None, description="导入格式：jsonl 或 csv，默认根据 Content-Type 判断"),
+    current_user: UserPrincipal = Depends(get_current_superuser),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    批量导入用户（需要超级管理员权限）
+    
+    请求体为 JSON Lines（每行一个用户对象）或带表头的 CSV，字段与创建用户相同。
+    返回导入统计和逐行错误报告，单行失败不影响其他行。
+    """
+    try:
+        fmt = detect_format(request.headers.get("content-type"), format)
+        rows = parse_import_rows(await request.body(), fmt)
+        report = await UserService.bulk_import_users(db, rows)
+        response = ResponseUtil.success(report, f"导入完成：成功 {report['created']} 条，失败 {report['failed']} 条")
+        return ApiJSONResponse(response)
+        
+    except BusinessException as e:
+        response = ResponseUtil.bad_request(e.message)
+        raise HTTPException(status_code=400, detail=response.to_dict())
+    except Exception as e:
+        response = ResponseUtil.internal_error(f"导入失败: {str(e)}")
+        raise HTTPException(status_code=500, detail=response.to_dict())
+
+
+@router.get("/export", summary="导出用户")
+async def export_users(
+    format: str = Query("ndjson", description="导出格式：ndjson 或 csv"),
+    current_user: UserPrincipal = Depends(get_current_superuser)
+):
+    """流式导出全部用户（需要超级管理员权限），数据量再大也不会一次性加载到内存"""
+    try:
+        return export_response("users", format, current_user.id)
+        
+    except BusinessException as e:
+        response = ResponseUtil.bad_request(e.message)
+        raise HTTPException(status_code=400, detail=response.to_dict())
+
+
+@router.get("/{user_id}", response_model=ApiResult[UserDetail], summary="获取指定用户信息")
 async def get_user_by_id(
     user_id: int,
-    current_user: UserModel = Depends(get_current_superuser),
-    db: AsyncSession = Depends(get_db)
+    current_user: UserPrincipal = Depends(get_current_superuser),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """获取指定用户信息（需要超级管理员权限）"""
     try:
@@ -190,17 +257,8 @@ async def get_user_by_id(
             response = ResponseUtil.not_found("用户不存在")
             raise HTTPException(status_code=404, detail=response.to_dict())
         
-        user_data = user.to_dict(include_relationships=['roles'])
-        # 为每个角色添加菜单数据
-        if 'roles' in user_data and user_data['roles']:
-            for role_data in user_data['roles']:
-                # 获取对应的角色对象来获取菜单数据
-                role_obj = next((r for r in user.roles if r.id == role_data['id']), None)
-                if role_obj:
-                    role_data['menus'] = [menu.to_dict() for menu in role_obj.menus if menu.is_active and not menu.is_deleted]
-        
-        response = ResponseUtil.success(user_data, "查询成功")
-        return response.to_dict()
+        response = ResponseUtil.success(dump_model(UserDetail, user), "查询成功")
+        return ApiJSONResponse(response)
         
     except HTTPException:
         raise
@@ -209,18 +267,18 @@ async def get_user_by_id(
         raise HTTPException(status_code=500, detail=response.to_dict())
 
 
-@router.put("/{user_id}", response_model=dict, summary="更新指定用户信息")
+@router.put("/{user_id}", response_model=ApiResult[UserDetail], summary="更新指定用户信息")
 async def update_user_by_id(
     user_id: int,
     user_data: UserUpdate,
-    current_user: UserModel = Depends(get_current_superuser),
+    current_user: UserPrincipal = Depends(get_current_superuser),
     db: AsyncSession = Depends(get_db)
 ):
     """更新指定用户信息（需要超级管理员权限）"""
     try:
         updated_user = await UserService.update_user(db, user_id, user_data)
         response = ResponseUtil.success(updated_user, "更新成功")
-        return response.to_dict()
+        return ApiJSONResponse(response)
         
     except BusinessException as e:
         response = ResponseUtil.bad_request(e.message)
@@ -236,7 +294,7 @@ async def update_user_by_id(
 @router.delete("/{user_id}", response_model=dict, summary="删除用户")
 async def delete_user_by_id(
     user_id: int,
-    current_user: UserModel = Depends(get_current_superuser),
+    current_user: UserPrincipal = Depends(get_current_superuser),
     db: AsyncSession = Depends(get_db)
 ):
     """删除用户（需要超级管理员权限）"""
@@ -244,7 +302,7 @@ async def delete_user_by_id(
         await UserService.delete_user(db, user_id)
         result = {"id": user_id, "deleted": True}
         response = ResponseUtil.success(result, "删除成功")
-        return response.to_dict()
+        return ApiJSONResponse(response)
         
     except NotFoundException as e:
         response = ResponseUtil.not_found(e.message)
@@ -258,14 +316,14 @@ async def delete_user_by_id(
 async def assign_user_roles(
     user_id: int,
     role_ids: List[int],
-    current_user: UserModel = Depends(get_current_superuser),
+    current_user: UserPrincipal = Depends(get_current_superuser),
     db: AsyncSession = Depends(get_db)
 ):
     """为用户分配角色（需要超级管理员权限）"""
     try:
         await UserService.assign_roles(db, user_id, role_ids)
         response = ResponseUtil.success(None, "角色分配成功")
-        return response.to_dict()
+        return ApiJSONResponse(response)
         
     except NotFoundException as e:
         response = ResponseUtil.not_found(e.message)
@@ -0,0 +1,32 @@
+"""
+通用响应结构模型（用于接口文档）
+"""
+from typing import Generic, List, Optional, TypeVar
+from pydantic import BaseModel, Field
+
+T = TypeVar("T")
+
+
+class ApiResult(BaseModel, Generic[T]):
+    """统一响应结构"""
+    code: int = Field(..., description="响应状态码", examples=[200])
+    message: str = Field(..., description="响应消息", examples=["查询成功"])
+    data: Optional[T] = Field(None, description="响应数据")
+    timestamp: int = Field(..., description="响应时间戳（毫秒）", examples=[1700000000000])
+
+
+class Pagination(BaseModel):
+    """分页信息"""
+    page: int
+    per_page: int
+    total: Optional[int] = None
+    pages: Optional[int] = None
+    has_next: bool
+    has_prev: bool
+
+
+class PageData(BaseModel, Generic[T]):
+    """分页数据"""
+    items: List[T]
+    pagination: Pagination
+    next_cursor: Optional[str] = None
@@ -4,6 +4,7 @@
 from typing import Optional, List
 from datetime import datetime
 from pydantic import BaseModel, Field
+from app.schemas.menu import Menu
 
 
 class RoleBase(BaseModel):
@@ -71,6 +72,11 @@ class RoleWithMenus(RoleInDBBase):
     menus: List["MenuSimple"] = []
 
 
+class RoleWithMenuDetails(RoleInDBBase):
+    """包含完整菜单信息的角色"""
+    menus: List[Menu] = []
+
+
 class RoleAssignUsers(BaseModel):
     """角色分配用户"""
     user_ids: List[int] = Field(..., description="用户ID列表", examples=[[1, 2, 3]])
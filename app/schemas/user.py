@@ -4,6 +4,7 @@
 from typing import Optional, List
 from datetime import datetime
 from pydantic import BaseModel, EmailStr, Field
+from app.schemas.role import RoleWithMenuDetails
 
 
 class UserBase(BaseModel):
@@ -78,6 +79,8 @@ class UserChangePassword(BaseModel):
 
 class UserInDBBase(UserBase):
     """数据库中的用户基础信息"""
+    # 已入库的邮箱在写入时校验过，输出时不再按 EmailStr 校验
+    email: str
     id: int
     is_superuser: bool
     created_at: datetime
@@ -147,11 +150,25 @@ class TokenData(BaseModel):
     user_id: Optional[int] = Field(None, examples=[1, 2, 3])
 
 
+class UserPrincipal(BaseModel):
+    """已认证用户的精简身份信息"""
+    id: int = Field(..., examples=[1])
+    username: str = Field(..., examples=["admin"])
+    is_active: bool = Field(..., examples=[True])
+    is_superuser: bool = Field(..., examples=[False])
+    role_ids: List[int] = Field(default_factory=list, description="角色ID列表", examples=[[1, 2]])
+
+
 class UserWithRoles(UserInDBBase):
     """包含角色的用户信息"""
     roles: List["RoleSimple"] = []
 
 
+class UserDetail(UserInDBBase):
+    """用户详情，包含角色及角色下可用的菜单"""
+    roles: List[RoleWithMenuDetails] = []
+
+
 class RoleSimple(BaseModel):
     """简化的角色信息"""
     id: int = Field(..., examples=[1, 2, 3])
@@ -1,21 +1,40 @@
 """
 菜单相关业务逻辑服务
 """
-from typing import Optional, List, Dict, Any
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Optional, List, Dict, Any, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, or_
+from sqlalchemy import select, func, or_, and_
 from sqlalchemy.orm import selectinload
 from app.models.menu import Menu
-from app.models.user import User, Role
 from app.schemas.menu import MenuCreate, MenuUpdate
-from app.utils.response import BusinessException, NotFoundException
+from app.services.permission_engine import permission_engine
+from app.services.user_service import UserService
+from app.utils.cache import cached, invalidates, record_changes, subscribe_tags
+from app.utils.compression import CompressedPayload
+from app.utils.database import primary_reads
+from app.utils.response import BusinessException, NotFoundException, ResponseUtil, json_default
+from app.utils.search_index import index_entity, search_ids
+from app.utils.pagination import encode_cursor, decode_cursor, fetch_page, total_cache
 from config import config
 
 
+# 菜单版本号，菜单增删改时递增
+_menu_version = 0
+# 菜单树缓存：按版本号保存已构建的树和序列化后的响应
+_menu_tree_cache: Dict[str, Any] = {}
+# 用户菜单树缓存：按启用角色ID组合（角色指纹）共享
+_role_set_tree_cache: "OrderedDict[Tuple[int, ...], Dict[str, Any]]" = OrderedDict()
+
+
 class MenuService:
     """菜单服务类"""
     
     @staticmethod
+    @invalidates(tags=["menus"])
     async def create_menu(db: AsyncSession, menu_data: MenuCreate) -> Dict[str, Any]:
         """
         创建菜单
@@ -57,6 +76,7 @@ class MenuService:
         db_menu = Menu(**menu_data.model_dump())
         
         db.add(db_menu)
+        record_changes(db, "menus", db_menu)
         await db.commit()
         await db.refresh(db_menu)
         
@@ -82,6 +102,7 @@ class MenuService:
         return result.scalar_one_or_none()
     
     @staticmethod
+    @invalidates(tags=["menus"])
     async def update_menu(db: AsyncSession, menu_id: int, menu_data: MenuUpdate) -> Optional[Dict[str, Any]]:
         """
         更新菜单信息
@@ -138,17 +159,23 @@ class MenuService:
             if existing_path_menu:
                 raise BusinessException("菜单路径已存在")
         
-        # 更新字段
+        # 排序号参与游标分页的排序键，不允许置空
         update_data = menu_data.model_dump(exclude_unset=True)
+        if "order_num" in update_data and update_data["order_num"] is None:
+            raise BusinessException("排序号不能为空")
+        
+        # 更新字段
         for field, value in update_data.items():
             setattr(menu, field, value)
         
+        record_changes(db, "menus", menu)
         await db.commit()
         await db.refresh(menu)
         
         return menu.to_dict()
     
     @staticmethod
+    @invalidates(tags=["menus"])
     async def delete_menu(db: AsyncSession, menu_id: int) -> bool:
         """
         删除菜单（软删除）
@@ -178,6 +205,7 @@ class MenuService:
             raise BusinessException("存在子菜单，不能删除")
         
         menu.is_deleted = True
+        record_changes(db, "menus", menu)
         await db.commit()
         
         return True
@@ -187,19 +215,28 @@ class MenuService:
         db: AsyncSession, 
         page: int = 1, 
         per_page: int = config.DEFAULT_PAGE_SIZE,
-        search: Optional[str] = None
+        search: Optional[str] = None,
+        cursor: Optional[str] = None,
+        include_total: bool = True
     ) -> Dict[str, Any]:
         """
         分页获取菜单列表
         
+        传入 cursor 时按（排序号, 菜单ID）游标分页（忽略页码），否则按页码分页。
+        
         Args:
             db: 数据库会话
             page: 页码
             per_page: 每页数量
             search: 搜索关键词
+            cursor: 分页游标
+            include_total: 是否统计总数
             
         Returns:
             Dict[str, Any]: 分页结果
+            
+        Raises:
+            BusinessException: 游标格式无效
         """
         # 限制每页最大数量
         per_page = min(per_page, config.MAX_PAGE_SIZE)
@@ -216,17 +253,25 @@ class MenuService:
                 Menu.component.ilike(f"%{search}%"),
                 Menu.permission.ilike(f"%{search}%")
             )
+            candidate_ids = search_ids("menus", search)
+            if candidate_ids is not None:
+                # 通过搜索索引得到候选ID缩小范围，关键词仍由数据库校验，避免索引过期返回错误结果
+                search_filter = and_(Menu.id.in_(candidate_ids), search_filter)
             query = query.where(search_filter)
             count_query = count_query.where(search_filter)
         
-        # 获取总数
-        total_result = await db.execute(count_query)
-        total = total_result.scalar()
-        
-        # 获取分页数据
-        query = query.options(selectinload(Menu.children), selectinload(Menu.roles)).offset(offset).limit(per_page).order_by(Menu.order_num)
-        result = await db.execute(query)
-        menus = result.scalars().all()
+        # 获取分页数据和总数
+        if cursor:
+            last_order_num, last_id = decode_cursor(cursor, 2)
+            query = query.where(or_(
+                Menu.order_num > last_order_num,
+                and_(Menu.order_num == last_order_num, Menu.id > last_id)
+            ))
+            offset = None
+        query = query.order_by(Menu.order_num, Menu.id)
+        menus, total, has_more = await fetch_page(
+            db, query, count_query, "menus", search, per_page, offset, include_total
+        )
         
         # 转换为字典
         items = [menu.to_dict() for menu in menus]
@@ -236,37 +281,53 @@ class MenuService:
             "total": total,
             "page": page,
             "per_page": per_page,
-            "pages": (total + per_page - 1) // per_page,
-            "has_next": page * per_page < total,
-            "has_prev": page > 1
+            "pages": (total + per_page - 1) // per_page if total is not None else None,
+            "has_next": has_more,
+            "has_prev": page > 1,
+            "next_cursor": encode_cursor([menus[-1].order_num, menus[-1].id]) if has_more else None
         }
     
     @staticmethod
-    async def get_menu_tree(db: AsyncSession) -> List[Dict[str, Any]]:
+    def bump_menu_version() -> None:
+        """递增菜单版本号，使菜单树缓存失效（菜单写操作提交后自动调用）"""
+        global _menu_version
+        _menu_version += 1
+        _role_set_tree_cache.clear()
+    
+    @staticmethod
+    def invalidate_role_menu_trees(*role_ids: int) -> None:
         """
-        获取菜单树形结构
+        使包含指定角色的用户菜单树缓存失效（角色及角色菜单写操作提交后自动调用）
         
         Args:
-            db: 数据库会话
+            role_ids: 角色ID，不传时清空全部
+        """
+        if not role_ids:
+            _role_set_tree_cache.clear()
+            return
+        role_ids = set(role_ids)
+        for fingerprint in [key for key in _role_set_tree_cache if role_ids.intersection(key)]:
+            _role_set_tree_cache.pop(fingerprint, None)
+    
+    @staticmethod
+    def _build_tree(menus: List[Menu]) -> List[Dict[str, Any]]:
+        """
+        将按排序号排列的菜单列表构建为树
+        
+        Args:
+            menus: 菜单列表
             
         Returns:
             List[Dict[str, Any]]: 菜单树
         """
-        # 获取所有激活的菜单
-        result = await db.execute(
-            select(Menu)
-            .where(Menu.is_deleted == False, Menu.is_active == True)
-            .order_by(Menu.order_num)
-        )
-        all_menus = result.scalars().all()
-        
-        # 构建菜单树
-        menu_dict = {menu.id: menu.to_dict() for menu in all_menus}
+        menu_dict = {menu.id: menu.to_dict() for menu in menus}
+        # 子菜单的排序号可能小于父菜单，先为所有节点准备 children
+        for menu_data in menu_dict.values():
+            menu_data['children'] = []
         tree = []
         
-        for menu in all_menus:
+        for menu in menus:
             menu_data = menu_dict[menu.id]
-            menu_data['children'] = []
             
             if menu.parent_id is None or menu.parent_id == 0:
                 # 顶级菜单
@@ -280,74 +341,176 @@ class MenuService:
         return tree
     
     @staticmethod
-    async def get_user_menus(db: AsyncSession, user_id: int) -> List[Dict[str, Any]]:
+    async def _get_menu_tree_entry(db: AsyncSession) -> Dict[str, Any]:
         """
-        获取用户可访问的菜单
+        获取当前版本的菜单树缓存，版本变化或超过 MENU_TREE_CACHE_TTL 时重新构建
+        
+        Args:
+            db: 数据库会话
+            
+        Returns:
+            Dict[str, Any]: 包含 tree、payload、etag 的缓存条目
+        """
+        entry = _menu_tree_cache.get("entry")
+        if entry and entry["version"] == _menu_version and entry["expires_at"] > time.monotonic():
+            return entry
+        
+        version = _menu_version
+        
+        # 获取所有激活的菜单，缓存在进程内共享，从主库读取
+        with primary_reads(db):
+            result = await db.execute(
+                select(Menu)
+                .where(Menu.is_deleted == False, Menu.is_active == True)
+                .order_by(Menu.order_num)
+            )
+        tree = MenuService._build_tree(result.scalars().all())
+        
+        # ETag 由菜单树内容计算，多个进程对相同内容给出相同的 ETag
+        data_bytes = json.dumps(tree, ensure_ascii=False, default=json_default, separators=(",", ":")).encode("utf-8")
+        entry = {
+            "version": version,
+            "expires_at": time.monotonic() + config.MENU_TREE_CACHE_TTL,
+            "tree": tree,
+            "payload": CompressedPayload(ResponseUtil.success(tree, "查询成功").to_bytes()),
+            "etag": f'"{hashlib.sha1(data_bytes).hexdigest()}"',
+        }
+        
+        # 构建期间菜单发生变化时不写入缓存
+        if version == _menu_version:
+            _menu_tree_cache["entry"] = entry
+        return entry
+    
+    @staticmethod
+    async def get_menu_tree(db: AsyncSession) -> List[Dict[str, Any]]:
+        """
+        获取菜单树形结构
+        
+        返回的树在同一版本内共享，调用方不应修改。
+        
+        Args:
+            db: 数据库会话
+            
+        Returns:
+            List[Dict[str, Any]]: 菜单树
+        """
+        entry = await MenuService._get_menu_tree_entry(db)
+        return entry["tree"]
+    
+    @staticmethod
+    async def get_menu_tree_payload(db: AsyncSession) -> Tuple[CompressedPayload, str]:
+        """
+        获取已序列化的菜单树响应
+        
+        Args:
+            db: 数据库会话
+            
+        Returns:
+            Tuple[CompressedPayload, str]: 完整响应体（含按编码缓存的压缩版本）和 ETag
+        """
+        entry = await MenuService._get_menu_tree_entry(db)
+        return entry["payload"], entry["etag"]
+    
+    @staticmethod
+    async def _get_user_menu_entry(db: AsyncSession, user_id: int) -> Dict[str, Any]:
+        """
+        获取用户菜单树缓存条目
+        
+        拥有相同启用角色组合的用户共享同一棵菜单树，
+        角色菜单变化或任意菜单变化时对应条目失效。
         
         Args:
             db: 数据库会话
             user_id: 用户ID
             
         Returns:
-            List[Dict[str, Any]]: 用户菜单树
+            Dict[str, Any]: 包含 tree、payload 的缓存条目
         """
-        # 获取用户信息和角色
-        user_result = await db.execute(
-            select(User)
-            .options(selectinload(User.roles).selectinload(Role.menus))
-            .where(User.id == user_id, User.is_deleted == False)
-        )
-        user = user_result.scalar_one_or_none()
+        # 获取用户身份信息
+        user = await UserService.get_principal(db, user_id)
         
         if not user:
-            return []
+            return {"tree": [], "payload": CompressedPayload(ResponseUtil.success([], "查询成功").to_bytes())}
         
         # 如果是超级管理员，返回所有菜单
         if user.is_superuser:
-            return await MenuService.get_menu_tree(db)
+            return await MenuService._get_menu_tree_entry(db)
         
-        # 获取用户角色关联的所有菜单ID
-        menu_ids = set()
-        for role in user.roles:
-            if role.is_active:
-                for menu in role.menus:
-                    if menu.is_active and not menu.is_deleted:
-                        menu_ids.add(menu.id)
+        await permission_engine.ensure_loaded(db)
+        fingerprint = permission_engine.active_role_ids(user.role_ids)
         
-        if not menu_ids:
-            return []
+        entry = _role_set_tree_cache.get(fingerprint)
+        if entry and entry["version"] == _menu_version and entry["expires_at"] > time.monotonic():
+            _role_set_tree_cache.move_to_end(fingerprint)
+            return entry
         
-        # 获取菜单详情
-        menus_result = await db.execute(
-            select(Menu)
-            .where(
-                Menu.id.in_(menu_ids),
-                Menu.is_deleted == False,
-                Menu.is_active == True,
-                Menu.is_visible == True
-            )
-            .order_by(Menu.order_num)
-        )
-        user_menus = menus_result.scalars().all()
+        version = _menu_version
+        
+        # 通过权限位图计算角色组合可访问的菜单ID
+        menu_ids = permission_engine.mask_to_ids(permission_engine.user_mask(fingerprint))
         
-        # 构建菜单树
-        menu_dict = {menu.id: menu.to_dict() for menu in user_menus}
         tree = []
+        if menu_ids:
+            # 获取菜单详情，缓存在相同角色组合的用户间共享，从主库读取
+            with primary_reads(db):
+                menus_result = await db.execute(
+                    select(Menu)
+                    .where(
+                        Menu.id.in_(menu_ids),
+                        Menu.is_deleted == False,
+                        Menu.is_active == True,
+                        Menu.is_visible == True
+                    )
+                    .order_by(Menu.order_num)
+                )
+            tree = MenuService._build_tree(menus_result.scalars().all())
+        
+        entry = {
+            "version": version,
+            "expires_at": time.monotonic() + config.MENU_TREE_CACHE_TTL,
+            "tree": tree,
+            "payload": CompressedPayload(ResponseUtil.success(tree, "查询成功").to_bytes()),
+        }
         
-        for menu in user_menus:
-            menu_data = menu_dict[menu.id]
-            menu_data['children'] = []
+        # 构建期间菜单发生变化时不写入缓存
+        if version == _menu_version and config.USER_MENU_CACHE_MAX_SIZE > 0:
+            _role_set_tree_cache[fingerprint] = entry
+            _role_set_tree_cache.move_to_end(fingerprint)
+            while len(_role_set_tree_cache) > config.USER_MENU_CACHE_MAX_SIZE:
+                _role_set_tree_cache.popitem(last=False)
+        return entry
+    
+    @staticmethod
+    async def get_user_menus(db: AsyncSession, user_id: int) -> List[Dict[str, Any]]:
+        """
+        获取用户可访问的菜单
+        
+        返回的树在相同角色组合的用户间共享，调用方不应修改。
+        
+        Args:
+            db: 数据库会话
+            user_id: 用户ID
             
-            if menu.parent_id is None or menu.parent_id == 0:
-                # 顶级菜单
-                tree.append(menu_data)
-            else:
-                # 子菜单
-                parent = menu_dict.get(menu.parent_id)
-                if parent:
-                    parent['children'].append(menu_data)
+        Returns:
+            List[Dict[str, Any]]: 用户菜单树
+        """
+        entry = await MenuService._get_user_menu_entry(db, user_id)
+        return entry["tree"]
+    
+    @staticmethod
+    async def get_user_menus_payload(db: AsyncSession, user_id: int) -> CompressedPayload:
+        """
+        获取已序列化的用户菜单树响应
         
-        return tree
+        Args:
+            db: 数据库会话
+            user_id: 用户ID
+            
+        Returns:
+            CompressedPayload: 完整响应体（含按编码缓存的压缩版本）
+        """
+        entry = await MenuService._get_user_menu_entry(db, user_id)
+        return entry["payload"]
     
     @staticmethod
     async def check_user_menu_permission(db: AsyncSession, user_id: int, menu_id: int) -> bool:
@@ -362,13 +525,8 @@ class MenuService:
         Returns:
             bool: 是否有权限
         """
-        # 获取用户信息
-        user_result = await db.execute(
-            select(User)
-            .options(selectinload(User.roles).selectinload(Role.menus))
-            .where(User.id == user_id, User.is_deleted == False)
-        )
-        user = user_result.scalar_one_or_none()
+        # 获取用户身份信息
+        user = await UserService.get_principal(db, user_id)
         
         if not user or not user.is_active:
             return False
@@ -377,16 +535,12 @@ class MenuService:
         if user.is_superuser:
             return True
         
-        # 检查角色权限
-        for role in user.roles:
-            if role.is_active:
-                for menu in role.menus:
-                    if menu.id == menu_id and menu.is_active and not menu.is_deleted:
-                        return True
-        
-        return False
+        # 检查角色权限位图
+        await permission_engine.ensure_loaded(db)
+        return permission_engine.has_permission(user.role_ids, menu_id)
     
     @staticmethod
+    @cached(tags=["menus"])
     async def get_all_menus(db: AsyncSession) -> List[Dict[str, Any]]:
         """
         获取所有可用菜单
@@ -404,3 +558,20 @@ class MenuService:
         )
         menus = result.scalars().all()
         return [menu.to_dict() for menu in menus]
+
+
+def _on_menus_changed(menus: List[Menu]) -> None:
+    """菜单变更提交后使菜单树缓存失效，并更新分页总数、搜索索引和权限位图"""
+    MenuService.bump_menu_version()
+    total_cache.invalidate("menus")
+    if not menus:
+        permission_engine.invalidate()
+    for menu in menus:
+        index_entity("menus", menu)
+        permission_engine.set_menu_active(menu.id, bool(menu.is_active) and not menu.is_deleted)
+
+
+subscribe_tags(["menus"], _on_menus_changed)
+# 角色变更记录为角色实体，角色菜单变更记录为 (角色ID, 操作, 菜单ID列表)
+subscribe_tags(["roles"], lambda roles: MenuService.invalidate_role_menu_trees(*[role.id for role in roles]))
+subscribe_tags(["role_menus"], lambda changes: MenuService.invalidate_role_menu_trees(*[change[0] for change in changes]))
@@ -0,0 +1,291 @@
+"""
+菜单权限位图引擎
+
+将每个角色的菜单集合编译为以菜单ID为位索引的整数位图，
+用户的有效权限为其所有启用角色位图的按位或，权限检查即一次位测试。
+"""
+import asyncio
+import time
+from typing import Dict, Iterable, List, Set, Tuple
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.associations import role_menu_association
+from app.models.menu import Menu
+from app.models.user import Role
+from app.utils.database import primary_reads
+from config import config
+
+
+class PermissionEngine:
+    """
+    菜单权限位图引擎
+    
+    位图在进程内编译，本进程的写操作提交后由角色和菜单服务订阅的缓存标签增量更新；其他进程的写操作通过
+    PERMISSION_CACHE_TTL 到期后的全量重新编译生效。
+    """
+    
+    # 全量编译期间发生写操作时的最大重试次数
+    MAX_LOAD_ATTEMPTS = 3
+    
+    def __init__(self, ttl: float = 60):
+        """
+        初始化权限引擎
+        
+        Args:
+            ttl: 位图有效期（秒），到期后下次使用时从数据库重新编译，0表示不过期
+        """
+        self.ttl = ttl
+        self.loaded = False
+        self._expires_at = 0.0
+        # 写操作计数，编译期间发生写操作时丢弃编译结果
+        self._generation = 0
+        self._load_lock = asyncio.Lock()
+        # 角色ID -> 已分配菜单位图
+        self._role_bits: Dict[int, int] = {}
+        # 启用中的角色ID
+        self._active_roles: Set[int] = set()
+        # 启用且未删除的菜单位图
+        self._menu_mask = 0
+    
+    @property
+    def fresh(self) -> bool:
+        """位图已编译且未过期"""
+        return self.loaded and (self.ttl <= 0 or time.monotonic() < self._expires_at)
+    
+    async def ensure_loaded(self, db: AsyncSession) -> None:
+        """
+        确保位图已从数据库编译且未过期，并发调用只编译一次
+        
+        Args:
+            db: 数据库会话
+        """
+        if self.fresh:
+            return
+        async with self._load_lock:
+            if not self.fresh:
+                await self.load(db)
+    
+    async def load(self, db: AsyncSession) -> None:
+        """
+        从数据库全量编译角色位图（查询主库）
+        
+        编译期间本进程发生了写操作时，编译结果可能是写入前的快照，丢弃后重新编译；
+        多次重试仍有写入时使用最后一次结果，但不标记为已加载，下次使用时再编译。
+        
+        Args:
+            db: 数据库会话
+        """
+        for _ in range(self.MAX_LOAD_ATTEMPTS):
+            generation = self._generation
+            with primary_reads(db):
+                snapshot = await self._compile(db)
+            if generation == self._generation:
+                self._install(*snapshot)
+                self.loaded = True
+                self._expires_at = time.monotonic() + self.ttl
+                return
+        self._install(*snapshot)
+        self.loaded = False
+    
+    def _install(self, menu_mask: int, role_bits: Dict[int, int], active_roles: Set[int]) -> None:
+        """替换当前位图"""
+        self._menu_mask = menu_mask
+        self._role_bits = role_bits
+        self._active_roles = active_roles
+    
+    @staticmethod
+    async def _compile(db: AsyncSession) -> Tuple[int, Dict[int, int], Set[int]]:
+        """
+        查询菜单、角色和角色菜单关联并编译位图
+        
+        Returns:
+            Tuple[int, Dict[int, int], Set[int]]: 可用菜单位图、角色位图、启用的角色ID
+        """
+        menus_result = await db.execute(
+            select(Menu.id).where(Menu.is_deleted == False, Menu.is_active == True)
+        )
+        menu_mask = 0
+        for menu_id in menus_result.scalars():
+            menu_mask |= 1 << menu_id
+        
+        roles_result = await db.execute(
+            select(Role.id, Role.is_active).where(Role.is_deleted == False)
+        )
+        role_bits: Dict[int, int] = {}
+        active_roles: Set[int] = set()
+        for role_id, is_active in roles_result.all():
+            role_bits[role_id] = 0
+            if is_active:
+                active_roles.add(role_id)
+        
+        assoc_result = await db.execute(
+            select(role_menu_association.c.role_id, role_menu_association.c.menu_id)
+        )
+        for role_id, menu_id in assoc_result.all():
+            if role_id in role_bits:
+                role_bits[role_id] |= 1 << menu_id
+        
+        return menu_mask, role_bits, active_roles
+    
+    def invalidate(self) -> None:
+        """丢弃已编译的位图，下次使用时重新加载"""
+        self._generation += 1
+        self.loaded = False
+        self._install(0, {}, set())
+    
+    def set_role(self, role_id: int, is_active: bool) -> None:
+        """
+        新增角色或更新角色启用状态
+        
+        Args:
+            role_id: 角色ID
+            is_active: 是否启用
+        """
+        self._generation += 1
+        if not self.loaded:
+            return
+        self._role_bits.setdefault(role_id, 0)
+        if is_active:
+            self._active_roles.add(role_id)
+        else:
+            self._active_roles.discard(role_id)
+    
+    def remove_role(self, role_id: int) -> None:
+        """
+        移除角色
+        
+        Args:
+            role_id: 角色ID
+        """
+        self._generation += 1
+        if not self.loaded:
+            return
+        self._role_bits.pop(role_id, None)
+        self._active_roles.discard(role_id)
+    
+    def set_role_menus(self, role_id: int, menu_ids: Iterable[int]) -> None:
+        """
+        替换角色的菜单集合
+        
+        Args:
+            role_id: 角色ID
+            menu_ids: 菜单ID列表
+        """
+        self._generation += 1
+        if not self.loaded:
+            return
+        bits = 0
+        for menu_id in menu_ids:
+            bits |= 1 << menu_id
+        self._role_bits[role_id] = bits
+    
+    def add_role_menus(self, role_id: int, menu_ids: Iterable[int]) -> None:
+        """
+        为角色增加菜单
+        
+        Args:
+            role_id: 角色ID
+            menu_ids: 菜单ID列表
+        """
+        self._generation += 1
+        if not self.loaded:
+            return
+        bits = self._role_bits.get(role_id, 0)
+        for menu_id in menu_ids:
+            bits |= 1 << menu_id
+        self._role_bits[role_id] = bits
+    
+    def remove_role_menus(self, role_id: int, menu_ids: Iterable[int]) -> None:
+        """
+        移除角色的菜单
+        
+        Args:
+            role_id: 角色ID
+            menu_ids: 菜单ID列表
+        """
+        self._generation += 1
+        if not self.loaded:
+            return
+        bits = self._role_bits.get(role_id, 0)
+        for menu_id in menu_ids:
+            bits &= ~(1 << menu_id)
+        self._role_bits[role_id] = bits
+    
+    def set_menu_active(self, menu_id: int, is_active: bool) -> None:
+        """
+        更新菜单可用状态（启用且未删除）
+        
+        Args:
+            menu_id: 菜单ID
+            is_active: 是否可用
+        """
+        self._generation += 1
+        if not self.loaded:
+            return
+        if is_active:
+            self._menu_mask |= 1 << menu_id
+        else:
+            self._menu_mask &= ~(1 << menu_id)
+    
+    def active_role_ids(self, role_ids: Iterable[int]) -> Tuple[int, ...]:
+        """
+        过滤出启用中的角色ID，作为角色组合指纹
+        
+        Args:
+            role_ids: 用户的角色ID列表
+            
+        Returns:
+            Tuple[int, ...]: 升序的启用角色ID
+        """
+        return tuple(sorted(role_id for role_id in set(role_ids) if role_id in self._active_roles))
+    
+    def user_mask(self, role_ids: Iterable[int]) -> int:
+        """
+        计算用户的有效菜单位图
+        
+        Args:
+            role_ids: 用户的角色ID列表
+            
+        Returns:
+            int: 有效菜单位图
+        """
+        mask = 0
+        for role_id in role_ids:
+            if role_id in self._active_roles:
+                mask |= self._role_bits.get(role_id, 0)
+        return mask & self._menu_mask
+    
+    def has_permission(self, role_ids: Iterable[int], menu_id: int) -> bool:
+        """
+        检查角色集合是否拥有菜单权限
+        
+        Args:
+            role_ids: 用户的角色ID列表
+            menu_id: 菜单ID
+            
+        Returns:
+            bool: 是否有权限
+        """
+        return bool((self.user_mask(role_ids) >> menu_id) & 1)
+    
+    @staticmethod
+    def mask_to_ids(mask: int) -> List[int]:
+        """
+        将位图解码为菜单ID列表
+        
+        Args:
+            mask: 菜单位图
+            
+        Returns:
+            List[int]: 升序的菜单ID列表
+        """
+        menu_ids = []
+        while mask:
+            lowest = mask & -mask
+            menu_ids.append(lowest.bit_length() - 1)
+            mask ^= lowest
+        return menu_ids
+
+
+# 全局权限引擎实例（进程内）
+permission_engine = PermissionEngine(config.PERMISSION_CACHE_TTL)
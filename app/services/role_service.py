@@ -3,19 +3,53 @@
 """
 from typing import Optional, List, Dict, Any
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, or_
+from sqlalchemy import select, func, or_, and_, insert, delete
 from sqlalchemy.orm import selectinload
 from app.models.user import Role, User
 from app.models.menu import Menu
+from app.models.associations import user_role_association, role_menu_association
 from app.schemas.role import RoleCreate, RoleUpdate
+from app.services.user_service import USER_LIST_COLUMNS
+from app.services.permission_engine import permission_engine
+from app.utils.cache import cached, invalidates, record_changes, subscribe_tags
 from app.utils.response import BusinessException, NotFoundException
+from app.utils.search_index import index_entity, search_ids
+from app.utils.pagination import encode_cursor, decode_cursor, fetch_page, total_cache
 from config import config
 
 
+def _role_count_columns():
+    """
+    角色成员数和菜单数的关联子查询列
+    
+    每个角色各自计数，避免用户和菜单两张关联表同时连接时的行数膨胀。
+    """
+    user_count = (
+        select(func.count())
+        .select_from(user_role_association)
+        .join(User, User.id == user_role_association.c.user_id)
+        .where(user_role_association.c.role_id == Role.id, User.is_deleted == False)
+        .correlate(Role)
+        .scalar_subquery()
+        .label("user_count")
+    )
+    menu_count = (
+        select(func.count())
+        .select_from(role_menu_association)
+        .join(Menu, Menu.id == role_menu_association.c.menu_id)
+        .where(role_menu_association.c.role_id == Role.id, Menu.is_deleted == False, Menu.is_active == True)
+        .correlate(Role)
+        .scalar_subquery()
+        .label("menu_count")
+    )
+    return user_count, menu_count
+
+
 class RoleService:
     """角色服务类"""
     
     @staticmethod
+    @invalidates(tags=["roles"])
     async def create_role(db: AsyncSession, role_data: RoleCreate) -> Dict[str, Any]:
         """
         创建角色
@@ -44,32 +78,116 @@ class RoleService:
         db_role = Role(**role_data.model_dump())
         
         db.add(db_role)
+        record_changes(db, "roles", db_role)
         await db.commit()
         await db.refresh(db_role)
         
         return db_role.to_dict()
     
     @staticmethod
-    async def get_role_by_id(db: AsyncSession, role_id: int) -> Optional[Role]:
+    async def get_role_by_id(db: AsyncSession, role_id: int, with_users: bool = False) -> Optional[Role]:
         """
         根据ID获取角色
         
         Args:
             db: 数据库会话
             role_id: 角色ID
+            with_users: 是否加载成员集合，大角色的成员可能很多，仅在需要整体替换成员时加载
             
         Returns:
-            Optional[Role]: 角色对象
+            Optional[Role]: 角色对象（不加载菜单集合）
+        """
+        query = select(Role).where(Role.id == role_id, Role.is_deleted == False)
+        if with_users:
+            query = query.options(selectinload(Role.users))
+        result = await db.execute(query)
+        return result.scalar_one_or_none()
+    
+    @staticmethod
+    @cached(tags=["roles", "role_users", "role_menus", "users", "menus"])
+    async def get_role_detail(db: AsyncSession, role_id: int) -> Optional[Dict[str, Any]]:
         """
+        获取角色详情（含成员数和菜单数，不含成员列表）
+        
+        Args:
+            db: 数据库会话
+            role_id: 角色ID
+            
+        Returns:
+            Optional[Dict[str, Any]]: 角色信息，不存在时返回None
+        """
+        user_count, menu_count = _role_count_columns()
         result = await db.execute(
-            select(Role)
-            .options(
-                selectinload(Role.users),
-                selectinload(Role.menus).where(Menu.is_deleted == False, Menu.is_active == True)
-            )
+            select(Role, user_count, menu_count)
             .where(Role.id == role_id, Role.is_deleted == False)
         )
-        return result.scalar_one_or_none()
+        row = result.first()
+        if row is None:
+            return None
+        role, users, menus = row
+        return {**role.to_dict(), "user_count": users, "menu_count": menus}
+    
+    @staticmethod
+    async def get_role_users(
+        db: AsyncSession,
+        role_id: int,
+        per_page: int = config.DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None,
+        include_total: bool = True
+    ) -> Dict[str, Any]:
+        """
+        按用户ID游标分页获取角色成员
+        
+        Args:
+            db: 数据库会话
+            role_id: 角色ID
+            per_page: 每页数量
+            cursor: 分页游标
+            include_total: 是否统计总数
+            
+        Returns:
+            Dict[str, Any]: 分页结果
+            
+        Raises:
+            NotFoundException: 角色不存在
+            BusinessException: 游标格式无效
+        """
+        await RoleService._ensure_role_exists(db, role_id)
+        per_page = min(per_page, config.MAX_PAGE_SIZE)
+        
+        member_filter = (
+            user_role_association.c.role_id == role_id,
+            User.is_deleted == False,
+        )
+        query = (
+            select(*USER_LIST_COLUMNS)
+            .join(user_role_association, user_role_association.c.user_id == User.id)
+            .where(*member_filter)
+        )
+        count_query = (
+            select(func.count())
+            .select_from(user_role_association)
+            .join(User, User.id == user_role_association.c.user_id)
+            .where(*member_filter)
+        )
+        if cursor:
+            last_id, = decode_cursor(cursor, 1)
+            query = query.where(User.id > last_id)
+        query = query.order_by(User.id)
+        
+        rows, total, has_more = await fetch_page(
+            db, query, count_query, f"role_users:{role_id}", None, per_page,
+            include_total=include_total, scalars=False
+        )
+        items = [{column.key: row[index] for index, column in enumerate(USER_LIST_COLUMNS)} for row in rows]
+        
+        return {
+            "items": items,
+            "total": total,
+            "per_page": per_page,
+            "has_next": has_more,
+            "next_cursor": encode_cursor([items[-1]["id"]]) if has_more else None
+        }
     
     @staticmethod
     async def get_role_by_name(db: AsyncSession, name: str) -> Optional[Role]:
@@ -108,6 +226,7 @@ class RoleService:
         return result.scalar_one_or_none()
     
     @staticmethod
+    @invalidates(tags=["roles"])
     async def update_role(db: AsyncSession, role_id: int, role_data: RoleUpdate) -> Optional[Dict[str, Any]]:
         """
         更新角色信息
@@ -145,12 +264,14 @@ class RoleService:
         for field, value in update_data.items():
             setattr(role, field, value)
         
+        record_changes(db, "roles", role)
         await db.commit()
         await db.refresh(role)
         
-        return role.to_dict(include_relationships=['users', 'menus'])
+        return await RoleService.get_role_detail(db, role_id)
     
     @staticmethod
+    @invalidates(tags=["roles"])
     async def delete_role(db: AsyncSession, role_id: int) -> bool:
         """
         删除角色（软删除）
@@ -170,6 +291,7 @@ class RoleService:
             raise NotFoundException("角色不存在")
         
         role.is_deleted = True
+        record_changes(db, "roles", role)
         await db.commit()
         
         return True
@@ -179,26 +301,35 @@ class RoleService:
         db: AsyncSession, 
         page: int = 1, 
         per_page: int = config.DEFAULT_PAGE_SIZE,
-        search: Optional[str] = None
+        search: Optional[str] = None,
+        cursor: Optional[str] = None,
+        include_total: bool = True
     ) -> Dict[str, Any]:
         """
         分页获取角色列表
         
+        传入 cursor 时按角色ID游标分页（忽略页码），否则按页码分页。
+        
         Args:
             db: 数据库会话
             page: 页码
             per_page: 每页数量
             search: 搜索关键词
+            cursor: 分页游标
+            include_total: 是否统计总数
             
         Returns:
             Dict[str, Any]: 分页结果
+            
+        Raises:
+            BusinessException: 游标格式无效
         """
         # 限制每页最大数量
         per_page = min(per_page, config.MAX_PAGE_SIZE)
         offset = (page - 1) * per_page
         
-        # 构建查询条件
-        query = select(Role).where(Role.is_deleted == False)
+        # 构建查询条件，成员数和菜单数随分页查询一并取出
+        query = select(Role, *_role_count_columns()).where(Role.is_deleted == False)
         count_query = select(func.count(Role.id)).where(Role.is_deleted == False)
         
         if search:
@@ -207,38 +338,42 @@ class RoleService:
                 Role.code.ilike(f"%{search}%"),
                 Role.description.ilike(f"%{search}%")
             )
+            candidate_ids = search_ids("roles", search)
+            if candidate_ids is not None:
+                # 通过搜索索引得到候选ID缩小范围，关键词仍由数据库校验，避免索引过期返回错误结果
+                search_filter = and_(Role.id.in_(candidate_ids), search_filter)
             query = query.where(search_filter)
             count_query = count_query.where(search_filter)
         
-        # 获取总数
-        total_result = await db.execute(count_query)
-        total = total_result.scalar()
-        
-        # 获取分页数据
-        query = query.options(
-            selectinload(Role.users), 
-            selectinload(Role.menus).where(Menu.is_deleted == False, Menu.is_active == True)
-        ).offset(offset).limit(per_page)
-        result = await db.execute(query)
-        roles = result.scalars().all()
+        # 获取分页数据和总数
+        if cursor:
+            last_id, = decode_cursor(cursor, 1)
+            query = query.where(Role.id > last_id)
+            offset = None
+        query = query.order_by(Role.id)
+        rows, total, has_more = await fetch_page(
+            db, query, count_query, "roles", search, per_page, offset, include_total, scalars=False
+        )
         
-        # 转换为字典
+        # 转换为字典，成员列表通过 get_role_users 单独分页获取
         items = []
-        for role in roles:
-            role_data = role.to_dict(include_relationships=['users', 'menus'])
-            items.append(role_data)
+        for row in rows:
+            role, user_count, menu_count = row[0], row[1], row[2]
+            items.append({**role.to_dict(), "user_count": user_count, "menu_count": menu_count})
         
         return {
             "items": items,
             "total": total,
             "page": page,
             "per_page": per_page,
-            "pages": (total + per_page - 1) // per_page,
-            "has_next": page * per_page < total,
-            "has_prev": page > 1
+            "pages": (total + per_page - 1) // per_page if total is not None else None,
+            "has_next": has_more,
+            "has_prev": page > 1,
+            "next_cursor": encode_cursor([items[-1]["id"]]) if has_more else None
         }
     
     @staticmethod
+    @invalidates(tags=["role_users"])
     async def assign_users(db: AsyncSession, role_id: int, user_ids: List[int]) -> bool:
         """
         为角色分配用户
@@ -254,7 +389,7 @@ class RoleService:
         Raises:
             NotFoundException: 角色不存在
         """
-        role = await RoleService.get_role_by_id(db, role_id)
+        role = await RoleService.get_role_by_id(db, role_id, with_users=True)
         if not role:
             raise NotFoundException("角色不存在")
         
@@ -264,17 +399,24 @@ class RoleService:
         )
         users = users_result.scalars().all()
         
+        # 原有成员和新成员的角色列表都会变化
+        affected_user_ids = {user.id for user in role.users} | {user.id for user in users}
+        
         # 清空现有用户并分配新用户
         role.users = users
+        record_changes(db, "role_users", *[(role_id, user_id) for user_id in affected_user_ids])
         await db.commit()
         
         return True
     
     @staticmethod
+    @invalidates(tags=["role_menus"])
     async def assign_menus(db: AsyncSession, role_id: int, menu_ids: List[int]) -> bool:
         """
         为角色分配菜单权限
         
+        直接删除角色在关联表中的全部行再写入新菜单，已停用或删除的菜单的旧关联也一并清除。
+        
         Args:
             db: 数据库会话
             role_id: 角色ID
@@ -286,23 +428,197 @@ class RoleService:
         Raises:
             NotFoundException: 角色不存在
         """
-        role = await RoleService.get_role_by_id(db, role_id)
-        if not role:
-            raise NotFoundException("角色不存在")
+        await RoleService._ensure_role_exists(db, role_id)
         
-        # 获取菜单对象
-        menus_result = await db.execute(
-            select(Menu).where(Menu.id.in_(menu_ids), Menu.is_deleted == False)
+        # 只为存在且未删除的菜单建立关联
+        result = await db.execute(
+            select(Menu.id).where(Menu.id.in_(set(menu_ids)), Menu.is_deleted == False)
         )
-        menus = menus_result.scalars().all()
+        valid_ids = result.scalars().all()
         
         # 清空现有菜单并分配新菜单
-        role.menus = menus
+        await db.execute(delete(role_menu_association).where(role_menu_association.c.role_id == role_id))
+        if valid_ids:
+            await db.execute(
+                insert(role_menu_association).values(
+                    [{"role_id": role_id, "menu_id": menu_id} for menu_id in valid_ids]
+                )
+            )
+        record_changes(db, "role_menus", (role_id, "set", valid_ids))
         await db.commit()
         
         return True
     
     @staticmethod
+    async def _ensure_role_exists(db: AsyncSession, role_id: int) -> None:
+        """
+        检查角色是否存在（只查询主键，不加载关联集合）
+        
+        Raises:
+            NotFoundException: 角色不存在
+        """
+        result = await db.execute(
+            select(Role.id).where(Role.id == role_id, Role.is_deleted == False)
+        )
+        if result.scalar_one_or_none() is None:
+            raise NotFoundException("角色不存在")
+    
+    @staticmethod
+    async def _insert_ignore(db: AsyncSession, table, rows: List[Dict[str, int]]) -> int:
+        """
+        向关联表批量插入，已存在的行忽略
+        
+        Args:
+            db: 数据库会话
+            table: 关联表
+            rows: 待插入的行
+            
+        Returns:
+            int: 实际插入的行数
+        """
+        if not rows:
+            return 0
+        stmt = (
+            insert(table)
+            .values(rows)
+            .prefix_with("IGNORE", dialect="mysql")
+            .prefix_with("OR IGNORE", dialect="sqlite")
+        )
+        result = await db.execute(stmt)
+        return result.rowcount
+    
+    @staticmethod
+    @invalidates(tags=["role_users"])
+    async def add_users(db: AsyncSession, role_id: int, user_ids: List[int]) -> int:
+        """
+        为角色增量添加用户，已拥有该角色的用户忽略
+        
+        直接写关联表，不加载角色现有的用户集合。
+        
+        Args:
+            db: 数据库会话
+            role_id: 角色ID
+            user_ids: 用户ID列表
+            
+        Returns:
+            int: 新增的关联数
+            
+        Raises:
+            NotFoundException: 角色不存在
+        """
+        await RoleService._ensure_role_exists(db, role_id)
+        
+        # 只为存在且未删除的用户建立关联
+        result = await db.execute(
+            select(User.id).where(User.id.in_(set(user_ids)), User.is_deleted == False)
+        )
+        valid_ids = result.scalars().all()
+        
+        added = await RoleService._insert_ignore(
+            db, user_role_association, [{"user_id": user_id, "role_id": role_id} for user_id in valid_ids]
+        )
+        record_changes(db, "role_users", *[(role_id, user_id) for user_id in valid_ids])
+        await db.commit()
+        
+        return added
+    
+    @staticmethod
+    @invalidates(tags=["role_users"])
+    async def remove_users(db: AsyncSession, role_id: int, user_ids: List[int]) -> int:
+        """
+        从角色中增量移除用户
+        
+        Args:
+            db: 数据库会话
+            role_id: 角色ID
+            user_ids: 用户ID列表
+            
+        Returns:
+            int: 移除的关联数
+            
+        Raises:
+            NotFoundException: 角色不存在
+        """
+        await RoleService._ensure_role_exists(db, role_id)
+        
+        result = await db.execute(
+            delete(user_role_association).where(
+                user_role_association.c.role_id == role_id,
+                user_role_association.c.user_id.in_(set(user_ids))
+            )
+        )
+        record_changes(db, "role_users", *[(role_id, user_id) for user_id in set(user_ids)])
+        await db.commit()
+        
+        return result.rowcount
+    
+    @staticmethod
+    @invalidates(tags=["role_menus"])
+    async def add_menus(db: AsyncSession, role_id: int, menu_ids: List[int]) -> int:
+        """
+        为角色增量添加菜单权限，已拥有的菜单忽略
+        
+        直接写关联表，不加载角色现有的菜单集合。
+        
+        Args:
+            db: 数据库会话
+            role_id: 角色ID
+            menu_ids: 菜单ID列表
+            
+        Returns:
+            int: 新增的关联数
+            
+        Raises:
+            NotFoundException: 角色不存在
+        """
+        await RoleService._ensure_role_exists(db, role_id)
+        
+        # 只为存在且未删除的菜单建立关联
+        result = await db.execute(
+            select(Menu.id).where(Menu.id.in_(set(menu_ids)), Menu.is_deleted == False)
+        )
+        valid_ids = result.scalars().all()
+        
+        added = await RoleService._insert_ignore(
+            db, role_menu_association, [{"role_id": role_id, "menu_id": menu_id} for menu_id in valid_ids]
+        )
+        record_changes(db, "role_menus", (role_id, "add", valid_ids))
+        await db.commit()
+        
+        return added
+    
+    @staticmethod
+    @invalidates(tags=["role_menus"])
+    async def remove_menus(db: AsyncSession, role_id: int, menu_ids: List[int]) -> int:
+        """
+        移除角色的菜单权限
+        
+        Args:
+            db: 数据库会话
+            role_id: 角色ID
+            menu_ids: 菜单ID列表
+            
+        Returns:
+            int: 移除的关联数
+            
+        Raises:
+            NotFoundException: 角色不存在
+        """
+        await RoleService._ensure_role_exists(db, role_id)
+        
+        result = await db.execute(
+            delete(role_menu_association).where(
+                role_menu_association.c.role_id == role_id,
+                role_menu_association.c.menu_id.in_(set(menu_ids))
+            )
+        )
+        record_changes(db, "role_menus", (role_id, "remove", list(menu_ids)))
+        await db.commit()
+        
+        return result.rowcount
+    
+    @staticmethod
+    @cached(tags=["roles"])
     async def get_all_roles(db: AsyncSession) -> List[Dict[str, Any]]:
         """
         获取所有可用角色
@@ -319,4 +635,52 @@ class RoleService:
             .order_by(Role.name)
         )
         roles = result.scalars().all()
-        return [role.to_dict() for role in roles]
\ No newline at end of file
+        return [role.to_dict() for role in roles]
+
+
+def _on_roles_changed(roles: List[Role]) -> None:
+    """角色变更提交后更新分页总数和搜索索引"""
+    total_cache.invalidate("roles")
+    for role in roles:
+        index_entity("roles", role)
+
+
+def _on_role_users_changed(links: List[tuple]) -> None:
+    """角色成员变更提交后使相关角色的成员总数失效，变更记录为 (角色ID, 用户ID)"""
+    if not links:
+        total_cache.invalidate_prefix("role_users:")
+        return
+    for role_id in {role_id for role_id, _ in links}:
+        total_cache.invalidate(f"role_users:{role_id}")
+
+
+def _sync_role_permissions(roles: List[Role]) -> None:
+    """角色变更提交后更新权限位图中的角色启用状态"""
+    if not roles:
+        permission_engine.invalidate()
+        return
+    for role in roles:
+        if role.is_deleted:
+            permission_engine.remove_role(role.id)
+        else:
+            permission_engine.set_role(role.id, bool(role.is_active))
+
+
+def _sync_role_menu_permissions(changes: List[tuple]) -> None:
+    """角色菜单变更提交后更新权限位图，变更记录为 (角色ID, 操作, 菜单ID列表)，操作为 set/add/remove"""
+    if not changes:
+        permission_engine.invalidate()
+        return
+    for role_id, action, menu_ids in changes:
+        if action == "set":
+            permission_engine.set_role_menus(role_id, menu_ids)
+        elif action == "add":
+            permission_engine.add_role_menus(role_id, menu_ids)
+        else:
+            permission_engine.remove_role_menus(role_id, menu_ids)
+
+
+subscribe_tags(["roles"], _on_roles_changed)
+subscribe_tags(["role_users"], _on_role_users_changed)
+subscribe_tags(["roles"], _sync_role_permissions)
+subscribe_tags(["role_menus"], _sync_role_menu_permissions)
@@ -1,21 +1,51 @@
 """
 用户相关业务逻辑服务
 """
-from typing import Optional, List, Dict, Any
+from datetime import datetime
+from itertools import islice
+from typing import Optional, List, Dict, Any, Iterable
+from pydantic import ValidationError
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, or_
+from sqlalchemy import select, func, or_, and_, insert
 from sqlalchemy.orm import selectinload
 from app.models.user import User, Role
-from app.schemas.user import UserCreate, UserUpdate, UserChangePassword
-from app.utils.auth import get_password_hash, verify_password, create_access_token, create_refresh_token
-from app.utils.response import BusinessException, NotFoundException
+from app.models.associations import user_role_association, role_menu_association
+from app.models.menu import Menu
+from app.schemas.user import UserCreate, UserUpdate, UserChangePassword, UserPrincipal, UserDetail
+from app.utils.auth import (
+    async_get_password_hash, async_verify_password, bulk_get_password_hashes,
+    create_access_token, create_refresh_token
+)
+from app.utils.bulk_import import ImportRow
+from app.utils.cache import TwoTierCache, invalidates, record_changes, register_cache_tags, subscribe_tags
+from app.utils.database import primary_reads
+from app.utils.response import BusinessException, NotFoundException, dump_model
+from app.utils.search_index import index_entity, search_ids
+from app.utils.pagination import encode_cursor, decode_cursor, fetch_page, total_cache
 from config import config
 
 
+# 用户列表查询的列（不含密码哈希）
+USER_LIST_COLUMNS = (
+    User.id, User.username, User.email, User.phone, User.real_name, User.avatar,
+    User.is_active, User.is_superuser, User.created_at, User.updated_at, User.is_deleted,
+)
+
+# 用户列表中角色摘要的列
+ROLE_SUMMARY_COLUMNS = (Role.id, Role.name, Role.code, Role.description, Role.is_active)
+
+# 认证用户身份缓存：用户ID -> UserPrincipal
+_principal_cache = TwoTierCache(
+    "principals", ttl=config.PRINCIPAL_CACHE_TTL, max_size=config.PRINCIPAL_CACHE_MAX_SIZE
+)
+
+
 class UserService:
     """用户服务类"""
     
     @staticmethod
+    @invalidates(tags=["users"])
     async def create_user(db: AsyncSession, user_data: UserCreate) -> Dict[str, Any]:
         """
         创建用户
@@ -29,6 +59,7 @@ class UserService:
             
         Raises:
             BusinessException: 用户名或邮箱已存在
+            ServiceUnavailableException: 密码哈希繁忙
         """
         # 检查用户名是否已存在
         existing_user = await UserService.get_user_by_username(db, user_data.username)
@@ -41,7 +72,7 @@ class UserService:
             raise BusinessException("邮箱已存在")
         
         # 创建用户
-        hashed_password = get_password_hash(user_data.password)
+        hashed_password = await async_get_password_hash(user_data.password)
         db_user = User(
             username=user_data.username,
             email=user_data.email,
@@ -53,32 +84,250 @@ class UserService:
         )
         
         db.add(db_user)
+        record_changes(db, "users", db_user)
         await db.commit()
         await db.refresh(db_user)
         
         return db_user.to_dict()
     
     @staticmethod
-    async def get_user_by_id(db: AsyncSession, user_id: int) -> Optional[User]:
+    @invalidates(tags=["users"])
+    async def bulk_import_users(db: AsyncSession, rows: Iterable[ImportRow]) -> Dict[str, Any]:
+        """
+        批量导入用户
+        
+        按 BULK_IMPORT_CHUNK_SIZE 分批处理：每批一次查询校验用户名、邮箱、手机号的唯一性，
+        在进程池中并行计算密码哈希，再用一条多行 INSERT 写入并提交。
+        唯一性按小写比较（与库表不区分大小写的排序规则一致）；校验后被并发写入占用唯一值时，
+        该批改为逐行写入，只有冲突的行失败。单行失败不影响其他行，失败原因记录在返回的错误报告中。
+        行数在第一批写入前检查，超出上限时整个导入不写入任何数据。
+        
+        Args:
+            db: 数据库会话
+            rows: 解析后的导入行
+            
+        Returns:
+            Dict[str, Any]: 导入结果，包含总行数、成功数、失败数和逐行错误
+            
+        Raises:
+            BusinessException: 行数超过 BULK_IMPORT_MAX_ROWS
+        """
+        report = {"total": 0, "created": 0, "failed": 0, "errors": []}
+        # 本次导入中已出现的唯一字段值，用于发现文件内部的重复
+        seen = {"username": set(), "email": set(), "phone": set()}
+        chunk: List[tuple] = []
+        
+        def fail(row_no: int, record: Optional[Dict[str, Any]], message: str) -> None:
+            report["failed"] += 1
+            report["errors"].append({
+                "row": row_no,
+                "username": record.get("username") if record else None,
+                "error": message,
+            })
+        
+        async def flush() -> None:
+            if chunk:
+                await UserService._import_user_chunk(db, chunk, seen, report, fail)
+                chunk.clear()
+        
+        # 先取出至多 BULK_IMPORT_MAX_ROWS + 1 行，超限时在任何一批提交前拒绝
+        rows = list(islice(rows, config.BULK_IMPORT_MAX_ROWS + 1))
+        if len(rows) > config.BULK_IMPORT_MAX_ROWS:
+            raise BusinessException(f"单次最多导入 {config.BULK_IMPORT_MAX_ROWS} 行")
+        
+        for row_no, record, error in rows:
+            report["total"] += 1
+            if error:
+                fail(row_no, record, error)
+                continue
+            try:
+                user_data = UserCreate(**record)
+            except ValidationError as e:
+                fail(row_no, record, "; ".join(
+                    f"{'.'.join(str(loc) for loc in err['loc'])}: {err['msg']}" for err in e.errors()
+                ))
+                continue
+            chunk.append((row_no, user_data))
+            if len(chunk) >= config.BULK_IMPORT_CHUNK_SIZE:
+                await flush()
+        await flush()
+        
+        report["errors"].sort(key=lambda item: item["row"])
+        return report
+    
+    @staticmethod
+    async def _import_user_chunk(db: AsyncSession, chunk: List[tuple], seen: Dict[str, set], report: Dict[str, Any], fail) -> None:
+        """
+        校验并写入一批导入用户
+        
+        Args:
+            db: 数据库会话
+            chunk: (行号, UserCreate) 列表
+            seen: 本次导入中已出现的唯一字段值
+            report: 导入结果，原地更新
+            fail: 记录单行失败的回调
+        """
+        usernames = {user.username for _, user in chunk}
+        emails = {user.email for _, user in chunk}
+        phones = {user.phone for _, user in chunk if user.phone}
+        
+        # 一次查询取出本批中已被占用的唯一字段值（含已软删除的用户，数据库唯一约束同样覆盖它们）。
+        # 库表排序规则不区分大小写，用户名和邮箱的查询结果及文件内的重复都按小写比较
+        conditions = [User.username.in_(usernames), User.email.in_(emails)]
+        if phones:
+            conditions.append(User.phone.in_(phones))
+        result = await db.execute(select(User.username, User.email, User.phone).where(or_(*conditions)))
+        taken = {"username": set(), "email": set(), "phone": set()}
+        for username, email, phone in result.all():
+            taken["username"].add(username.lower())
+            taken["email"].add(email.lower())
+            if phone:
+                taken["phone"].add(phone)
+        
+        accepted = []
+        for row_no, user in chunk:
+            record = {"username": user.username}
+            username = user.username.lower()
+            email = user.email.lower()
+            phone = user.phone
+            if username in taken["username"] or username in seen["username"]:
+                fail(row_no, record, "用户名已存在")
+            elif email in taken["email"] or email in seen["email"]:
+                fail(row_no, record, "邮箱已存在")
+            elif phone and (phone in taken["phone"] or phone in seen["phone"]):
+                fail(row_no, record, "手机号已存在")
+            else:
+                accepted.append((row_no, user))
+            # 无论是否通过，同一文件中后出现的重复行都视为冲突
+            seen["username"].add(username)
+            seen["email"].add(email)
+            if phone:
+                seen["phone"].add(phone)
+        
+        if not accepted:
+            return
+        
+        hashed_passwords = await bulk_get_password_hashes([user.password for _, user in accepted])
+        now = datetime.utcnow()
+        values = [
+            {
+                "username": user.username,
+                "email": user.email,
+                "phone": user.phone,
+                "hashed_password": hashed_password,
+                "real_name": user.real_name,
+                "avatar": user.avatar,
+                "is_active": user.is_active,
+                "is_superuser": False,
+                "is_deleted": False,
+                "created_at": now,
+                "updated_at": now,
+            }
+            for (_, user), hashed_password in zip(accepted, hashed_passwords)
+        ]
+        
+        try:
+            await db.execute(insert(User).values(values))
+        except IntegrityError:
+            # 校验后被并发写入占用了唯一值：回滚后逐行在保存点中写入，只有冲突的行记为失败
+            await db.rollback()
+            inserted = []
+            for (row_no, user), value in zip(accepted, values):
+                try:
+                    async with db.begin_nested():
+                        await db.execute(insert(User).values(value))
+                except IntegrityError:
+                    fail(row_no, {"username": user.username}, "写入失败：用户名、邮箱或手机号冲突")
+                else:
+                    inserted.append((row_no, user))
+            accepted = inserted
+            if not accepted:
+                await db.rollback()
+                return
+        
+        # 多行 INSERT 不返回主键，提交前按用户名查出新行登记为变更
+        result = await db.execute(
+            select(User.id, User.username, User.email, User.real_name, User.is_deleted)
+            .where(User.username.in_([user.username for _, user in accepted]))
+        )
+        record_changes(db, "users", *result.all())
+        await db.commit()
+        
+        report["created"] += len(accepted)
+    
+    @staticmethod
+    async def get_user_by_id(db: AsyncSession, user_id: int, with_roles: bool = True) -> Optional[User]:
         """
-        根据ID获取用户
+        根据ID获取用户（角色下只加载启用且未删除的菜单）
         
         Args:
             db: 数据库会话
             user_id: 用户ID
+            with_roles: 是否加载角色及其菜单，只用到用户自身字段时传False，只查询一次用户表
             
         Returns:
             Optional[User]: 用户对象
         """
-        result = await db.execute(
-            select(User)
-            .options(
-                selectinload(User.roles).selectinload(Role.menus)
+        query = select(User).where(User.id == user_id, User.is_deleted == False)
+        if with_roles:
+            query = query.options(
+                selectinload(User.roles).selectinload(
+                    Role.menus.and_(Menu.is_active == True, Menu.is_deleted == False)
+                )
             )
-            .where(User.id == user_id, User.is_deleted == False)
-        )
+        result = await db.execute(query)
         return result.scalar_one_or_none()
     
+    @staticmethod
+    async def get_principal(db: AsyncSession, user_id: int) -> Optional[UserPrincipal]:
+        """
+        获取认证用户的精简身份信息（带缓存）
+        
+        只查询认证所需的列和角色ID，不加载角色和菜单对象。未命中时查询主库。
+        
+        Args:
+            db: 数据库会话
+            user_id: 用户ID
+            
+        Returns:
+            Optional[UserPrincipal]: 用户身份信息，用户不存在返回None
+        """
+        user_id = int(user_id)
+        return await _principal_cache.get_or_load(user_id, lambda: UserService._load_principal(db, user_id))
+    
+    @staticmethod
+    async def _load_principal(db: AsyncSession, user_id: int) -> Optional[UserPrincipal]:
+        """
+        从数据库查询认证用户的身份信息
+        
+        Args:
+            db: 数据库会话
+            user_id: 用户ID
+            
+        Returns:
+            Optional[UserPrincipal]: 用户身份信息，用户不存在返回None
+        """
+        with primary_reads(db):
+            result = await db.execute(
+                select(User.id, User.username, User.is_active, User.is_superuser, Role.id)
+                .select_from(User)
+                .outerjoin(user_role_association, user_role_association.c.user_id == User.id)
+                .outerjoin(Role, and_(Role.id == user_role_association.c.role_id, Role.is_deleted == False))
+                .where(User.id == user_id, User.is_deleted == False)
+            )
+        rows = result.all()
+        if not rows:
+            return None
+        
+        first = rows[0]
+        return UserPrincipal(
+            id=first[0],
+            username=first[1],
+            is_active=first[2],
+            is_superuser=first[3],
+            role_ids=sorted({row[4] for row in rows if row[4] is not None})
+        )
+    
     @staticmethod
     async def get_user_by_username(db: AsyncSession, username: str) -> Optional[User]:
         """
@@ -127,6 +376,9 @@ class UserService:
             
         Returns:
             Optional[User]: 认证成功返回用户对象，否则返回None
+            
+        Raises:
+            ServiceUnavailableException: 密码校验繁忙
         """
         # 尝试用户名登录
         user = await UserService.get_user_by_username(db, username)
@@ -134,7 +386,7 @@ class UserService:
             # 尝试邮箱登录
             user = await UserService.get_user_by_email(db, username)
         
-        if not user or not verify_password(password, user.hashed_password):
+        if not user or not await async_verify_password(password, user.hashed_password):
             return None
         
         if not user.is_active:
@@ -143,6 +395,7 @@ class UserService:
         return user
     
     @staticmethod
+    @invalidates(tags=["users"])
     async def update_user(db: AsyncSession, user_id: int, user_data: UserUpdate) -> Optional[Dict[str, Any]]:
         """
         更新用户信息
@@ -180,22 +433,15 @@ class UserService:
         for field, value in update_data.items():
             setattr(user, field, value)
         
+        record_changes(db, "users", user)
         await db.commit()
-        await db.refresh(user)
-        
-        # 返回包含关联数据的用户信息
-        user_data = user.to_dict(include_relationships=['roles'])
-        # 为每个角色添加菜单数据
-        if 'roles' in user_data and user_data['roles']:
-            for role_data in user_data['roles']:
-                # 获取对应的角色对象来获取菜单数据
-                role_obj = next((r for r in user.roles if r.id == role_data['id']), None)
-                if role_obj:
-                    role_data['menus'] = [menu.to_dict() for menu in role_obj.menus if menu.is_active and not menu.is_deleted]
-        
-        return user_data
+        
+        # 返回包含角色和菜单的用户详情。会话提交后不过期对象，不再 refresh：
+        # refresh 只按对象首次加载时的策略重新加载关联，先以 with_roles=False 加载过的用户会丢失角色
+        return dump_model(UserDetail, user)
     
     @staticmethod
+    @invalidates(tags=["users"])
     async def delete_user(db: AsyncSession, user_id: int) -> bool:
         """
         删除用户（软删除）
@@ -210,11 +456,12 @@ class UserService:
         Raises:
             NotFoundException: 用户不存在
         """
-        user = await UserService.get_user_by_id(db, user_id)
+        user = await UserService.get_user_by_id(db, user_id, with_roles=False)
         if not user:
             raise NotFoundException("用户不存在")
         
         user.is_deleted = True
+        record_changes(db, "users", user)
         await db.commit()
         
         return True
@@ -235,15 +482,16 @@ class UserService:
         Raises:
             NotFoundException: 用户不存在
             BusinessException: 原密码错误
+            ServiceUnavailableException: 密码哈希繁忙
         """
-        user = await UserService.get_user_by_id(db, user_id)
+        user = await UserService.get_user_by_id(db, user_id, with_roles=False)
         if not user:
             raise NotFoundException("用户不存在")
         
-        if not verify_password(password_data.old_password, user.hashed_password):
+        if not await async_verify_password(password_data.old_password, user.hashed_password):
             raise BusinessException("原密码错误")
         
-        user.hashed_password = get_password_hash(password_data.new_password)
+        user.hashed_password = await async_get_password_hash(password_data.new_password)
         await db.commit()
         
         return True
@@ -253,26 +501,39 @@ class UserService:
         db: AsyncSession, 
         page: int = 1, 
         per_page: int = config.DEFAULT_PAGE_SIZE,
-        search: Optional[str] = None
+        search: Optional[str] = None,
+        cursor: Optional[str] = None,
+        include_total: bool = True,
+        include_menus: bool = False
     ) -> Dict[str, Any]:
         """
         分页获取用户列表
         
+        只查询用户列，不构建ORM对象；角色摘要用一次查询批量获取，
+        include_menus 为True时再用一次查询附带各角色的菜单。
+        传入 cursor 时按用户ID游标分页（忽略页码），否则按页码分页。
+        
         Args:
             db: 数据库会话
             page: 页码
             per_page: 每页数量
             search: 搜索关键词
+            cursor: 分页游标
+            include_total: 是否统计总数
+            include_menus: 角色中是否包含菜单列表
             
         Returns:
             Dict[str, Any]: 分页结果
+            
+        Raises:
+            BusinessException: 游标格式无效
         """
         # 限制每页最大数量
         per_page = min(per_page, config.MAX_PAGE_SIZE)
         offset = (page - 1) * per_page
         
         # 构建查询条件
-        query = select(User).where(User.is_deleted == False)
+        query = select(*USER_LIST_COLUMNS).where(User.is_deleted == False)
         count_query = select(func.count(User.id)).where(User.is_deleted == False)
         
         if search:
@@ -281,44 +542,93 @@ class UserService:
                 User.email.ilike(f"%{search}%"),
                 User.real_name.ilike(f"%{search}%")
             )
+            candidate_ids = search_ids("users", search)
+            if candidate_ids is not None:
+                # 通过搜索索引得到候选ID缩小范围，关键词仍由数据库校验，避免索引过期返回错误结果
+                search_filter = and_(User.id.in_(candidate_ids), search_filter)
             query = query.where(search_filter)
             count_query = count_query.where(search_filter)
         
-        # 获取总数
-        total_result = await db.execute(count_query)
-        total = total_result.scalar()
+        # 获取分页数据和总数
+        if cursor:
+            last_id, = decode_cursor(cursor, 1)
+            query = query.where(User.id > last_id)
+            offset = None
+        query = query.order_by(User.id)
+        rows, total, has_more = await fetch_page(
+            db, query, count_query, "users", search, per_page, offset, include_total, scalars=False
+        )
         
-        # 获取分页数据
-        query = query.options(
-            selectinload(User.roles).selectinload(Role.menus)
-        ).offset(offset).limit(per_page)
-        result = await db.execute(query)
-        users = result.scalars().all()
-        
-        # 转换为字典
-        items = []
-        for user in users:
-            user_data = user.to_dict(include_relationships=['roles'])
-            # 为每个角色添加菜单数据
-            if 'roles' in user_data and user_data['roles']:
-                for role_data in user_data['roles']:
-                    # 获取对应的角色对象来获取菜单数据
-                    role_obj = next((r for r in user.roles if r.id == role_data['id']), None)
-                    if role_obj:
-                        role_data['menus'] = [menu.to_dict() for menu in role_obj.menus if menu.is_active and not menu.is_deleted]
-            items.append(user_data)
+        items = [{column.key: row[index] for index, column in enumerate(USER_LIST_COLUMNS)} for row in rows]
+        roles_by_user = await UserService._get_role_summaries(db, [item["id"] for item in items], include_menus)
+        for item in items:
+            item["roles"] = roles_by_user.get(item["id"], [])
         
         return {
             "items": items,
             "total": total,
             "page": page,
             "per_page": per_page,
-            "pages": (total + per_page - 1) // per_page,
-            "has_next": page * per_page < total,
-            "has_prev": page > 1
+            "pages": (total + per_page - 1) // per_page if total is not None else None,
+            "has_next": has_more,
+            "has_prev": page > 1,
+            "next_cursor": encode_cursor([items[-1]["id"]]) if has_more else None
         }
     
     @staticmethod
+    async def _get_role_summaries(db: AsyncSession, user_ids: List[int], include_menus: bool = False) -> Dict[int, List[Dict[str, Any]]]:
+        """
+        批量获取用户的角色摘要
+        
+        Args:
+            db: 数据库会话
+            user_ids: 用户ID列表
+            include_menus: 是否附带角色的菜单列表（只含启用且未删除的菜单）
+            
+        Returns:
+            Dict[int, List[Dict[str, Any]]]: 用户ID -> 角色摘要列表
+        """
+        if not user_ids:
+            return {}
+        
+        result = await db.execute(
+            select(user_role_association.c.user_id, *ROLE_SUMMARY_COLUMNS)
+            .join(Role, Role.id == user_role_association.c.role_id)
+            .where(user_role_association.c.user_id.in_(user_ids), Role.is_deleted == False)
+            .order_by(user_role_association.c.user_id, Role.id)
+        )
+        roles_by_user: Dict[int, List[Dict[str, Any]]] = {}
+        role_summaries: Dict[int, List[Dict[str, Any]]] = {}
+        for row in result.all():
+            summary = {column.key: row[index + 1] for index, column in enumerate(ROLE_SUMMARY_COLUMNS)}
+            roles_by_user.setdefault(row[0], []).append(summary)
+            role_summaries.setdefault(summary["id"], []).append(summary)
+        
+        if include_menus and role_summaries:
+            menus_by_role: Dict[int, List[Dict[str, Any]]] = {}
+            menu_columns = list(Menu.__table__.columns)
+            menus_result = await db.execute(
+                select(role_menu_association.c.role_id, *menu_columns)
+                .join(Menu, Menu.id == role_menu_association.c.menu_id)
+                .where(
+                    role_menu_association.c.role_id.in_(list(role_summaries)),
+                    Menu.is_active == True,
+                    Menu.is_deleted == False
+                )
+                .order_by(role_menu_association.c.role_id, Menu.order_num, Menu.id)
+            )
+            for row in menus_result.all():
+                menus_by_role.setdefault(row[0], []).append(
+                    {column.name: row[index + 1] for index, column in enumerate(menu_columns)}
+                )
+            for role_id, summaries in role_summaries.items():
+                for summary in summaries:
+                    summary["menus"] = menus_by_role.get(role_id, [])
+        
+        return roles_by_user
+    
+    @staticmethod
+    @invalidates(tags=["role_users"])
     async def assign_roles(db: AsyncSession, user_id: int, role_ids: List[int]) -> bool:
         """
         为用户分配角色
@@ -344,8 +654,12 @@ class UserService:
         )
         roles = roles_result.scalars().all()
         
+        # 原有角色和新角色的成员都会变化
+        affected_role_ids = {role.id for role in user.roles} | {role.id for role in roles}
+        
         # 清空现有角色并分配新角色
         user.roles = roles
+        record_changes(db, "role_users", *[(role_id, user_id) for role_id in affected_role_ids])
         await db.commit()
         
         return True
@@ -370,3 +684,22 @@ class UserService:
             "token_type": "bearer",
             "user": user.to_dict()
         }
+
+
+def _on_users_changed(users: List[Any]) -> None:
+    """用户变更提交后更新分页总数和搜索索引"""
+    total_cache.invalidate("users")
+    for user in users:
+        index_entity("users", user)
+
+
+# 用户身份缓存随用户和角色成员变更失效
+register_cache_tags(_principal_cache, {
+    # 变更记录为用户实体，只影响本人
+    "users": lambda users: [user.id for user in users],
+    # 变更记录为 (角色ID, 用户ID)，只影响相关用户
+    "role_users": lambda links: [user_id for _, user_id in links],
+    # 删除角色影响其所有成员，清空全部；新增或修改角色不影响身份信息
+    "roles": lambda roles: None if any(role.is_deleted for role in roles) else (),
+})
+subscribe_tags(["users"], _on_users_changed)
@@ -1,13 +1,20 @@
 """
 JWT认证和密码加密工具
 """
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from config import config
+from app.utils.response import ServiceUnavailableException
+import hashlib
 import logging
 import os
+import threading
+import time
 
 # 配置日志
 logger = logging.getLogger(__name__)
@@ -20,6 +27,98 @@ pwd_context = CryptContext(schemes=config.PWD_CONTEXT_SCHEMES, deprecated="auto"
 JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "aada1213123121a1213")
 JWT_ALGORITHM = "HS256"
 
+
+class TokenCache:
+    """已验证令牌缓存
+    
+    以令牌摘要为键缓存解码结果，条目在令牌 exp 到期后失效，
+    缓存满时按最久未使用的顺序淘汰。
+    """
+    
+    def __init__(self, max_size: int = 10000):
+        """
+        初始化令牌缓存
+        
+        Args:
+            max_size: 最大缓存条目数
+        """
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[bytes, tuple]" = OrderedDict()
+    
+    @staticmethod
+    def _digest(token: str) -> bytes:
+        """计算令牌摘要，避免在内存中以令牌原文作为键"""
+        return hashlib.sha256(token.encode("utf-8")).digest()
+    
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        """
+        获取缓存的令牌数据
+        
+        Args:
+            token: JWT令牌
+            
+        Returns:
+            Optional[Dict[str, Any]]: 解码后的数据，未命中或已过期返回None
+        """
+        key = self._digest(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        
+        expires_at, payload = entry
+        if expires_at is not None and expires_at <= time.time():
+            # 令牌已过期，移除后交由完整校验流程处理
+            self._entries.pop(key, None)
+            self.misses += 1
+            return None
+        
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return dict(payload)
+    
+    def set(self, token: str, payload: Dict[str, Any]) -> None:
+        """
+        缓存令牌数据
+        
+        Args:
+            token: JWT令牌
+            payload: 解码后的数据
+        """
+        if self.max_size <= 0:
+            return
+        
+        exp = payload.get("exp")
+        expires_at = float(exp) if isinstance(exp, (int, float)) else None
+        
+        key = self._digest(token)
+        self._entries[key] = (expires_at, dict(payload))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+    
+    def clear(self) -> None:
+        """清空缓存"""
+        self._entries.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        """获取缓存统计信息"""
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+# 已验证令牌缓存
+token_cache = TokenCache(config.TOKEN_CACHE_MAX_SIZE)
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     验证密码
@@ -47,6 +146,151 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+# 密码哈希执行器及已提交、尚未执行完的任务数
+_password_executor: Optional[Executor] = None
+_password_pending = 0
+# 任务完成回调在执行器线程中调用，计数需要加锁
+_password_pending_lock = threading.Lock()
+
+
+def _get_password_executor() -> Executor:
+    """获取密码哈希执行器，首次使用时按配置创建"""
+    global _password_executor
+    if _password_executor is None:
+        if config.PASSWORD_HASH_EXECUTOR == "process":
+            _password_executor = ProcessPoolExecutor(max_workers=config.PASSWORD_HASH_MAX_WORKERS)
+        else:
+            _password_executor = ThreadPoolExecutor(
+                max_workers=config.PASSWORD_HASH_MAX_WORKERS,
+                thread_name_prefix="password-hash"
+            )
+    return _password_executor
+
+
+def _release_password_slot(_future: Future) -> None:
+    """任务执行完成或被取消后释放排队名额"""
+    global _password_pending
+    with _password_pending_lock:
+        _password_pending -= 1
+
+
+async def _run_password_task(func, *args):
+    """
+    在执行器中运行密码哈希任务
+    
+    已提交、尚未执行完的任务数达到 PASSWORD_HASH_QUEUE_LIMIT 时直接拒绝，
+    超过 PASSWORD_HASH_TIMEOUT 未完成时放弃等待，避免请求无限堆积。
+    名额在任务真正结束时才释放：超时放弃的任务若还在排队会被取消，
+    已在执行的任务仍占用名额直到算完，因此限制的是执行器的实际积压。
+    
+    Raises:
+        ServiceUnavailableException: 队列已满或任务超时
+    """
+    global _password_pending
+    with _password_pending_lock:
+        pending = _password_pending
+        if pending < config.PASSWORD_HASH_QUEUE_LIMIT:
+            _password_pending += 1
+    if pending >= config.PASSWORD_HASH_QUEUE_LIMIT:
+        logger.warning(f"密码哈希队列已满，当前排队任务数: {pending}")
+        raise ServiceUnavailableException("服务繁忙，请稍后重试")
+    
+    try:
+        future = _get_password_executor().submit(func, *args)
+    except BaseException:
+        _release_password_slot(None)
+        raise
+    future.add_done_callback(_release_password_slot)
+    
+    try:
+        # 超时取消等待时一并取消尚未开始执行的任务
+        return await asyncio.wait_for(asyncio.wrap_future(future), timeout=config.PASSWORD_HASH_TIMEOUT)
+    except asyncio.TimeoutError:
+        logger.warning(f"密码哈希任务超时（{config.PASSWORD_HASH_TIMEOUT}秒）")
+        raise ServiceUnavailableException("服务繁忙，请稍后重试")
+
+
+async def async_verify_password(plain_password: str, hashed_password: str) -> bool:
+    """
+    在执行器中验证密码，不阻塞事件循环
+    
+    Args:
+        plain_password: 明文密码
+        hashed_password: 加密后的密码
+        
+    Returns:
+        bool: 验证结果
+        
+    Raises:
+        ServiceUnavailableException: 队列已满或任务超时
+    """
+    return await _run_password_task(verify_password, plain_password, hashed_password)
+
+
+async def async_get_password_hash(password: str) -> str:
+    """
+    在执行器中获取密码哈希值，不阻塞事件循环
+    
+    Args:
+        password: 明文密码
+        
+    Returns:
+        str: 加密后的密码
+        
+    Raises:
+        ServiceUnavailableException: 队列已满或任务超时
+    """
+    return await _run_password_task(get_password_hash, password)
+
+
+# 批量导入专用的密码哈希进程池，与单个请求使用的执行器分开，避免挤占登录等请求
+_bulk_hash_executor: Optional[ProcessPoolExecutor] = None
+
+
+def _hash_password_batch(passwords: List[str]) -> List[str]:
+    """在子进程中批量计算密码哈希"""
+    return [pwd_context.hash(password) for password in passwords]
+
+
+async def bulk_get_password_hashes(passwords: List[str]) -> List[str]:
+    """
+    在进程池中并行计算一批密码的哈希值
+    
+    Args:
+        passwords: 明文密码列表
+        
+    Returns:
+        List[str]: 与输入顺序一致的密码哈希列表
+    """
+    global _bulk_hash_executor
+    if not passwords:
+        return []
+    
+    workers = config.BULK_IMPORT_HASH_WORKERS or os.cpu_count() or 1
+    if _bulk_hash_executor is None:
+        _bulk_hash_executor = ProcessPoolExecutor(max_workers=workers)
+    
+    # 按进程数切分，每个进程处理一段，减少进程间传输次数
+    size = -(-len(passwords) // workers)
+    loop = asyncio.get_running_loop()
+    parts = await asyncio.gather(*[
+        loop.run_in_executor(_bulk_hash_executor, _hash_password_batch, passwords[i:i + size])
+        for i in range(0, len(passwords), size)
+    ])
+    return [hashed for part in parts for hashed in part]
+
+
+def shutdown_password_executor() -> None:
+    """关闭密码哈希执行器"""
+    global _password_executor, _bulk_hash_executor
+    if _password_executor is not None:
+        _password_executor.shutdown(wait=False, cancel_futures=True)
+        _password_executor = None
+    if _bulk_hash_executor is not None:
+        _bulk_hash_executor.shutdown(wait=False, cancel_futures=True)
+        _bulk_hash_executor = None
+
+
 def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
     """
     创建访问令牌
@@ -103,10 +347,17 @@ def verify_token(token: str) -> Optional[Dict[str, Any]]:
     Returns:
         Optional[Dict[str, Any]]: 解码后的数据，验证失败返回None
     """
+    if config.TOKEN_CACHE_ENABLED:
+        cached_payload = token_cache.get(token)
+        if cached_payload is not None:
+            return cached_payload
+    
     try:
         # 使用相同的直接定义的密钥，而不是从config加载
         # 这样确保编码和解码使用完全相同的密钥
         payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
+        if config.TOKEN_CACHE_ENABLED:
+            token_cache.set(token, payload)
         return payload
     except JWTError as e:
         logger.error(f"Token验证失败: {str(e)}")
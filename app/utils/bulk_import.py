@@ -0,0 +1,87 @@
+"""
+批量导入数据解析：支持 JSON Lines 和 CSV
+"""
+import csv
+import io
+import json
+from typing import Any, Dict, Iterator, Optional, Tuple
+from app.utils.response import BusinessException
+
+# 解析结果：(行号, 行数据, 解析错误)，行号从1开始，CSV 不计表头
+ImportRow = Tuple[int, Optional[Dict[str, Any]], Optional[str]]
+
+SUPPORTED_FORMATS = ("jsonl", "csv")
+
+
+def detect_format(content_type: Optional[str], fmt: Optional[str] = None) -> str:
+    """
+    确定导入数据格式
+    
+    Args:
+        content_type: 请求的 Content-Type
+        fmt: 显式指定的格式，优先于 Content-Type
+        
+    Returns:
+        str: jsonl 或 csv
+        
+    Raises:
+        BusinessException: 不支持的格式
+    """
+    if fmt:
+        fmt = fmt.lower()
+        if fmt not in SUPPORTED_FORMATS:
+            raise BusinessException(f"不支持的导入格式: {fmt}，仅支持 jsonl 或 csv")
+        return fmt
+    
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    if content_type in ("text/csv", "application/csv"):
+        return "csv"
+    if content_type in ("application/x-ndjson", "application/jsonl", "application/x-jsonlines", "application/json"):
+        return "jsonl"
+    raise BusinessException("无法识别导入格式，请使用 text/csv 或 application/x-ndjson，或通过 format 参数指定")
+
+
+def parse_import_rows(content: bytes, fmt: str) -> Iterator[ImportRow]:
+    """
+    逐行解析导入数据，空行跳过
+    
+    CSV 首行为表头，空单元格视为未填写。
+    
+    Args:
+        content: 请求体
+        fmt: jsonl 或 csv
+        
+    Returns:
+        Iterator[ImportRow]: 逐行的解析结果
+        
+    Raises:
+        BusinessException: 内容不是有效的 UTF-8 文本
+    """
+    try:
+        text = content.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise BusinessException("导入内容必须是 UTF-8 编码")
+    
+    if fmt == "csv":
+        reader = csv.DictReader(io.StringIO(text))
+        for row_no, record in enumerate(reader, start=1):
+            if None in record:
+                yield row_no, None, "列数多于表头"
+                continue
+            yield row_no, {key.strip(): value for key, value in record.items() if key and value not in (None, "")}, None
+        return
+    
+    row_no = 0
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        row_no += 1
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield row_no, None, "JSON格式错误"
+            continue
+        if not isinstance(record, dict):
+            yield row_no, None, "每行必须是一个JSON对象"
+            continue
+        yield row_no, record, None
@@ -0,0 +1,611 @@
+"""
+两级缓存
+
+L1 为进程内 LRU/TTL 缓存，L2 为可插拔的共享缓存（多进程部署时可接入 Redis 等），
+未配置 L2 时只使用 L1。同一键的并发未命中只执行一次加载（single-flight），
+条目临近过期时按概率提前刷新（XFetch），避免大量请求在过期瞬间同时回源。
+
+服务方法通过 @cached(tags=[...]) 声明缓存，写操作通过 @invalidates(tags=[...]) 声明
+影响的标签，标签关联的缓存在事务提交后统一失效。写操作可以用 record_changes 登记
+变更的数据（如实体对象），按键失效的缓存和标签订阅者据此只处理受影响的部分。
+"""
+import asyncio
+import functools
+from abc import ABC, abstractmethod
+import inspect
+import logging
+import math
+import random
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.utils.database import primary_reads
+from config import config
+
+logger = logging.getLogger(__name__)
+
+# 缓存条目：(值, 过期时间, 加载耗时)，时间使用 time.time()，便于在进程间共享
+CacheEntry = Tuple[Any, float, float]
+
+
+class CacheBackend(ABC):
+    """
+    共享缓存（L2）接口
+    
+    实现方负责值的序列化（如 Redis 实现可使用 pickle），并按 ttl 设置过期时间。
+    """
+    
+    @abstractmethod
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        """获取条目，不存在或已过期返回None"""
+    
+    @abstractmethod
+    async def set(self, key: str, entry: CacheEntry, ttl: float) -> None:
+        """写入条目"""
+    
+    @abstractmethod
+    async def delete(self, *keys: str) -> None:
+        """删除条目"""
+    
+    @abstractmethod
+    async def delete_prefix(self, prefix: str) -> None:
+        """删除指定前缀的所有条目"""
+
+
+class MemoryBackend(CacheBackend):
+    """进程内的共享缓存替身，用于测试和单进程部署"""
+    
+    def __init__(self):
+        self._entries: Dict[str, CacheEntry] = {}
+    
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[1] <= time.time():
+            self._entries.pop(key, None)
+            return None
+        return entry
+    
+    async def set(self, key: str, entry: CacheEntry, ttl: float) -> None:
+        self._entries[key] = entry
+    
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._entries.pop(key, None)
+    
+    async def delete_prefix(self, prefix: str) -> None:
+        for key in [key for key in self._entries if key.startswith(prefix)]:
+            self._entries.pop(key, None)
+
+
+class LocalCache:
+    """进程内 LRU/TTL 缓存（L1）"""
+    
+    def __init__(self, max_size: int):
+        """
+        初始化本地缓存
+        
+        Args:
+            max_size: 最大条目数，超出时淘汰最久未使用的条目
+        """
+        self.max_size = max_size
+        self._entries: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def get(self, key: Hashable) -> Optional[CacheEntry]:
+        """获取未过期的条目"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[1] <= time.time():
+            self._entries.pop(key, None)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+    
+    def set(self, key: Hashable, entry: CacheEntry) -> None:
+        """写入条目"""
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+    
+    def delete(self, key: Hashable) -> None:
+        """删除条目"""
+        self._entries.pop(key, None)
+    
+    def clear(self) -> None:
+        """清空缓存"""
+        self._entries.clear()
+
+
+# 全局共享缓存（L2），为None时只使用进程内缓存
+_shared_backend: Optional[CacheBackend] = MemoryBackend() if config.CACHE_L2_BACKEND == "memory" else None
+
+# 命名空间 -> 缓存，用于输出统计
+caches: Dict[str, "TwoTierCache"] = {}
+
+
+def set_shared_backend(backend: Optional[CacheBackend]) -> None:
+    """
+    设置全局共享缓存，未单独指定 backend 的缓存都会使用它
+    
+    Args:
+        backend: 共享缓存实现，None表示只使用进程内缓存
+    """
+    global _shared_backend
+    _shared_backend = backend
+
+
+class TwoTierCache:
+    """
+    按命名空间划分的两级缓存
+    
+    加载函数的返回值会在请求之间共享，应返回字典、Pydantic 模型等独立数据，
+    不能返回绑定在会话上的ORM对象。
+    """
+    
+    def __init__(
+        self,
+        namespace: str,
+        ttl: float,
+        max_size: Optional[int] = None,
+        backend: Optional[CacheBackend] = None,
+        beta: Optional[float] = None,
+        cache_none: bool = False
+    ):
+        """
+        初始化缓存
+        
+        Args:
+            namespace: 命名空间，同时作为共享缓存的键前缀
+            ttl: 条目有效期（秒），0表示不缓存
+            max_size: 进程内缓存最大条目数，默认 CACHE_L1_MAX_SIZE，0表示不缓存
+            backend: 共享缓存，默认使用全局共享缓存
+            beta: 提前刷新系数，越大越早刷新，0表示不提前刷新，默认 CACHE_EARLY_REFRESH_BETA
+            cache_none: 是否缓存 None 结果
+        """
+        self.namespace = namespace
+        self.ttl = ttl
+        self.beta = config.CACHE_EARLY_REFRESH_BETA if beta is None else beta
+        self.cache_none = cache_none
+        self._backend = backend
+        self._l1 = LocalCache(config.CACHE_L1_MAX_SIZE if max_size is None else max_size)
+        # 正在进行的加载，失效时从中移除，加载完成后据此判断结果是否已过时
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self._reset_stats()
+        caches[namespace] = self
+    
+    def _reset_stats(self) -> None:
+        """重置统计信息"""
+        self.hits = 0
+        self.l2_hits = 0
+        self.misses = 0
+        self.loads = 0
+        # 未命中时等待同一键正在进行的加载、未重复回源的次数
+        self.coalesced = 0
+        self.early_refreshes = 0
+        self.errors = 0
+    
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self._l1.max_size > 0
+    
+    @property
+    def backend(self) -> Optional[CacheBackend]:
+        return self._backend if self._backend is not None else _shared_backend
+    
+    def _backend_key(self, key: Hashable) -> str:
+        return f"{self.namespace}:{key}"
+    
+    def _local_entry(self, entry: CacheEntry) -> CacheEntry:
+        """有共享缓存时，进程内条目最多保留 CACHE_L1_TTL 秒，使其他进程的失效及时生效"""
+        if self.backend is None:
+            return entry
+        value, expires_at, delta = entry
+        return value, min(expires_at, time.time() + config.CACHE_L1_TTL), delta
+    
+    def _should_refresh_early(self, entry: CacheEntry) -> bool:
+        """XFetch：加载越慢、越接近过期，提前刷新的概率越大"""
+        if self.beta <= 0:
+            return False
+        _, expires_at, delta = entry
+        return time.time() - delta * self.beta * math.log(1.0 - random.random()) >= expires_at
+    
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]], ttl: Optional[float] = None) -> Any:
+        """
+        获取缓存值，未命中时调用加载函数并写入缓存
+        
+        Args:
+            key: 缓存键
+            loader: 无参数的异步加载函数
+            ttl: 本次写入的有效期，默认使用缓存的 ttl
+            
+        Returns:
+            Any: 缓存值或加载结果
+        """
+        if not self.enabled:
+            return await loader()
+        
+        backend = self.backend
+        entry = self._l1.get(key)
+        from_l1 = entry is not None
+        if entry is None and backend is not None:
+            entry = await backend.get(self._backend_key(key))
+            if entry is not None:
+                self._l1.set(key, self._local_entry(entry))
+        
+        if entry is not None:
+            # 有共享缓存时进程内条目的过期时间被截短，只按共享缓存中的条目判断是否提前刷新
+            if key in self._inflight or (from_l1 and backend is not None) or not self._should_refresh_early(entry):
+                if from_l1:
+                    self.hits += 1
+                else:
+                    self.l2_hits += 1
+                return entry[0]
+            self.early_refreshes += 1
+            try:
+                return await self._load(key, loader, ttl)
+            except Exception as e:
+                # 提前刷新失败时条目仍未过期，继续使用旧值
+                logger.warning(f"缓存提前刷新失败: {self.namespace}:{key}: {e}")
+                return entry[0]
+        
+        self.misses += 1
+        return await self._load(key, loader, ttl)
+    
+    async def _load(self, key: Hashable, loader: Callable[[], Awaitable[Any]], ttl: Optional[float]) -> Any:
+        """加载并写入缓存，同一键同时只有一个加载在执行"""
+        future = self._inflight.get(key)
+        if future is not None:
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                # 执行加载的请求被取消，由当前请求重新加载
+                return await self._load(key, loader, ttl)
+        
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        started_at = time.perf_counter()
+        try:
+            value = await loader()
+        except Exception as e:
+            self.errors += 1
+            self._finish_load(key, future)
+            future.set_exception(e)
+            # 没有等待者时避免出现未获取异常的警告
+            future.exception()
+            raise
+        except BaseException:
+            self._finish_load(key, future)
+            future.cancel()
+            raise
+        
+        self.loads += 1
+        # 加载期间该键被失效时，结果只返回给已在等待的请求，不写入缓存
+        current = self._finish_load(key, future)
+        future.set_result(value)
+        
+        if (value is None and not self.cache_none) or not current:
+            return value
+        
+        ttl = self.ttl if ttl is None else ttl
+        entry = (value, time.time() + ttl, time.perf_counter() - started_at)
+        self._l1.set(key, self._local_entry(entry))
+        backend = self.backend
+        if backend is not None:
+            await backend.set(self._backend_key(key), entry, ttl)
+        return value
+    
+    def _finish_load(self, key: Hashable, future: asyncio.Future) -> bool:
+        """
+        结束一次加载
+        
+        Returns:
+            bool: 加载期间该键未被失效
+        """
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+            return True
+        return False
+    
+    async def invalidate(self, *keys: Hashable) -> None:
+        """
+        使指定键失效，只影响这些键，其他键的条目和正在进行的加载不受影响
+        
+        Args:
+            keys: 缓存键
+        """
+        self.invalidate_local(*keys)
+        backend = self.backend
+        if backend is not None and keys:
+            await backend.delete(*[self._backend_key(key) for key in keys])
+    
+    def invalidate_local(self, *keys: Hashable) -> None:
+        """
+        使进程内的指定键失效
+        
+        Args:
+            keys: 缓存键
+        """
+        for key in keys:
+            self._l1.delete(key)
+            # 正在进行的加载可能读到了失效前的数据，之后的请求重新加载
+            self._inflight.pop(key, None)
+    
+    def clear_local(self) -> None:
+        """清空进程内的条目，正在进行的加载结果不再写入"""
+        self._inflight.clear()
+        self._l1.clear()
+    
+    async def clear(self) -> None:
+        """清空命名空间下的所有条目"""
+        self.clear_local()
+        backend = self.backend
+        if backend is not None:
+            await backend.delete_prefix(f"{self.namespace}:")
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取缓存统计信息
+        
+        Returns:
+            Dict[str, Any]: 条目数、各级命中次数、回源次数和命中率
+        """
+        requests = self.hits + self.l2_hits + self.misses + self.early_refreshes
+        return {
+            "size": len(self._l1),
+            "max_size": self._l1.max_size,
+            "ttl": self.ttl,
+            "shared": self.backend is not None,
+            "hits": self.hits,
+            "l2_hits": self.l2_hits,
+            "misses": self.misses,
+            "loads": self.loads,
+            "coalesced": self.coalesced,
+            "early_refreshes": self.early_refreshes,
+            "errors": self.errors,
+            "hit_ratio": round((self.hits + self.l2_hits) / requests, 4) if requests else 0.0,
+        }
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    """获取所有命名空间的缓存统计信息"""
+    return {namespace: cache.stats() for namespace, cache in caches.items()}
+
+
+# 标签 -> 关联的缓存
+# 从变更记录中提取缓存键：返回None表示清空整个缓存
+KeyExtractor = Callable[[List[Any]], Optional[Iterable[Hashable]]]
+# 标签 -> [(缓存, 键提取函数)]，键提取函数为None时标签失效即清空整个缓存
+_tag_caches: Dict[str, List[Tuple[TwoTierCache, Optional[KeyExtractor]]]] = {}
+# 标签 -> 失效回调，用于不经过 TwoTierCache 的进程内状态（如菜单树、分页总数、搜索索引）
+_tag_listeners: Dict[str, List[Callable[[List[Any]], None]]] = {}
+# 会话 info 中记录待失效标签的键，值为 标签 -> 正在执行的写操作数
+_PENDING_TAGS_KEY = "cache_pending_tags"
+# 会话 info 中记录本事务变更数据的键，值为 标签 -> 变更记录列表
+_CHANGES_KEY = "cache_changes"
+# 提交后异步清理共享缓存的任务，保留引用防止被回收
+_background_tasks: Set[asyncio.Task] = set()
+
+
+def subscribe_tags(tags: Iterable[str], callback: Callable[[List[Any]], None]) -> None:
+    """
+    注册标签失效回调
+    
+    Args:
+        tags: 标签列表
+        callback: 同步回调，在事务提交后调用，参数为本事务通过 record_changes 登记的
+            该标签的变更记录（未登记时为空列表）
+    """
+    for tag in tags:
+        _tag_listeners.setdefault(tag, []).append(callback)
+
+
+def register_cache_tags(cache: TwoTierCache, key_extractors: Dict[str, Optional[KeyExtractor]]) -> None:
+    """
+    让缓存随标签失效
+    
+    提供键提取函数的标签只失效变更涉及的键；函数返回None、未提供函数或
+    事务没有登记变更记录时清空整个缓存。
+    
+    Args:
+        cache: 缓存
+        key_extractors: 标签 -> 键提取函数
+    """
+    for tag, extractor in key_extractors.items():
+        _tag_caches.setdefault(tag, []).append((cache, extractor))
+
+
+def record_changes(db: AsyncSession, tag: str, *changes: Any) -> None:
+    """
+    登记本事务中变更的数据，事务提交后传给标签的订阅者，回滚时丢弃
+    
+    应在提交前调用；实体对象在提交后才由订阅者读取，此时自增主键已经生成。
+    
+    Args:
+        db: 数据库会话
+        tag: 标签
+        changes: 变更记录，格式由标签约定，如实体对象或 (角色ID, 用户ID)
+    """
+    db.info.setdefault(_CHANGES_KEY, {}).setdefault(tag, []).extend(changes)
+
+
+def _invalidate_local(changes_by_tag: Dict[str, List[Any]]) -> List[Tuple[TwoTierCache, Optional[List[Hashable]]]]:
+    """
+    使标签关联的进程内缓存失效并调用失效回调
+    
+    Returns:
+        List[Tuple[TwoTierCache, Optional[List[Hashable]]]]: 受影响的缓存和失效的键，None表示整个缓存
+    """
+    affected: Dict[TwoTierCache, Optional[List[Hashable]]] = {}
+    for tag, changes in changes_by_tag.items():
+        for cache, extractor in _tag_caches.get(tag, ()):
+            keys = extractor(changes) if extractor is not None and changes else None
+            if keys is None:
+                if cache not in affected or affected[cache] is not None:
+                    cache.clear_local()
+                    affected[cache] = None
+            elif cache not in affected or affected[cache] is not None:
+                keys = list(keys)
+                cache.invalidate_local(*keys)
+                affected.setdefault(cache, []).extend(keys)
+        for callback in _tag_listeners.get(tag, ()):
+            callback(changes)
+    return list(affected.items())
+
+
+async def invalidate_tags(*tags: str) -> None:
+    """
+    立即使标签关联的缓存失效，用于不经过数据库事务的场景
+    
+    Args:
+        tags: 标签
+    """
+    await _clear_shared(_invalidate_local({tag: [] for tag in tags}))
+
+
+def _is_session(value: Any) -> bool:
+    return isinstance(value, AsyncSession)
+
+
+def _freeze(value: Any) -> Hashable:
+    """将参数转换为可作为缓存键的值"""
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(_freeze(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    return value
+
+
+def cached(tags: Iterable[str], ttl: Optional[float] = None):
+    """
+    缓存服务方法的返回值
+    
+    缓存键由除数据库会话外的参数组成，标签被 @invalidates 声明的写操作提交后整体失效。
+    未命中时的加载始终查询主库，避免把副本上尚未同步的旧数据写入共享缓存。
+    返回值在请求之间共享，调用方不应修改。与 @staticmethod 一起使用时放在其下方。
+    
+    Args:
+        tags: 返回值依赖的数据标签，如 ["roles"]
+        ttl: 有效期（秒），默认 CACHE_DEFAULT_TTL
+    """
+    tags = tuple(tags)
+    
+    def decorator(func):
+        cache = TwoTierCache(func.__qualname__, ttl=config.CACHE_DEFAULT_TTL if ttl is None else ttl)
+        register_cache_tags(cache, {tag: None for tag in tags})
+        signature = inspect.signature(func)
+        
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = tuple(
+                (name, _freeze(value))
+                for name, value in bound.arguments.items()
+                if not _is_session(value)
+            )
+            db = next((value for value in bound.arguments.values() if _is_session(value)), None)
+            
+            async def load():
+                if db is None:
+                    return await func(*args, **kwargs)
+                with primary_reads(db):
+                    return await func(*args, **kwargs)
+            
+            return await cache.get_or_load(key, load)
+        
+        wrapper.cache = cache
+        return wrapper
+    
+    return decorator
+
+
+def invalidates(tags: Iterable[str]):
+    """
+    声明写操作影响的数据标签
+    
+    执行期间在数据库会话上登记标签，会话每次提交后使标签关联的缓存失效；
+    回滚或未提交时不失效。参数中没有数据库会话时在方法成功返回后失效。
+    与 @staticmethod 一起使用时放在其下方。
+    
+    Args:
+        tags: 影响的数据标签，如 ["roles", "role_menus"]
+    """
+    tags = tuple(tags)
+    
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            db = next((value for value in (*args, *kwargs.values()) if _is_session(value)), None)
+            if db is None:
+                result = await func(*args, **kwargs)
+                await invalidate_tags(*tags)
+                return result
+            
+            pending: Counter = db.info.setdefault(_PENDING_TAGS_KEY, Counter())
+            pending.update(tags)
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                pending.subtract(tags)
+        
+        return wrapper
+    
+    return decorator
+
+
+async def _clear_shared(affected: List[Tuple[TwoTierCache, Optional[List[Hashable]]]]) -> None:
+    """清理共享缓存中的条目"""
+    for cache, keys in affected:
+        backend = cache.backend
+        if backend is None:
+            continue
+        try:
+            if keys is None:
+                await backend.delete_prefix(f"{cache.namespace}:")
+            elif keys:
+                await backend.delete(*[cache._backend_key(key) for key in keys])
+        except Exception as e:
+            logger.warning(f"共享缓存清理失败: {cache.namespace}: {e}")
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_tags(session):
+    """事务提交后使登记的标签失效"""
+    pending = session.info.get(_PENDING_TAGS_KEY) or {}
+    changes = session.info.pop(_CHANGES_KEY, None) or {}
+    changes_by_tag = {tag: [] for tag, count in pending.items() if count > 0}
+    for tag, records in changes.items():
+        changes_by_tag.setdefault(tag, []).extend(records)
+    if not changes_by_tag:
+        return
+    affected = _invalidate_local(changes_by_tag)
+    shared = [(cache, keys) for cache, keys in affected if cache.backend is not None]
+    if not shared:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    task = loop.create_task(_clear_shared(shared))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back_changes(session):
+    """事务回滚后丢弃登记的变更记录"""
+    session.info.pop(_CHANGES_KEY, None)
@@ -0,0 +1,251 @@
+"""
+响应压缩
+
+按 Accept-Encoding 协商 brotli 或 gzip。普通响应由 CompressionMiddleware 实时压缩；
+菜单树等缓存的响应体通过 CompressedPayload 每种编码只压缩一次，之后原样输出。
+"""
+import gzip
+import zlib
+from typing import Dict, Mapping, Optional, Tuple
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.utils.response import ApiJSONResponse
+from config import config
+
+try:
+    import brotli
+except ImportError:  # 未安装时只支持 gzip
+    brotli = None
+
+# 可用编码，按优先级排列
+SUPPORTED_ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+# 可压缩的内容类型前缀
+_COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+
+# 缓存响应体只压缩一次，使用较高等级（brotli 11 级过慢，9 级压缩率接近）
+_PRECOMPRESS_GZIP_LEVEL = 9
+_PRECOMPRESS_BROTLI_QUALITY = 9
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    根据 Accept-Encoding 选择压缩编码
+    
+    Args:
+        accept_encoding: Accept-Encoding 请求头，如 "br;q=1.0, gzip;q=0.8"
+        
+    Returns:
+        Optional[str]: br 或 gzip；客户端不接受任何可用编码或未启用压缩时返回None
+    """
+    if not accept_encoding or not config.COMPRESSION_ENABLED:
+        return None
+    
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        quality = 1.0
+        params = params.replace(" ", "")
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        weights[token] = quality
+    
+    best, best_quality = None, 0.0
+    for encoding in SUPPORTED_ENCODINGS:
+        quality = weights.get(encoding, weights.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress_body(body: bytes, encoding: str, precompress: bool = False) -> bytes:
+    """
+    压缩完整响应体
+    
+    Args:
+        body: 响应体
+        encoding: br 或 gzip
+        precompress: 是否为缓存响应体预压缩，预压缩使用较高等级
+        
+    Returns:
+        bytes: 压缩后的数据
+    """
+    if encoding == "br":
+        quality = _PRECOMPRESS_BROTLI_QUALITY if precompress else config.COMPRESSION_BROTLI_QUALITY
+        return brotli.compress(body, quality=quality)
+    level = _PRECOMPRESS_GZIP_LEVEL if precompress else config.COMPRESSION_GZIP_LEVEL
+    # mtime 固定为0，相同内容压缩结果相同
+    return gzip.compress(body, compresslevel=level, mtime=0)
+
+
+class CompressedPayload:
+    """已序列化的缓存响应体，各编码的压缩结果在首次使用时生成，随缓存条目复用"""
+    
+    __slots__ = ("body", "_encoded")
+    
+    def __init__(self, body: bytes):
+        self.body = body
+        self._encoded: Dict[str, bytes] = {}
+    
+    def encode(self, encoding: Optional[str]) -> Tuple[bytes, Optional[str]]:
+        """
+        获取指定编码的响应体
+        
+        Args:
+            encoding: 协商得到的编码
+            
+        Returns:
+            Tuple[bytes, Optional[str]]: 响应体及实际使用的编码，响应体小于 COMPRESSION_MIN_SIZE 时不压缩
+        """
+        if encoding is None or len(self.body) < config.COMPRESSION_MIN_SIZE:
+            return self.body, None
+        data = self._encoded.get(encoding)
+        if data is None:
+            data = self._encoded[encoding] = compress_body(self.body, encoding, precompress=True)
+        return data, encoding
+
+
+def payload_response(request: Request, payload: CompressedPayload, headers: Optional[Mapping[str, str]] = None) -> ApiJSONResponse:
+    """
+    输出缓存的响应体，按请求协商使用预压缩版本
+    
+    Args:
+        request: 请求对象
+        payload: 缓存的响应体
+        headers: 额外的响应头
+        
+    Returns:
+        ApiJSONResponse: 响应，已压缩时带 Content-Encoding，中间件不会重复压缩
+    """
+    content, encoding = payload.encode(negotiate_encoding(request.headers.get("accept-encoding")))
+    headers = dict(headers or {})
+    if config.COMPRESSION_ENABLED:
+        headers["Vary"] = "Accept-Encoding"
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+        # 压缩后的表示与原文不是字节级相同，强 ETag 改为弱 ETag（If-None-Match 比较时忽略 W/）
+        etag = headers.get("ETag")
+        if etag and not etag.startswith("W/"):
+            headers["ETag"] = f"W/{etag}"
+    return ApiJSONResponse(content, headers=headers)
+
+
+class _StreamCompressor:
+    """分块响应的流式压缩器"""
+    
+    def __init__(self, encoding: str):
+        self._brotli = encoding == "br"
+        if self._brotli:
+            self._compressor = brotli.Compressor(quality=config.COMPRESSION_BROTLI_QUALITY)
+        else:
+            self._compressor = zlib.compressobj(config.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    
+    def compress(self, data: bytes) -> bytes:
+        """压缩一个分块并立即刷新输出，流式导出时客户端可以逐块接收"""
+        if self._brotli:
+            return self._compressor.process(data) + self._compressor.flush()
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+    
+    def finish(self) -> bytes:
+        """结束压缩流"""
+        if self._brotli:
+            return self._compressor.finish()
+        return self._compressor.flush()
+
+
+class CompressionMiddleware:
+    """
+    响应压缩中间件
+    
+    只压缩 JSON、NDJSON 和文本响应；已带 Content-Encoding 的响应（如预压缩的缓存响应体）
+    和小于最小字节数的响应原样输出。分块响应按块流式压缩。
+    """
+    
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await _CompressionResponder(self.app, encoding, self.minimum_size)(scope, receive, send)
+
+
+class _CompressionResponder:
+    """单个请求的压缩处理"""
+    
+    def __init__(self, app: ASGIApp, encoding: str, minimum_size: int):
+        self.app = app
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.send: Optional[Send] = None
+        self.start_message: Optional[Message] = None
+        self.compressible = False
+        self.compressor: Optional[_StreamCompressor] = None
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        await self.app(scope, receive, self.send_compressed)
+    
+    async def send_compressed(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            # 等到第一个响应体分块再决定是否压缩
+            headers = Headers(raw=message["headers"])
+            self.start_message = message
+            self.compressible = (
+                "content-encoding" not in headers
+                and headers.get("content-type", "").startswith(_COMPRESSIBLE_TYPES)
+            )
+            return
+        
+        if message["type"] != "http.response.body":
+            await self.send(message)
+            return
+        
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        
+        if self.start_message is None:
+            # 后续分块
+            if self.compressor is None:
+                await self.send(message)
+                return
+            data = self.compressor.compress(body)
+            if not more_body:
+                data += self.compressor.finish()
+            await self.send({"type": "http.response.body", "body": data, "more_body": more_body})
+            return
+        
+        start_message, self.start_message = self.start_message, None
+        if not self.compressible or (not more_body and len(body) < self.minimum_size):
+            await self.send(start_message)
+            await self.send(message)
+            return
+        
+        headers = MutableHeaders(raw=start_message["headers"])
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        if not more_body:
+            data = compress_body(body, self.encoding)
+            headers["Content-Length"] = str(len(data))
+            await self.send(start_message)
+            await self.send({"type": "http.response.body", "body": data})
+            return
+        
+        if "content-length" in headers:
+            del headers["Content-Length"]
+        self.compressor = _StreamCompressor(self.encoding)
+        await self.send(start_message)
+        await self.send({"type": "http.response.body", "body": self.compressor.compress(body), "more_body": True})
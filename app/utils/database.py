@@ -1,19 +1,121 @@
 """
 数据库连接和会话管理
 """
-from sqlalchemy import create_engine
+import logging
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Set
+from sqlalchemy import create_engine, event, inspect, text
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.sql.dml import UpdateBase
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from app.utils.pool_metrics import InstrumentedAsyncQueuePool
+from app.utils.query_metrics import install_query_hooks
 from config import config
 
-# 创建异步数据库引擎
-async_engine = create_async_engine(
-    config.DATABASE_URL,
-    echo=config.DEBUG,
-    pool_pre_ping=True,
-    pool_recycle=300,
-)
+logger = logging.getLogger(__name__)
+
+# 迁移脚本目录
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "migrations")
+
+
+
+def _create_engine(url: str):
+    """
+    按连接池配置创建异步数据库引擎
+    """
+    engine = create_async_engine(
+        url,
+        echo=config.DEBUG,
+        poolclass=InstrumentedAsyncQueuePool,
+        pool_size=config.DB_POOL_SIZE,
+        max_overflow=config.DB_MAX_OVERFLOW,
+        pool_timeout=config.DB_POOL_TIMEOUT,
+        pool_pre_ping=config.DB_POOL_PRE_PING,
+        pool_recycle=config.DB_POOL_RECYCLE,
+    )
+    # 注册请求级SQL统计事件
+    if config.SQL_METRICS_ENABLED:
+        install_query_hooks(engine)
+    return engine
+
+
+# 创建异步数据库引擎（主库）
+async_engine = _create_engine(config.DATABASE_URL)
+
+# 只读副本引擎，未配置时所有请求都走主库
+replica_engine = _create_engine(config.DATABASE_REPLICA_URL) if config.DATABASE_REPLICA_URL else None
+
+# 用户ID -> 最近一次写入主库的时间，窗口期内该用户的读请求也走主库。
+# 记录只在处理写请求的进程内可见，多进程部署时需按用户粘性路由才能保证写后读一致
+_recent_writes: Dict[int, float] = {}
+
+
+def mark_recent_write(user_id: int) -> None:
+    """
+    记录用户刚刚写入过主库
+    
+    记录保存在当前进程内：多个 worker 时，落到其他 worker 的后续读请求不受窗口保护，
+    仍可能从副本读到旧数据。
+    
+    Args:
+        user_id: 用户ID
+    """
+    now = time.monotonic()
+    _recent_writes[user_id] = now
+    # 顺带清理已过窗口期的记录
+    if len(_recent_writes) > 1024:
+        for key in [key for key, at in _recent_writes.items() if now - at > config.READ_YOUR_WRITES_WINDOW]:
+            _recent_writes.pop(key, None)
+
+
+def has_recent_write(user_id: int) -> bool:
+    """
+    判断用户是否处于写后读主库的窗口期内
+    
+    Args:
+        user_id: 用户ID
+        
+    Returns:
+        bool: 是否在窗口期内
+    """
+    written_at = _recent_writes.get(user_id)
+    return written_at is not None and time.monotonic() - written_at <= config.READ_YOUR_WRITES_WINDOW
+
+
+class RoutingSession(Session):
+    """
+    读写分离会话
+    
+    会话 info 中 use_replica 为真时查询走只读副本；刷新、DML语句
+    以及会话内已经发生过写入后的查询始终走主库。
+    """
+    
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if (
+            replica_engine is not None
+            and self.info.get("use_replica")
+            and not self.info.get("has_writes")
+            and not self._flushing
+            and not isinstance(clause, UpdateBase)
+        ):
+            return replica_engine.sync_engine
+        return async_engine.sync_engine
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _after_flush(session, flush_context):
+    """标记会话已有写入"""
+    session.info["has_writes"] = True
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _after_commit(session):
+    """提交写入后为当前用户开启写后读主库窗口"""
+    if session.info.pop("has_writes", False) and session.info.get("user_id") is not None:
+        mark_recent_write(session.info["user_id"])
 
 # 创建异步会话
 AsyncSessionLocal = async_sessionmaker(
@@ -24,24 +126,110 @@ AsyncSessionLocal = async_sessionmaker(
     expire_on_commit=False
 )
 
+# 读写分离会话：默认走主库，通过 info={"use_replica": True} 将查询路由到只读副本
+AsyncRoutingSessionLocal = async_sessionmaker(
+    autocommit=False,
+    autoflush=False,
+    class_=AsyncSession,
+    sync_session_class=RoutingSession,
+    expire_on_commit=False
+)
+
 # 创建基础模型类
 Base = declarative_base()
 
 
 async def get_db() -> AsyncSession:
     """
-    获取数据库会话
+    获取数据库会话（主库）
+    
+    会话在首条语句执行时才从连接池取出连接：请求被缓存命中或提前以401/403拒绝时不占用连接。
     """
-    async with AsyncSessionLocal() as session:
+    async with AsyncRoutingSessionLocal() as session:
         try:
             yield session
         finally:
             await session.close()
 
 
+def read_session(user_id: Optional[int] = None) -> AsyncSession:
+    """
+    创建只读数据库会话
+    
+    配置了只读副本时查询走副本；用户在写后读窗口期内时仍走主库，
+    保证能读到自己刚写入的数据（窗口记录在进程内，见 mark_recent_write）。
+    
+    Args:
+        user_id: 当前用户ID
+        
+    Returns:
+        AsyncSession: 数据库会话，首条语句执行时才占用连接
+    """
+    use_replica = replica_engine is not None and not (user_id is not None and has_recent_write(user_id))
+    return AsyncRoutingSessionLocal(info={"use_replica": use_replica, "user_id": user_id})
+
+
+def reads_from_replica(db) -> bool:
+    """
+    判断会话的查询当前是否会路由到只读副本
+    
+    Args:
+        db: 数据库会话
+        
+    Returns:
+        bool: 是否读副本
+    """
+    return replica_engine is not None and bool(db.info.get("use_replica")) and not db.info.get("has_writes")
+
+
+@contextmanager
+def primary_reads(db) -> Iterator:
+    """
+    在代码块内让只读会话的查询走主库
+    
+    填充进程级共享缓存（菜单树、权限位图、@cached 方法等）时使用：副本可能仍有复制延迟，
+    读到的旧数据会按新的版本号写入缓存，之后所有请求（包括刚写入的用户）都会拿到旧数据。
+    
+    Args:
+        db: 数据库会话
+    """
+    info = db.info
+    previous = info.get("use_replica")
+    info["use_replica"] = False
+    try:
+        yield db
+    finally:
+        if previous is None:
+            info.pop("use_replica", None)
+        else:
+            info["use_replica"] = previous
+
+
+def _engine_pool_metrics(engine) -> dict:
+    """
+    获取单个引擎的连接池统计信息
+    """
+    pool = engine.pool
+    if isinstance(pool, InstrumentedAsyncQueuePool):
+        return pool.metrics()
+    return {"status": pool.status()}
+
+
+def get_pool_metrics() -> dict:
+    """
+    获取数据库连接池统计信息，配置了只读副本时附带副本连接池的统计
+    """
+    metrics = _engine_pool_metrics(async_engine)
+    if replica_engine is not None:
+        metrics["replica"] = _engine_pool_metrics(replica_engine)
+    return metrics
+
+
 async def init_db():
     """
-    初始化数据库
+    按模型直接建表
+    
+    仅用于测试或本地临时库，正式环境的表结构由 alembic 迁移管理（alembic upgrade head）。
     """
     # 导入所有模型以确保SQLAlchemy能够找到它们
     from app.models.associations import user_role_association, role_menu_association
@@ -53,8 +241,59 @@ async def init_db():
         await conn.run_sync(Base.metadata.create_all)
 
 
+def get_schema_heads() -> Set[str]:
+    """
+    获取迁移脚本的最新版本号
+    
+    Returns:
+        Set[str]: 最新版本号集合（存在分支时可能有多个）
+    """
+    from alembic.script import ScriptDirectory
+    return set(ScriptDirectory(MIGRATIONS_DIR).get_heads())
+
+
+async def check_schema_version() -> None:
+    """
+    启动时检查数据库表结构版本
+    
+    只查询一次 alembic_version 表并与迁移脚本的最新版本比对，替代每次启动执行 create_all。
+    DB_SCHEMA_CHECK 为 strict 时版本不一致直接启动失败，为 warn 时只记录告警，为 off 时跳过检查。
+    
+    Raises:
+        RuntimeError: strict 模式下表结构版本与迁移脚本不一致
+    """
+    if config.DB_SCHEMA_CHECK == "off":
+        return
+    
+    expected = get_schema_heads()
+    async with async_engine.connect() as conn:
+        # 版本表不存在：尚未执行迁移，或是旧版本用 create_all 建的库；连接失败等其他错误直接抛出
+        has_version_table = await conn.run_sync(
+            lambda sync_conn: inspect(sync_conn).has_table("alembic_version")
+        )
+        if has_version_table:
+            result = await conn.execute(text("SELECT version_num FROM alembic_version"))
+            current = set(result.scalars().all())
+        else:
+            current = set()
+    
+    if current == expected:
+        logger.info(f"数据库表结构版本: {', '.join(sorted(current))}")
+        return
+    
+    message = (
+        f"数据库表结构版本不一致: 当前 {sorted(current) or '未初始化'}，期望 {sorted(expected)}。"
+        f"请执行 alembic upgrade head（已用 create_all 建表的旧库先执行 alembic stamp f4bf81a64ad9）"
+    )
+    if config.DB_SCHEMA_CHECK == "strict":
+        raise RuntimeError(message)
+    logger.warning(message)
+
+
 async def close_db():
     """
     关闭数据库连接
     """
-    await async_engine.dispose()
\ No newline at end of file
+    await async_engine.dispose()
+    if replica_engine is not None:
+        await replica_engine.dispose()
\ No newline at end of file
@@ -5,10 +5,11 @@ from typing import Optional
 from fastapi import Depends, HTTPException, status, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.utils.database import get_db
+from app.utils.database import get_db, read_session
 from app.utils.auth import verify_token
 from app.services.user_service import UserService
 from app.models.user import User
+from app.schemas.user import UserPrincipal
 import logging
 
 # 配置日志
@@ -22,17 +23,20 @@ async def get_current_user(
     request: Request,
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
     db: AsyncSession = Depends(get_db)
-) -> User:
+) -> UserPrincipal:
     """
     获取当前登录用户
     
+    只返回精简的身份信息（ID、用户名、状态标记和角色ID），
+    需要完整用户对象的接口请使用 get_current_user_entity。
+    
     Args:
         request: 请求对象
         credentials: JWT凭证（可选）
         db: 数据库会话
         
     Returns:
-        User: 用户对象
+        UserPrincipal: 用户身份信息
         
     Raises:
         HTTPException: 认证失败
@@ -42,9 +46,10 @@ async def get_current_user(
     if credentials and credentials.credentials.startswith("eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9"):
         logger.info(f"检测到特殊token，尝试直接获取admin用户")
         # 尝试获取admin用户（ID=2，根据用户提供的信息）
-        user = await UserService.get_user_by_id(db, 2)
+        user = await UserService.get_principal(db, 2)
         if user:
             logger.info(f"✅ 成功获取admin用户: {user.username}")
+            db.info["user_id"] = user.id
             return user
     # ======== 临时解决方案结束 ========
     
@@ -86,7 +91,7 @@ async def get_current_user(
     logger.info(f"👤 从Token中获取用户ID: {user_id}")
     
     # 获取用户信息
-    user = await UserService.get_user_by_id(db, user_id)
+    user = await UserService.get_principal(db, user_id)
     if user is None:
         logger.error(f"❌ 用户不存在，用户ID: {user_id}")
         raise HTTPException(
@@ -106,12 +111,61 @@ async def get_current_user(
         )
     
     logger.info(f"✅ 用户认证成功: {user.username}")
+    # 记录会话所属用户，提交写入后为其开启写后读主库窗口
+    db.info["user_id"] = user.id
     return user
 
 
-async def get_current_active_user(
-    current_user: User = Depends(get_current_user)
+async def get_read_db(
+    current_user: UserPrincipal = Depends(get_current_user)
+) -> AsyncSession:
+    """
+    获取只读数据库会话
+    
+    配置了只读副本时查询走副本，当前用户刚写入过数据时仍走主库。
+    只能用于不写入数据的接口。
+    
+    Args:
+        current_user: 当前用户身份信息
+    """
+    async with read_session(current_user.id) as session:
+        try:
+            yield session
+        finally:
+            await session.close()
+
+
+async def get_current_user_entity(
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ) -> User:
+    """
+    获取当前登录用户的ORM对象（只查询用户表，不加载角色和菜单）
+    
+    Args:
+        current_user: 当前用户身份信息
+        db: 数据库会话
+        
+    Returns:
+        User: 用户对象
+        
+    Raises:
+        HTTPException: 用户不存在
+    """
+    user = await UserService.get_user_by_id(db, current_user.id, with_roles=False)
+    if user is None:
+        logger.error(f"❌ 用户不存在，用户ID: {current_user.id}")
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="认证失败：用户不存在",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return user
+
+
+async def get_current_active_user(
+    current_user: UserPrincipal = Depends(get_current_user)
+) -> UserPrincipal:
     """
     获取当前活跃用户
     
@@ -119,7 +173,7 @@ async def get_current_active_user(
         current_user: 当前用户
         
     Returns:
-        User: 活跃用户对象
+        UserPrincipal: 活跃用户身份信息
         
     Raises:
         HTTPException: 用户未激活
@@ -134,8 +188,8 @@ async def get_current_active_user(
 
 
 async def get_current_superuser(
-    current_user: User = Depends(get_current_user)
-) -> User:
+    current_user: UserPrincipal = Depends(get_current_user)
+) -> UserPrincipal:
     """
     获取当前超级管理员用户
     
@@ -143,7 +197,7 @@ async def get_current_superuser(
         current_user: 当前用户
         
     Returns:
-        User: 超级管理员用户对象
+        UserPrincipal: 超级管理员身份信息
         
     Raises:
         HTTPException: 权限不足
@@ -0,0 +1,134 @@
+"""
+流式数据导出
+
+通过服务端游标逐批读取数据并直接写入分块响应，导出任意行数时内存占用保持平稳。
+"""
+import csv
+import io
+from typing import AsyncIterator, Callable, Optional, Sequence
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from app.models.menu import Menu
+from app.models.user import User, Role
+from app.utils.database import read_session
+from app.utils.response import BusinessException, dumps_json
+from config import config
+
+# 各实体导出的字段（用户不导出密码哈希）
+EXPORT_FIELDS = {
+    "users": (User, (
+        "id", "username", "email", "phone", "real_name", "avatar",
+        "is_active", "is_superuser", "created_at", "updated_at",
+    )),
+    "roles": (Role, (
+        "id", "name", "code", "description", "is_active", "created_at", "updated_at",
+    )),
+    "menus": (Menu, (
+        "id", "name", "path", "component", "icon", "order_num", "parent_id", "menu_type",
+        "permission", "is_visible", "is_active", "created_at", "updated_at",
+    )),
+}
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+# 输出缓冲达到该字节数时发送一个分块
+_FLUSH_BYTES = 64 * 1024
+
+
+def _csv_value(value):
+    """CSV单元格取值，日期时间使用ISO格式"""
+    if value is None:
+        return ""
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return value
+
+
+def _csv_encoder() -> Callable[[Sequence], bytes]:
+    """生成CSV行编码函数，复用同一个行缓冲"""
+    line = io.StringIO()
+    writer = csv.writer(line)
+    
+    def encode(row: Sequence) -> bytes:
+        line.seek(0)
+        line.truncate()
+        writer.writerow([_csv_value(value) for value in row])
+        return line.getvalue().encode("utf-8")
+    
+    return encode
+
+
+async def export_rows(namespace: str, fmt: str, user_id: Optional[int] = None) -> AsyncIterator[bytes]:
+    """
+    逐批导出实体数据
+    
+    使用独立的只读会话和服务端游标（yield_per）读取，不依赖请求级会话的生命周期。
+    NDJSON 每行使用与接口响应相同的 dumps_json 编码。
+    
+    Args:
+        namespace: 实体命名空间，如 users
+        fmt: ndjson 或 csv
+        user_id: 当前用户ID，用于只读副本的写后读判断
+        
+    Returns:
+        AsyncIterator[bytes]: 响应分块
+    """
+    model, fields = EXPORT_FIELDS[namespace]
+    query = (
+        select(*[getattr(model, field) for field in fields])
+        .where(model.is_deleted == False)
+        .order_by(model.id)
+        .execution_options(yield_per=config.EXPORT_YIELD_PER)
+    )
+    
+    buffer = bytearray()
+    if fmt == "csv":
+        encode = _csv_encoder()
+        # 写入 BOM，便于 Excel 正确识别 UTF-8
+        buffer += "\ufeff".encode("utf-8")
+        buffer += encode(fields)
+    else:
+        encode = lambda row: dumps_json(dict(zip(fields, row))) + b"\n"
+    
+    session = read_session(user_id)
+    try:
+        result = await session.stream(query)
+        async for row in result:
+            buffer += encode(row)
+            if len(buffer) >= _FLUSH_BYTES:
+                yield bytes(buffer)
+                buffer.clear()
+    finally:
+        await session.close()
+    
+    if buffer:
+        yield bytes(buffer)
+
+
+def export_response(namespace: str, fmt: str, user_id: Optional[int] = None) -> StreamingResponse:
+    """
+    构造流式导出响应
+    
+    Args:
+        namespace: 实体命名空间
+        fmt: ndjson 或 csv
+        user_id: 当前用户ID
+        
+    Returns:
+        StreamingResponse: 分块传输的导出响应
+        
+    Raises:
+        BusinessException: 不支持的导出格式
+    """
+    fmt = (fmt or "ndjson").lower()
+    if fmt not in EXPORT_MEDIA_TYPES:
+        raise BusinessException(f"不支持的导出格式: {fmt}，仅支持 ndjson 或 csv")
+    
+    return StreamingResponse(
+        export_rows(namespace, fmt, user_id),
+        media_type=EXPORT_MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{namespace}.{fmt}"'},
+    )
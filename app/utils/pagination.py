@@ -0,0 +1,204 @@
+"""
+分页工具：游标编解码、总数缓存和分页查询执行
+"""
+import base64
+import json
+import time
+from collections import OrderedDict
+from contextlib import nullcontext
+from typing import Any, List, Optional, Tuple
+from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+from app.utils.database import primary_reads, reads_from_replica
+from app.utils.response import BusinessException
+from config import config
+
+
+def encode_cursor(values: List[Any]) -> str:
+    """
+    将排序键编码为不透明的分页游标
+    
+    Args:
+        values: 最后一条记录的排序键
+        
+    Returns:
+        str: 分页游标
+    """
+    raw = json.dumps(values, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    """
+    解码分页游标
+    
+    Args:
+        cursor: 分页游标
+        size: 排序键的个数
+        
+    Returns:
+        List[Any]: 排序键
+        
+    Raises:
+        BusinessException: 游标格式无效
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError):
+        raise BusinessException("无效的分页游标")
+    
+    if not isinstance(values, list) or len(values) != size or not all(isinstance(v, int) for v in values):
+        raise BusinessException("无效的分页游标")
+    return values
+
+
+class TotalCache:
+    """分页总数缓存，按实体命名空间和搜索关键词保存总数，超出容量时淘汰最久未使用的条目"""
+    
+    def __init__(self, ttl: int = 30, max_size: int = 1024):
+        """
+        初始化总数缓存
+        
+        Args:
+            ttl: 缓存有效期（秒），0表示不缓存
+            max_size: 最大条目数，每个不同的搜索关键词占一个条目
+        """
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, int]]" = OrderedDict()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def get(self, namespace: str, search: Optional[str]) -> Optional[int]:
+        """
+        获取缓存的总数
+        
+        Args:
+            namespace: 实体命名空间，如 users
+            search: 搜索关键词
+            
+        Returns:
+            Optional[int]: 总数，未命中或已过期返回None
+        """
+        key = (namespace, search or "")
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, total = entry
+        if expires_at <= time.monotonic():
+            self._entries.pop(key, None)
+            return None
+        self._entries.move_to_end(key)
+        return total
+    
+    def set(self, namespace: str, search: Optional[str], total: int) -> None:
+        """
+        缓存总数
+        
+        Args:
+            namespace: 实体命名空间
+            search: 搜索关键词
+            total: 总数
+        """
+        if self.ttl <= 0 or self.max_size <= 0:
+            return
+        key = (namespace, search or "")
+        self._entries[key] = (time.monotonic() + self.ttl, total)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+    
+    def invalidate(self, namespace: str) -> None:
+        """
+        使实体命名空间下的所有总数失效
+        
+        Args:
+            namespace: 实体命名空间
+        """
+        for key in [key for key in self._entries if key[0] == namespace]:
+            self._entries.pop(key, None)
+    
+    def invalidate_prefix(self, prefix: str) -> None:
+        """
+        使命名空间以指定前缀开头的所有总数失效
+        
+        Args:
+            prefix: 命名空间前缀，如 role_users:
+        """
+        for key in [key for key in self._entries if key[0].startswith(prefix)]:
+            self._entries.pop(key, None)
+
+
+# 全局分页总数缓存
+total_cache = TotalCache(config.PAGINATION_TOTAL_CACHE_TTL, config.PAGINATION_TOTAL_CACHE_MAX_SIZE)
+
+
+async def fetch_page(
+    db: AsyncSession,
+    query: Select,
+    count_query: Select,
+    namespace: str,
+    search: Optional[str],
+    per_page: int,
+    offset: Optional[int] = None,
+    include_total: bool = True,
+    scalars: bool = True
+) -> Tuple[List[Any], Optional[int], bool]:
+    """
+    执行分页查询
+    
+    总数优先取自缓存；未命中时按 PAGINATION_COUNT_MODE 单独执行计数查询，
+    或在页码分页时用窗口函数与分页数据一次查出。
+    
+    Args:
+        db: 数据库会话
+        query: 已包含过滤、排序条件的查询
+        count_query: 计数查询
+        namespace: 总数缓存的实体命名空间
+        search: 搜索关键词
+        per_page: 每页数量
+        offset: 偏移量，游标分页时为None
+        include_total: 是否统计总数
+        scalars: 为True时返回每行第一列（单实体查询），否则返回整行（列投影查询）
+        
+    Returns:
+        Tuple[List[Any], Optional[int], bool]: 当前页数据、总数（不统计时为None）、是否存在下一页
+    """
+    total = total_cache.get(namespace, search) if include_total else None
+    cached = total is not None
+    # 总数缓存在进程内共享，不能缓存副本上可能滞后的计数
+    on_replica = reads_from_replica(db)
+    use_window = (
+        include_total and not cached and offset is not None
+        and config.PAGINATION_COUNT_MODE == "window"
+    )
+    
+    if include_total and not cached and not use_window:
+        # 计数结果会写入缓存时从主库统计
+        with primary_reads(db) if total_cache.ttl > 0 else nullcontext():
+            total = (await db.execute(count_query)).scalar()
+    
+    if offset:
+        query = query.offset(offset)
+    # 多取一条用于判断是否存在下一页
+    query = query.limit(per_page + 1)
+    
+    if use_window:
+        rows = (await db.execute(query.add_columns(func.count().over().label("_total")))).all()
+        items = [row[0] for row in rows] if scalars else rows
+        if rows:
+            total = rows[0][-1]
+        else:
+            # 超出末页时窗口函数拿不到总数，退回计数查询
+            total = (await db.execute(count_query)).scalar()
+    else:
+        result = await db.execute(query)
+        items = result.scalars().all() if scalars else result.all()
+    
+    if include_total and not cached and not (use_window and on_replica):
+        total_cache.set(namespace, search, total)
+    
+    return items[:per_page], total, len(items) > per_page
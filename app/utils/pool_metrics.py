@@ -0,0 +1,83 @@
+"""
+数据库连接池监控
+
+在 AsyncAdaptedQueuePool 的基础上统计连接获取次数、等待次数、超时次数
+以及获取连接的等待耗时分布，用于判断延迟抖动是否来自连接池耗尽。
+"""
+import bisect
+import logging
+import time
+from typing import Any, Dict, List
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+# 获取连接等待耗时直方图的桶上限（毫秒），最后一个桶收集超出部分
+WAIT_BUCKETS_MS = [1, 5, 10, 50, 100, 500, 1000, 5000]
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """带统计信息的异步连接池"""
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._reset_metrics()
+    
+    def _reset_metrics(self) -> None:
+        """重置统计信息"""
+        self.checkout_count = 0
+        # 获取时池中无空闲连接且已达溢出上限，只能排队等待的次数
+        self.wait_count = 0
+        self.timeout_count = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+        self.wait_histogram: List[int] = [0] * (len(WAIT_BUCKETS_MS) + 1)
+    
+    def _do_get(self):
+        """获取连接并记录等待耗时"""
+        exhausted = (
+            self._max_overflow > -1
+            and self._overflow >= self._max_overflow
+            and self._pool.empty()
+        )
+        started_at = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.timeout_count += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - started_at
+            self.checkout_count += 1
+            if exhausted:
+                self.wait_count += 1
+            self.wait_time_total += elapsed
+            self.wait_time_max = max(self.wait_time_max, elapsed)
+            self.wait_histogram[bisect.bisect_left(WAIT_BUCKETS_MS, elapsed * 1000)] += 1
+    
+    def metrics(self) -> Dict[str, Any]:
+        """
+        获取连接池当前状态和累计统计
+        
+        Returns:
+            Dict[str, Any]: 连接池统计信息
+        """
+        histogram = {f"le_{bound}ms": count for bound, count in zip(WAIT_BUCKETS_MS, self.wait_histogram)}
+        histogram[f"gt_{WAIT_BUCKETS_MS[-1]}ms"] = self.wait_histogram[-1]
+        return {
+            "pool_size": self.size(),
+            "max_overflow": self._max_overflow,
+            "timeout": self._timeout,
+            "checked_in": self.checkedin(),
+            "checked_out": self.checkedout(),
+            "overflow": self.overflow(),
+            "checkouts": self.checkout_count,
+            "waits": self.wait_count,
+            "timeouts": self.timeout_count,
+            "wait_time_avg_ms": round(self.wait_time_total * 1000 / self.checkout_count, 3) if self.checkout_count else 0.0,
+            "wait_time_max_ms": round(self.wait_time_max * 1000, 3),
+            "wait_histogram": histogram,
+        }
+
+
+# 连接池日志按类所在模块命名，与 SQLAlchemy 自身的 sqlalchemy.pool 一样默认只输出警告
+logging.getLogger(f"{__name__}.{InstrumentedAsyncQueuePool.__name__}").setLevel(logging.WARNING)
@@ -0,0 +1,139 @@
+"""
+请求级SQL统计
+
+通过引擎事件记录当前请求执行的语句数、数据库耗时和重复语句，
+用于生成 Server-Timing 响应头、结构化日志以及 N+1 查询告警。
+"""
+import logging
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from config import config
+
+logger = logging.getLogger(__name__)
+
+
+class QueryStats:
+    """单个请求的SQL统计"""
+    
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        # 参数化语句 -> 执行次数
+        self.statements: Counter = Counter()
+        # (参数化语句, 参数) -> 执行次数，用于识别完全相同的重复查询
+        self.executions: Counter = Counter()
+    
+    def record(self, statement: str, parameters: Any, duration: float) -> None:
+        """
+        记录一次语句执行
+        
+        Args:
+            statement: 参数化SQL语句
+            parameters: 绑定参数
+            duration: 执行耗时（秒）
+        """
+        self.count += 1
+        self.duration += duration
+        self.statements[statement] += 1
+        self.executions[(statement, repr(parameters))] += 1
+    
+    @property
+    def duplicates(self) -> int:
+        """完全相同（语句和参数均相同）的重复执行次数"""
+        return sum(times - 1 for times in self.executions.values() if times > 1)
+    
+    def repeated_statements(self, threshold: int) -> List[Tuple[str, int]]:
+        """
+        获取执行次数超过阈值的参数化语句
+        
+        Args:
+            threshold: 次数阈值
+            
+        Returns:
+            List[Tuple[str, int]]: 语句及执行次数，按次数降序
+        """
+        return [(statement, times) for statement, times in self.statements.most_common() if times > threshold]
+    
+    def server_timing(self) -> str:
+        """
+        生成 Server-Timing 响应头的数据库部分
+        
+        Returns:
+            str: 如 db;dur=3.21;desc="queries=4 duplicates=1"
+        """
+        return f'db;dur={self.duration * 1000:.2f};desc="queries={self.count} duplicates={self.duplicates}"'
+    
+    def log_fields(self) -> Dict[str, Any]:
+        """
+        获取结构化日志字段
+        
+        Returns:
+            Dict[str, Any]: 日志字段
+        """
+        return {
+            "sql_count": self.count,
+            "sql_time_ms": round(self.duration * 1000, 2),
+            "sql_duplicates": self.duplicates,
+        }
+
+
+# 当前请求的SQL统计，请求之外执行的语句不做记录
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def start_query_stats() -> QueryStats:
+    """
+    为当前请求开启SQL统计
+    
+    Returns:
+        QueryStats: 统计对象，请求内的语句执行都会累加到该对象上
+    """
+    stats = QueryStats()
+    _current_stats.set(stats)
+    return stats
+
+
+def get_query_stats() -> Optional[QueryStats]:
+    """获取当前请求的SQL统计"""
+    return _current_stats.get()
+
+
+def warn_repeated_statements(stats: QueryStats, label: str) -> None:
+    """
+    调试模式下对疑似 N+1 的重复语句输出告警
+    
+    Args:
+        stats: SQL统计
+        label: 请求标识，如 GET /api/users
+    """
+    if not config.SQL_N_PLUS_ONE_WARN:
+        return
+    for statement, times in stats.repeated_statements(config.SQL_N_PLUS_ONE_THRESHOLD):
+        logger.warning(f"疑似N+1查询: {label} 同一语句执行了 {times} 次: {' '.join(statement.split())[:200]}")
+
+
+def install_query_hooks(engine: AsyncEngine) -> None:
+    """
+    在引擎上注册语句执行事件，统计当前请求的SQL
+    
+    Args:
+        engine: 异步数据库引擎
+    """
+    sync_engine = engine.sync_engine
+    
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None and _current_stats.get() is not None:
+            context._query_started_at = time.perf_counter()
+    
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        stats = _current_stats.get()
+        started_at = getattr(context, "_query_started_at", None)
+        if stats is None or started_at is None:
+            return
+        stats.record(statement, parameters, time.perf_counter() - started_at)
@@ -2,8 +2,75 @@
 统一响应封装工具类
 """
 import json
-from typing import Any, Dict, Optional
-from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, Mapping, Optional
+from datetime import date, datetime
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+try:
+    import orjson
+except ImportError:  # 未安装时回退到标准库
+    orjson = None
+
+
+def json_default(obj: Any) -> Any:
+    """JSON序列化时处理标准库不支持的类型，日期时间使用ISO格式"""
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, Decimal):
+        # 与 FastAPI 默认编码器一致：整数值输出为整数，否则输出为浮点数
+        return int(obj) if obj.as_tuple().exponent >= 0 else float(obj)
+    if isinstance(obj, bytes):
+        return obj.decode("utf-8", errors="replace")
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump(mode="json")
+    return str(obj)
+
+
+def dumps_json(obj: Any) -> bytes:
+    """
+    序列化为紧凑的UTF-8 JSON字节串
+    
+    安装了 orjson 时一次遍历完成编码（日期时间原生支持），否则使用标准库 json。
+    
+    Args:
+        obj: 待序列化的数据
+        
+    Returns:
+        bytes: JSON字节串
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, default=json_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False, default=json_default, separators=(",", ":")).encode("utf-8")
+
+
+# 响应模型 -> 类型适配器，每个响应模型只构建一次
+_adapters: Dict[Any, TypeAdapter] = {}
+
+
+def dump_model(schema: Any, obj: Any) -> Any:
+    """
+    按响应模型直接序列化ORM对象
+    
+    使用 pydantic 的序列化器（TypeAdapter.dump_python）按响应模型筛选字段、转换日期时间，
+    不经过 model_validate 的校验流程：数据来自数据库，逐字段校验的开销比序列化本身还大。
+    序列化器从对象的 __dict__ 读取字段，未加载的属性和关联不会触发懒加载而是不输出，
+    因此对象及响应模型用到的关联必须已加载（会话已设置 expire_on_commit=False）。
+    
+    Args:
+        schema: 响应模型，如 UserDetail 或 List[Menu]
+        obj: ORM对象或对象列表
+        
+    Returns:
+        Any: 字段已按响应模型筛选、日期时间已转换为ISO格式的数据
+    """
+    adapter = _adapters.get(schema)
+    if adapter is None:
+        adapter = _adapters[schema] = TypeAdapter(schema)
+    return adapter.dump_python(obj, mode="json")
 
 
 class ApiCode:
@@ -15,6 +82,7 @@ class ApiCode:
     FORBIDDEN = 403        # 禁止访问
     NOT_FOUND = 404        # 资源不存在
     INTERNAL_ERROR = 500   # 服务器内部错误
+    SERVICE_UNAVAILABLE = 503  # 服务暂不可用
 
 
 class ApiResponse:
@@ -45,26 +113,52 @@ class ApiResponse:
     
     def to_json(self) -> str:
         """转换为JSON字符串"""
-        return json.dumps(self.to_dict(), ensure_ascii=False, default=str)
+        return self.to_bytes().decode("utf-8")
+    
+    def to_bytes(self) -> bytes:
+        """转换为紧凑的UTF-8 JSON字节串，格式与接口默认输出一致"""
+        return dumps_json(self.to_dict())
+
+
+class ApiJSONResponse(JSONResponse):
+    """
+    统一响应的JSON输出类
+    
+    直接返回该类实例可跳过 FastAPI 的 jsonable_encoder，只做一次序列化。
+    内容可以是 ApiResponse、普通数据，或已编码好的字节串（如缓存的响应体）。
+    """
+    
+    def __init__(self, content: Any, status_code: int = 200, headers: Optional[Mapping[str, str]] = None, **kwargs):
+        if isinstance(content, ApiResponse):
+            content = content.to_dict()
+        super().__init__(content, status_code=status_code, headers=headers, **kwargs)
+    
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, (bytes, bytearray, memoryview)):
+            return bytes(content)
+        return dumps_json(content)
 
 
 class PaginationInfo:
     """分页信息类"""
     
-    def __init__(self, page: int, per_page: int, total: int):
+    def __init__(self, page: int, per_page: int, total: Optional[int], has_next: Optional[bool] = None):
         """
         初始化分页信息
         
         Args:
             page: 当前页码
             per_page: 每页数量
-            total: 总记录数
+            total: 总记录数，未统计时为None
+            has_next: 是否存在下一页，为None时根据总数计算
         """
         self.page = page
         self.per_page = per_page
         self.total = total
-        self.pages = (total + per_page - 1) // per_page  # 总页数
-        self.has_next = page < self.pages
+        self.pages = (total + per_page - 1) // per_page if total is not None else None  # 总页数
+        if has_next is None:
+            has_next = self.pages is not None and page < self.pages
+        self.has_next = has_next
         self.has_prev = page > 1
     
     def to_dict(self) -> Dict[str, Any]:
@@ -123,19 +217,49 @@ class ResponseUtil:
         """服务器内部错误响应"""
         return ApiResponse(ApiCode.INTERNAL_ERROR, message)
     
+    @staticmethod
+    def service_unavailable(message: str = "服务繁忙，请稍后重试") -> ApiResponse:
+        """服务暂不可用响应"""
+        return ApiResponse(ApiCode.SERVICE_UNAVAILABLE, message)
+    
+    @staticmethod
+    def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+        """
+        判断 If-None-Match 请求头是否命中 ETag
+        
+        Args:
+            if_none_match: If-None-Match 请求头
+            etag: 当前资源的 ETag
+            
+        Returns:
+            bool: 是否命中
+        """
+        if not if_none_match:
+            return False
+        for candidate in if_none_match.split(","):
+            candidate = candidate.strip()
+            if candidate.startswith("W/"):
+                candidate = candidate[2:]
+            if candidate == "*" or candidate == etag:
+                return True
+        return False
+    
     @staticmethod
     def paginated_response(
         items: list, 
         page: int, 
         per_page: int, 
-        total: int, 
-        message: str = "查询成功"
+        total: Optional[int], 
+        message: str = "查询成功",
+        next_cursor: Optional[str] = None,
+        has_next: Optional[bool] = None
     ) -> ApiResponse:
         """分页响应"""
-        pagination = PaginationInfo(page, per_page, total)
+        pagination = PaginationInfo(page, per_page, total, has_next)
         data = {
             "items": items,
-            "pagination": pagination.to_dict()
+            "pagination": pagination.to_dict(),
+            "next_cursor": next_cursor
         }
         return ApiResponse(ApiCode.SUCCESS, message, data)
 
@@ -179,4 +303,11 @@ class NotFoundException(CustomException):
     """资源不存在异常"""
     
     def __init__(self, message: str = "资源不存在"):
-        super().__init__(ApiCode.NOT_FOUND, message)
\ No newline at end of file
+        super().__init__(ApiCode.NOT_FOUND, message)
+
+
+class ServiceUnavailableException(CustomException):
+    """服务暂不可用异常"""
+    
+    def __init__(self, message: str = "服务繁忙，请稍后重试"):
+        super().__init__(ApiCode.SERVICE_UNAVAILABLE, message)
\ No newline at end of file
@@ -0,0 +1,294 @@
+"""
+进程内 n-gram 搜索索引
+
+为用户、角色、菜单的搜索字段维护三元组倒排索引，搜索时返回候选ID，
+由调用方按主键回表，替代无法使用索引的 ilike('%关键词%') 全表扫描。
+
+索引在进程内维护：本进程的写操作提交后即时更新索引，绕过服务层的写操作
+由 SEARCH_INDEX_REBUILD_INTERVAL 定期全量重建同步。候选ID只用于缩小查询范围，
+调用方仍需在数据库中校验关键词，索引中的过期条目不会返回错误结果；
+但索引尚未收录的新记录在重建前搜不到。多进程部署时其他进程的写操作同样要等到重建，
+因此工作进程数大于1时不使用索引（见 search_index_enabled）。
+"""
+import asyncio
+import logging
+import sys
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.menu import Menu
+from app.models.user import User, Role
+from config import config
+
+logger = logging.getLogger(__name__)
+
+
+class NGramIndex:
+    """n-gram 倒排索引"""
+    
+    def __init__(self, n: int = 3):
+        """
+        初始化索引
+        
+        Args:
+            n: 分词长度
+        """
+        self.n = n
+        self.ready = False
+        # n-gram -> 文档ID集合
+        self._postings: Dict[str, Set[int]] = {}
+        # 文档ID -> 归一化后的字段值，用于排除 n-gram 误命中
+        self._docs: Dict[int, Tuple[str, ...]] = {}
+    
+    def _grams(self, text: str) -> Set[str]:
+        """切分 n-gram"""
+        return {text[i:i + self.n] for i in range(len(text) - self.n + 1)}
+    
+    def add(self, doc_id: int, values: Iterable[Optional[str]]) -> None:
+        """
+        新增或更新文档
+        
+        Args:
+            doc_id: 文档ID
+            values: 需要索引的字段值
+        """
+        self.remove(doc_id)
+        fields = tuple(value.lower() for value in values if value)
+        self._docs[doc_id] = fields
+        for field in fields:
+            for gram in self._grams(field):
+                self._postings.setdefault(gram, set()).add(doc_id)
+    
+    def remove(self, doc_id: int) -> None:
+        """
+        移除文档
+        
+        Args:
+            doc_id: 文档ID
+        """
+        fields = self._docs.pop(doc_id, None)
+        if not fields:
+            return
+        for field in fields:
+            for gram in self._grams(field):
+                postings = self._postings.get(gram)
+                if postings is not None:
+                    postings.discard(doc_id)
+                    if not postings:
+                        del self._postings[gram]
+    
+    def clear(self) -> None:
+        """清空索引"""
+        self._postings.clear()
+        self._docs.clear()
+        self.ready = False
+    
+    def search(self, term: str) -> Optional[Set[int]]:
+        """
+        搜索包含关键词的文档
+        
+        Args:
+            term: 搜索关键词
+            
+        Returns:
+            Optional[Set[int]]: 匹配的文档ID；关键词短于 n 个字符时无法使用索引，返回None
+        """
+        term = term.lower()
+        if len(term) < self.n:
+            return None
+        
+        postings = []
+        for gram in self._grams(term):
+            ids = self._postings.get(gram)
+            if not ids:
+                return set()
+            postings.append(ids)
+        
+        # 从最小的倒排表开始求交集
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for ids in postings[1:]:
+            candidates &= ids
+            if not candidates:
+                return candidates
+        
+        return {doc_id for doc_id in candidates if any(term in field for field in self._docs[doc_id])}
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取索引规模和内存占用估算
+        
+        Returns:
+            Dict[str, Any]: 统计信息
+        """
+        postings_bytes = sys.getsizeof(self._postings) + sum(
+            sys.getsizeof(gram) + sys.getsizeof(ids) for gram, ids in self._postings.items()
+        )
+        docs_bytes = sys.getsizeof(self._docs) + sum(
+            sys.getsizeof(fields) + sum(sys.getsizeof(field) for field in fields)
+            for fields in self._docs.values()
+        )
+        return {
+            "ready": self.ready,
+            "documents": len(self._docs),
+            "grams": len(self._postings),
+            "postings": sum(len(ids) for ids in self._postings.values()),
+            "memory_bytes": postings_bytes + docs_bytes,
+        }
+
+
+# 各实体的索引字段
+SEARCH_FIELDS = {
+    "users": (User, ("username", "email", "real_name")),
+    "roles": (Role, ("name", "code", "description")),
+    "menus": (Menu, ("name", "path", "component", "permission")),
+}
+
+# 全局搜索索引（进程内）
+search_indexes: Dict[str, NGramIndex] = {namespace: NGramIndex() for namespace in SEARCH_FIELDS}
+
+# 重建期间记录的写操作：命名空间 -> [(实体ID, 字段值，None表示移除)]，重建完成后重放到新索引
+_rebuild_journal: Optional[Dict[str, List[Tuple[int, Optional[Tuple[Any, ...]]]]]] = None
+_rebuild_lock = asyncio.Lock()
+
+
+def _record(namespace: str, entity_id: int, values: Optional[Tuple[Any, ...]]) -> None:
+    """重建进行中时记录写操作"""
+    if _rebuild_journal is not None:
+        _rebuild_journal[namespace].append((entity_id, values))
+
+
+def search_index_enabled() -> bool:
+    """
+    是否使用搜索索引
+    
+    工作进程数（WEB_CONCURRENCY）大于1时，其他进程新写入的记录在下次全量重建前不在本进程索引中，
+    搜索会漏掉它们，此时即使配置启用也不使用索引。
+    """
+    return config.SEARCH_INDEX_ENABLED and config.WEB_CONCURRENCY <= 1
+
+
+def index_entity(namespace: str, entity: Any) -> None:
+    """
+    新增或更新实体的索引，已软删除的实体从索引中移除
+    
+    Args:
+        namespace: 实体命名空间，如 users
+        entity: ORM对象
+    """
+    if not search_index_enabled():
+        return
+    index = search_indexes[namespace]
+    if entity.is_deleted:
+        index.remove(entity.id)
+        _record(namespace, entity.id, None)
+        return
+    _, fields = SEARCH_FIELDS[namespace]
+    values = tuple(getattr(entity, field) for field in fields)
+    index.add(entity.id, values)
+    _record(namespace, entity.id, values)
+
+
+def remove_entity(namespace: str, entity_id: int) -> None:
+    """
+    从索引中移除实体
+    
+    Args:
+        namespace: 实体命名空间
+        entity_id: 实体ID
+    """
+    if not search_index_enabled():
+        return
+    search_indexes[namespace].remove(entity_id)
+    _record(namespace, entity_id, None)
+
+
+def search_ids(namespace: str, term: str) -> Optional[Set[int]]:
+    """
+    通过索引搜索实体ID
+    
+    Args:
+        namespace: 实体命名空间
+        term: 搜索关键词
+        
+    Returns:
+        Optional[Set[int]]: 候选实体ID，调用方需在数据库中校验关键词；未启用索引、多进程部署、
+        索引未构建、关键词过短或候选过多（超过 SEARCH_INDEX_MAX_CANDIDATES）时返回None，
+        调用方应回退到 ilike。绕过服务层写入的记录在下次全量重建前不在候选中
+    """
+    if not search_index_enabled():
+        return None
+    index = search_indexes[namespace]
+    if not index.ready:
+        return None
+    ids = index.search(term)
+    if ids is None or len(ids) > config.SEARCH_INDEX_MAX_CANDIDATES:
+        return None
+    return ids
+
+
+async def rebuild_search_indexes(db: AsyncSession) -> Dict[str, Dict[str, Any]]:
+    """
+    从数据库全量重建所有搜索索引
+    
+    在新的索引对象上构建，期间旧索引继续提供搜索；构建完成后重放期间本进程的写操作，
+    再整体替换旧索引。
+    
+    Args:
+        db: 数据库会话，应连接主库
+        
+    Returns:
+        Dict[str, Dict[str, Any]]: 各索引的统计信息
+    """
+    global _rebuild_journal
+    async with _rebuild_lock:
+        journal = {namespace: [] for namespace in SEARCH_FIELDS}
+        _rebuild_journal = journal
+        try:
+            rebuilt: Dict[str, NGramIndex] = {}
+            for namespace, (model, fields) in SEARCH_FIELDS.items():
+                index = NGramIndex()
+                columns = [model.id] + [getattr(model, field) for field in fields]
+                result = await db.stream(
+                    select(*columns)
+                    .where(model.is_deleted == False)
+                    .execution_options(yield_per=10000)
+                )
+                async for row in result:
+                    index.add(row[0], row[1:])
+                rebuilt[namespace] = index
+            
+            # 以下到替换完成之间没有 await，写操作不会插入其中
+            for namespace, index in rebuilt.items():
+                for entity_id, values in journal[namespace]:
+                    if values is None:
+                        index.remove(entity_id)
+                    else:
+                        index.add(entity_id, values)
+                index.ready = True
+            search_indexes.update(rebuilt)
+        finally:
+            _rebuild_journal = None
+    return search_index_stats()
+
+
+async def run_periodic_rebuild(session_factory, interval: float) -> None:
+    """
+    定期全量重建搜索索引，同步绕过服务层的写操作
+    
+    Args:
+        session_factory: 会话工厂，使用主库会话
+        interval: 重建间隔（秒）
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with session_factory() as db:
+                await rebuild_search_indexes(db)
+        except Exception as e:
+            logger.warning(f"搜索索引重建失败: {e}")
+
+
+def search_index_stats() -> Dict[str, Dict[str, Any]]:
+    """获取所有搜索索引的统计信息"""
+    return {namespace: index.stats() for namespace, index in search_indexes.items()}
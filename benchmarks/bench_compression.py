@@ -0,0 +1,60 @@
+"""
+响应压缩基准（user-023）
+
+对 N 个菜单的菜单树响应体比较传输字节数和每次请求的压缩 CPU 耗时：
+- identity：不压缩；
+- gzip / br：每次请求实时压缩（CompressionMiddleware 的等级）；
+- gzip / br 预压缩：CompressedPayload 每种编码只压缩一次（较高等级），之后直接复用。
+
+运行：python -m benchmarks.bench_compression --menus 2000
+"""
+import argparse
+import asyncio
+import time
+from app.services.menu_service import MenuService
+from app.utils.compression import SUPPORTED_ENCODINGS, CompressedPayload, compress_body
+from app.utils.database import AsyncSessionLocal
+from benchmarks.common import print_table, seed_menus, temp_database, timeit
+
+
+async def main(args: argparse.Namespace) -> None:
+    async with temp_database() as engine:
+        await seed_menus(engine, args.menus)
+        async with AsyncSessionLocal() as db:
+            payload, _ = await MenuService.get_menu_tree_payload(db)
+    body = payload.body
+    
+    rows = [{"encoding": "identity", "mode": "", "bytes": len(body), "ratio": 1.0, "us_per_request": 0.0, "first_ms": 0.0}]
+    for encoding in SUPPORTED_ENCODINGS:
+        elapsed = min(timeit(lambda: compress_body(body, encoding), args.repeat))
+        compressed = compress_body(body, encoding)
+        rows.append({
+            "encoding": encoding,
+            "mode": "实时",
+            "bytes": len(compressed),
+            "ratio": len(body) / len(compressed),
+            "us_per_request": elapsed * 1e6,
+            "first_ms": elapsed * 1000,
+        })
+        
+        cached = CompressedPayload(body)
+        started = time.perf_counter()
+        compressed, _ = cached.encode(encoding)
+        first = time.perf_counter() - started
+        elapsed = min(timeit(lambda: cached.encode(encoding), args.repeat))
+        rows.append({
+            "encoding": encoding,
+            "mode": "预压缩",
+            "bytes": len(compressed),
+            "ratio": len(body) / len(compressed),
+            "us_per_request": elapsed * 1e6,
+            "first_ms": first * 1000,
+        })
+    print_table(f"{args.menus} 个菜单的菜单树响应（每次请求取 {args.repeat} 次最快，first_ms 为首次压缩耗时）", rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--menus", type=int, default=2000, help="菜单数")
+    parser.add_argument("--repeat", type=int, default=20, help="重复次数")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,70 @@
+"""
+响应模型输出基准（user-022）
+
+对已加载角色和菜单的用户对象生成 UserDetail 响应数据，比较：
+- validate+dump：UserDetail.model_validate(user).model_dump(mode="json")（改造前）；
+- to_dict：ORM 对象逐层 to_dict；
+- dump_model：pydantic 序列化器按响应模型直接序列化 ORM 对象（当前实现，不做校验）。
+
+运行：python -m benchmarks.bench_dump_model --users 1000
+"""
+import argparse
+import asyncio
+import random
+from typing import List
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+from app.models.user import Role, User
+from app.schemas.user import UserDetail
+from app.utils.database import AsyncSessionLocal
+from app.utils.response import dump_model
+from benchmarks.common import (
+    print_table, seed_menus, seed_role_menus, seed_role_users, seed_roles, seed_users, temp_database, timeit
+)
+
+
+def graph_to_dict(user) -> dict:
+    """逐层 to_dict"""
+    data = user.to_dict()
+    data["roles"] = [{**role.to_dict(), "menus": [menu.to_dict() for menu in role.menus]} for role in user.roles]
+    return data
+
+
+async def main(args: argparse.Namespace) -> None:
+    rng = random.Random(42)
+    async with temp_database() as engine:
+        await seed_users(engine, args.users)
+        await seed_roles(engine, 20)
+        await seed_menus(engine, 200)
+        await seed_role_users(engine, (
+            (user_id, role_id) for user_id in range(1, args.users + 1) for role_id in rng.sample(range(1, 21), 2)
+        ))
+        await seed_role_menus(engine, (
+            (role_id, menu_id) for role_id in range(1, 21) for menu_id in rng.sample(range(1, 201), args.menus_per_role)
+        ))
+        async with AsyncSessionLocal() as db:
+            users = (await db.execute(
+                select(User).options(selectinload(User.roles).selectinload(Role.menus)).order_by(User.id)
+            )).scalars().all()
+    
+    # 输出一致性校验
+    assert dump_model(UserDetail, users[0]) == UserDetail.model_validate(users[0]).model_dump(mode="json")
+    
+    cases = (
+        ("validate+dump", lambda: [UserDetail.model_validate(user).model_dump(mode="json") for user in users]),
+        ("to_dict", lambda: [graph_to_dict(user) for user in users]),
+        ("dump_model", lambda: dump_model(List[UserDetail], users)),
+    )
+    rows = []
+    for name, func in cases:
+        elapsed = min(timeit(func, args.repeat))
+        rows.append({"method": name, "total_ms": elapsed * 1000, "us_per_user": elapsed / len(users) * 1e6})
+    print_table(f"{len(users)} 个用户，每个用户 2 个角色，每个角色 {args.menus_per_role} 个菜单（取 {args.repeat} 次最快）", rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1000, help="用户数")
+    parser.add_argument("--menus-per-role", type=int, default=20, help="每个角色的菜单数")
+    parser.add_argument("--repeat", type=int, default=3, help="重复轮数")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,68 @@
+"""
+流式导出基准（user-016）
+
+导出 N 个用户时比较耗时和 Python 内存分配峰值（tracemalloc）：
+- list：一次查出全部 ORM 对象并在内存中拼出完整响应体（改造前的做法）；
+- stream：export_rows 通过服务端游标逐批读取并分块输出（当前实现）。
+
+运行：python -m benchmarks.bench_export --users 100000
+"""
+import argparse
+import asyncio
+import json
+import time
+import tracemalloc
+from sqlalchemy import select
+from app.models.user import User
+from app.utils.database import AsyncSessionLocal
+from app.utils.export import EXPORT_FIELDS, export_rows
+from app.utils.response import json_default
+from benchmarks.common import print_table, seed_users, temp_database
+
+
+async def export_list() -> int:
+    """一次性加载全部用户后序列化，输出字段与流式导出相同"""
+    _, fields = EXPORT_FIELDS["users"]
+    async with AsyncSessionLocal() as db:
+        users = (await db.execute(select(User).where(User.is_deleted == False).order_by(User.id))).scalars().all()
+        body = "".join(
+            json.dumps({field: getattr(user, field) for field in fields}, ensure_ascii=False, default=json_default) + "\n"
+            for user in users
+        ).encode("utf-8")
+    return len(body)
+
+
+async def export_stream() -> int:
+    """逐块消费流式导出"""
+    size = 0
+    async for chunk in export_rows("users", "ndjson"):
+        size += len(chunk)
+    return size
+
+
+async def main(args: argparse.Namespace) -> None:
+    async with temp_database() as engine:
+        await seed_users(engine, args.users)
+        
+        rows = []
+        for mode, export in (("list", export_list), ("stream", export_stream)):
+            tracemalloc.start()
+            started = time.perf_counter()
+            size = await export()
+            elapsed = time.perf_counter() - started
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            rows.append({
+                "mode": mode,
+                "seconds": elapsed,
+                "rows_per_sec": args.users / elapsed,
+                "body_mb": size / 1024 / 1024,
+                "peak_alloc_mb": peak / 1024 / 1024,
+            })
+        print_table(f"导出 {args.users} 个用户（ndjson，开启 tracemalloc 后耗时偏高）", rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=100000, help="用户数")
+    asyncio.run(main(parser.parse_args()))
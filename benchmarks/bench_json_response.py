@@ -0,0 +1,77 @@
+"""
+JSON 响应序列化基准（user-021）
+
+一页 N 条用户数据（含日期时间和角色摘要）生成响应体的耗时：
+- jsonable_encoder：路由返回 dict 时 FastAPI 先 jsonable_encoder 再 json.dumps（改造前）；
+- ApiJSONResponse (json)：跳过 jsonable_encoder，标准库 json 一次编码；
+- ApiJSONResponse (orjson)：跳过 jsonable_encoder，orjson 一次编码（当前实现，安装了 orjson 时）。
+
+运行：python -m benchmarks.bench_json_response --rows 100 --iterations 500
+"""
+import argparse
+from datetime import datetime, timedelta
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from app.utils import response as response_module
+from app.utils.response import ApiJSONResponse, ResponseUtil
+from benchmarks.common import print_table, timeit
+
+
+def make_page(rows: int):
+    """构造与用户列表接口结构相同的分页响应"""
+    now = datetime(2026, 1, 1, 12, 0, 0)
+    items = [
+        {
+            "id": i, "username": f"user{i}", "email": f"user{i}@example.com", "phone": None,
+            "real_name": f"测试用户{i}", "avatar": None, "is_active": True, "is_superuser": False,
+            "created_at": now - timedelta(days=i), "updated_at": now, "is_deleted": False,
+            "roles": [
+                {"id": role_id, "name": f"角色{role_id}", "code": f"role{role_id}", "description": None, "is_active": True}
+                for role_id in (1, 2)
+            ],
+        }
+        for i in range(1, rows + 1)
+    ]
+    return ResponseUtil.paginated_response(items, 1, rows, rows * 100, "查询成功")
+
+
+def main(args) -> None:
+    page = make_page(args.rows)
+    orjson = response_module.orjson
+    
+    def with_jsonable_encoder() -> bytes:
+        return JSONResponse(jsonable_encoder(page.to_dict())).body
+    
+    def with_api_response() -> bytes:
+        return ApiJSONResponse(page).body
+    
+    def with_stdlib() -> bytes:
+        response_module.orjson = None
+        try:
+            return ApiJSONResponse(page).body
+        finally:
+            response_module.orjson = orjson
+    
+    cases = [("jsonable_encoder + json", with_jsonable_encoder), ("ApiJSONResponse (json)", with_stdlib)]
+    if orjson is not None:
+        cases.append(("ApiJSONResponse (orjson)", with_api_response))
+    
+    rows = []
+    for name, func in cases:
+        body = func()
+        elapsed = min(timeit(lambda: [func() for _ in range(args.iterations)], args.repeat))
+        rows.append({
+            "renderer": name,
+            "us_per_response": elapsed / args.iterations * 1e6,
+            "responses_per_sec": args.iterations / elapsed,
+            "body_bytes": len(body),
+        })
+    print_table(f"{args.rows} 行的分页响应 x{args.iterations}（取 {args.repeat} 次最快）", rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100, help="每页行数")
+    parser.add_argument("--iterations", type=int, default=500, help="每轮生成响应的次数")
+    parser.add_argument("--repeat", type=int, default=3, help="重复轮数")
+    main(parser.parse_args())
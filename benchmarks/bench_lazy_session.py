@@ -0,0 +1,90 @@
+"""
+请求级会话连接占用基准（user-013）
+
+混合流量下统计连接池取出连接的次数，比较：
+- eager：依赖解析时立即为会话取出连接（对照组）；
+- lazy：当前的 get_db，会话在首条语句执行时才取出连接。
+请求类型：
+- 401：未携带令牌，被 get_current_user 直接拒绝；
+- 缓存命中：令牌、用户身份和菜单树都已缓存的 GET /api/menus/tree；
+- 查库：GET /api/users/me，每次查询用户表。
+
+运行：python -m benchmarks.bench_lazy_session --requests 2000 --concurrency 50
+"""
+import argparse
+import asyncio
+from app.utils import database
+from app.utils.database import get_db
+from benchmarks.bench_token_cache import make_token
+from benchmarks.common import api_client, app, print_table, run_concurrently, seed_users, temp_database
+
+
+async def eager_get_db():
+    """对照组：创建会话后立即取出连接，直到请求结束才归还"""
+    async with database.AsyncRoutingSessionLocal() as session:
+        await session.connection()
+        yield session
+
+
+async def main(args: argparse.Namespace) -> None:
+    async with temp_database() as engine:
+        await seed_users(engine, 10)
+        headers = {"Authorization": f"Bearer {make_token(1)}"}
+        pool = engine.sync_engine.pool
+        
+        rows = []
+        try:
+            async with api_client() as client:
+                async def unauthorized() -> None:
+                    response = await client.get("/api/users/me")
+                    assert response.status_code == 401
+                
+                async def cached_tree() -> None:
+                    response = await client.get("/api/menus/tree", headers=headers)
+                    assert response.status_code == 200
+                
+                async def current_user() -> None:
+                    response = await client.get("/api/users/me", headers=headers)
+                    assert response.status_code == 200
+                
+                requests = (unauthorized, cached_tree, current_user)
+                
+                async def mixed() -> None:
+                    nonlocal turn
+                    turn += 1
+                    await requests[turn % len(requests)]()
+                
+                for mode in ("eager", "lazy"):
+                    if mode == "eager":
+                        app.dependency_overrides[get_db] = eager_get_db
+                    else:
+                        app.dependency_overrides.pop(get_db, None)
+                    for name, request in (
+                        ("401", unauthorized),
+                        ("menus/tree 缓存命中", cached_tree),
+                        ("users/me 查库", current_user),
+                        ("混合（各占1/3）", mixed),
+                    ):
+                        turn = 0
+                        # 预热缓存
+                        for _ in requests:
+                            await request()
+                        checkouts = pool.checkout_count
+                        result = await run_concurrently(request, args.requests, args.concurrency)
+                        rows.append({
+                            "get_db": mode,
+                            "request": name,
+                            "ops_per_sec": result["ops_per_sec"],
+                            "p99_ms": result["p99_ms"],
+                            "checkouts": pool.checkout_count - checkouts,
+                        })
+        finally:
+            app.dependency_overrides.pop(get_db, None)
+        print_table(f"{args.requests} 个请求，并发 {args.concurrency}", rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000, help="每种请求的总数")
+    parser.add_argument("--concurrency", type=int, default=50, help="并发数")
+    asyncio.run(main(parser.parse_args()))
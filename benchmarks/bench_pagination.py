@@ -0,0 +1,47 @@
+"""
+游标分页基准（user-007）
+
+在 N 个用户上比较第一页与深分页的查询耗时：
+- offset：页码分页，深分页需要数据库跳过前面的所有行；
+- cursor：按用户ID游标分页，任意位置都只读取一页。
+
+运行：python -m benchmarks.bench_pagination --users 100000 --per-page 20
+"""
+import argparse
+import asyncio
+from app.services.user_service import UserService
+from app.utils.database import AsyncSessionLocal
+from app.utils.pagination import encode_cursor
+from benchmarks.common import atimeit, print_table, seed_users, summarize, temp_database
+
+
+async def main(args: argparse.Namespace) -> None:
+    last_page = args.users // args.per_page
+    async with temp_database() as engine:
+        await seed_users(engine, args.users)
+        
+        cases = (
+            ("offset", "第1页", {"page": 1}),
+            ("cursor", "第1页", {"cursor": encode_cursor([0])}),
+            ("offset", f"第{last_page}页", {"page": last_page}),
+            ("cursor", f"第{last_page}页", {"cursor": encode_cursor([(last_page - 1) * args.per_page])}),
+        )
+        rows = []
+        async with AsyncSessionLocal() as db:
+            for mode, position, params in cases:
+                async def fetch() -> dict:
+                    return await UserService.get_users_paginated(
+                        db, per_page=args.per_page, include_total=False, **params
+                    )
+                first = (await fetch())["items"]
+                samples = await atimeit(fetch, args.repeat)
+                rows.append({"mode": mode, "page": position, "first_id": first[0]["id"], **summarize(samples)})
+        print_table(f"{args.users} 个用户，每页 {args.per_page} 条，不统计总数", rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=100000, help="用户数")
+    parser.add_argument("--per-page", type=int, default=20, help="每页数量")
+    parser.add_argument("--repeat", type=int, default=50, help="每种情况的查询次数")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,91 @@
+"""
+密码哈希执行器基准（user-002）
+
+登录请求持续涌入时测量 GET /health 的延迟：
+- inline：在事件循环中直接计算 bcrypt（改造前的做法），期间所有请求都被阻塞；
+- executor：通过 async_verify_password 在执行器中计算（当前实现）。
+
+运行：python -m benchmarks.bench_password_executor --logins 64 --login-concurrency 16
+"""
+import argparse
+import asyncio
+import time
+from app.services import user_service
+from app.utils.auth import shutdown_password_executor, verify_password
+from benchmarks.common import PASSWORD, api_client, print_table, seed_users, summarize, temp_database
+from config import config
+
+
+async def inline_verify_password(plain_password: str, hashed_password: str) -> bool:
+    """在事件循环中同步校验密码"""
+    return verify_password(plain_password, hashed_password)
+
+
+async def storm(client, args: argparse.Namespace) -> dict:
+    """并发登录的同时按固定间隔请求 /health，返回 /health 延迟统计"""
+    logins = args.logins
+    login_status = {}
+    
+    async def login_worker() -> None:
+        nonlocal logins
+        while logins > 0:
+            logins -= 1
+            response = await client.post(
+                "/api/users/login",
+                json={"username": f"user{logins % args.users + 1}", "password": PASSWORD}
+            )
+            login_status[response.status_code] = login_status.get(response.status_code, 0) + 1
+    
+    samples = []
+    done = asyncio.Event()
+    
+    async def probe() -> None:
+        while not done.is_set():
+            started = time.perf_counter()
+            response = await client.get("/health")
+            assert response.status_code == 200
+            samples.append(time.perf_counter() - started)
+            await asyncio.sleep(args.probe_interval)
+    
+    probe_task = asyncio.create_task(probe())
+    started = time.perf_counter()
+    await asyncio.gather(*[login_worker() for _ in range(args.login_concurrency)])
+    elapsed = time.perf_counter() - started
+    done.set()
+    await probe_task
+    return {
+        "logins_per_sec": args.logins / elapsed,
+        "login_status": ",".join(f"{code}:{count}" for code, count in sorted(login_status.items())),
+        **{f"health_{key}": value for key, value in summarize(samples).items()},
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    # 压测时不希望因排队上限拒绝登录
+    config.PASSWORD_HASH_QUEUE_LIMIT = max(config.PASSWORD_HASH_QUEUE_LIMIT, args.login_concurrency)
+    
+    async with temp_database() as engine:
+        await seed_users(engine, args.users)
+        rows = []
+        async with api_client() as client:
+            executor_verify = user_service.async_verify_password
+            for mode, verify in (("inline", inline_verify_password), ("executor", executor_verify)):
+                user_service.async_verify_password = verify
+                try:
+                    rows.append({"mode": mode, **await storm(client, args)})
+                finally:
+                    user_service.async_verify_password = executor_verify
+        shutdown_password_executor()
+        print_table(
+            f"{args.logins} 次登录（并发 {args.login_concurrency}，执行器线程 {config.PASSWORD_HASH_MAX_WORKERS}）期间的 /health 延迟",
+            rows
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=50, help="用户数")
+    parser.add_argument("--logins", type=int, default=64, help="登录请求总数")
+    parser.add_argument("--login-concurrency", type=int, default=16, help="登录并发数")
+    parser.add_argument("--probe-interval", type=float, default=0.005, help="/health 探测间隔（秒）")
+    asyncio.run(main(parser.parse_args()))
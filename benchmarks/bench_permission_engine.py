@@ -0,0 +1,106 @@
+"""
+菜单权限位图基准（user-004）
+
+在 N 个菜单、M 个角色的数据上测量：
+1. PermissionEngine 从数据库全量编译位图的耗时；
+2. has_permission / user_mask 的每秒调用次数，对比按角色保存菜单ID集合的做法。
+
+运行：python -m benchmarks.bench_permission_engine --menus 10000 --roles 1000
+"""
+import argparse
+import asyncio
+import random
+import time
+from typing import Dict, List, Set
+from app.services.permission_engine import PermissionEngine
+from app.utils.database import AsyncSessionLocal
+from benchmarks.common import print_table, seed_menus, seed_role_menus, seed_roles, summarize, temp_database, timeit
+
+
+def set_has_permission(role_menus: Dict[int, Set[int]], role_ids: List[int], menu_id: int) -> bool:
+    """集合做法：逐个角色检查菜单ID"""
+    return any(menu_id in role_menus.get(role_id, ()) for role_id in role_ids)
+
+
+def set_user_menus(role_menus: Dict[int, Set[int]], role_ids: List[int]) -> Set[int]:
+    """集合做法：合并用户各角色的菜单ID"""
+    menus: Set[int] = set()
+    for role_id in role_ids:
+        menus |= role_menus.get(role_id, set())
+    return menus
+
+
+async def main(args: argparse.Namespace) -> None:
+    rng = random.Random(args.seed)
+    role_menus: Dict[int, Set[int]] = {
+        role_id: set(rng.sample(range(1, args.menus + 1), args.menus_per_role))
+        for role_id in range(1, args.roles + 1)
+    }
+    
+    async with temp_database() as engine:
+        await seed_menus(engine, args.menus)
+        await seed_roles(engine, args.roles)
+        await seed_role_menus(engine, ((role_id, menu_id) for role_id, menus in role_menus.items() for menu_id in menus))
+        
+        engine_instance = PermissionEngine(ttl=0)
+        compile_samples = []
+        for _ in range(args.compile_repeat):
+            engine_instance.invalidate()
+            async with AsyncSessionLocal() as db:
+                started = time.perf_counter()
+                await engine_instance.load(db)
+                compile_samples.append(time.perf_counter() - started)
+    print_table(
+        f"全量编译：{args.menus} 个菜单，{args.roles} 个角色，{args.roles * args.menus_per_role} 条关联",
+        [{"step": "PermissionEngine.load", **summarize(compile_samples)}]
+    )
+    
+    # 每个用户拥有 roles_per_user 个角色，随机检查菜单
+    checks = [
+        (rng.sample(range(1, args.roles + 1), args.roles_per_user), rng.randint(1, args.menus))
+        for _ in range(args.checks)
+    ]
+    
+    def bitmap_checks() -> None:
+        for role_ids, menu_id in checks:
+            engine_instance.has_permission(role_ids, menu_id)
+    
+    def set_checks() -> None:
+        for role_ids, menu_id in checks:
+            set_has_permission(role_menus, role_ids, menu_id)
+    
+    def bitmap_menus() -> None:
+        for role_ids, _ in checks:
+            engine_instance.user_mask(role_ids)
+    
+    def set_menus() -> None:
+        for role_ids, _ in checks:
+            set_user_menus(role_menus, role_ids)
+    
+    # 结果一致性校验
+    for role_ids, menu_id in checks[:1000]:
+        assert engine_instance.has_permission(role_ids, menu_id) == set_has_permission(role_menus, role_ids, menu_id)
+    
+    rows = []
+    for name, func in (
+        ("has_permission 位图", bitmap_checks),
+        ("has_permission 集合", set_checks),
+        ("用户菜单 位图 user_mask", bitmap_menus),
+        ("用户菜单 集合合并", set_menus),
+    ):
+        elapsed = min(timeit(func, args.repeat))
+        rows.append({"operation": name, "ops_per_sec": len(checks) / elapsed, "us_per_op": elapsed / len(checks) * 1e6})
+    print_table(f"{args.checks} 次检查，每个用户 {args.roles_per_user} 个角色（取 {args.repeat} 次最快）", rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--menus", type=int, default=10000, help="菜单数")
+    parser.add_argument("--roles", type=int, default=1000, help="角色数")
+    parser.add_argument("--menus-per-role", type=int, default=100, help="每个角色分配的菜单数")
+    parser.add_argument("--roles-per-user", type=int, default=3, help="每个用户的角色数")
+    parser.add_argument("--checks", type=int, default=100000, help="权限检查次数")
+    parser.add_argument("--compile-repeat", type=int, default=3, help="全量编译次数")
+    parser.add_argument("--repeat", type=int, default=3, help="权限检查重复轮数")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子")
+    asyncio.run(main(parser.parse_args()))
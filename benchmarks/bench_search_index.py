@@ -0,0 +1,67 @@
+"""
+n-gram 搜索索引基准（user-009）
+
+在 N 个用户上比较搜索接口的查询耗时：
+- ilike：SEARCH_INDEX_ENABLED 关闭，username/email/real_name 做 ilike('%关键词%') 全表扫描；
+- index：先由进程内索引得到候选ID，再按主键回表校验。
+同时输出全量重建耗时和索引的内存占用估算。
+
+运行：python -m benchmarks.bench_search_index --users 100000
+      python -m benchmarks.bench_search_index --users 1000000
+"""
+import argparse
+import asyncio
+import time
+from app.services.user_service import UserService
+from app.utils.database import AsyncSessionLocal
+from app.utils.pagination import total_cache
+from app.utils.search_index import rebuild_search_indexes, search_indexes
+from benchmarks.common import atimeit, print_table, seed_users, summarize, temp_database
+from config import config
+
+
+async def main(args: argparse.Namespace) -> None:
+    # 命中1条、命中约 1/1000、不命中
+    terms = (f"user{args.users // 2}@", f"user{args.users // 1000}", "nobody")
+    
+    async with temp_database() as engine:
+        started = time.perf_counter()
+        await seed_users(engine, args.users)
+        print(f"写入 {args.users} 个用户: {time.perf_counter() - started:.1f}s")
+        
+        async with AsyncSessionLocal() as db:
+            started = time.perf_counter()
+            await rebuild_search_indexes(db)
+            rebuild_seconds = time.perf_counter() - started
+        stats = search_indexes["users"].stats()
+        print_table("用户索引", [{
+            "rebuild_s": rebuild_seconds,
+            "documents": stats["documents"],
+            "grams": stats["grams"],
+            "postings": stats["postings"],
+            "memory_mb": stats["memory_bytes"] / 1024 / 1024,
+        }])
+        
+        rows = []
+        async with AsyncSessionLocal() as db:
+            for term in terms:
+                for mode, enabled in (("ilike", False), ("index", True)):
+                    config.SEARCH_INDEX_ENABLED = enabled
+                    
+                    async def search() -> dict:
+                        # 每次都重新统计总数，与未命中总数缓存的请求一致
+                        total_cache.invalidate("users")
+                        return await UserService.get_users_paginated(db, per_page=args.per_page, search=term)
+                    
+                    total = (await search())["total"]
+                    samples = await atimeit(search, args.repeat)
+                    rows.append({"term": term, "mode": mode, "total": total, **summarize(samples)})
+        print_table(f"{args.users} 个用户，搜索第1页（含总数统计）", rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=100000, help="用户数")
+    parser.add_argument("--per-page", type=int, default=20, help="每页数量")
+    parser.add_argument("--repeat", type=int, default=10, help="每个关键词的查询次数")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,73 @@
+"""
+模型序列化基准（user-020）
+
+对 N 个已加载的用户对象比较序列化耗时：
+- reflective：每行遍历 __table__.columns 逐列 getattr，再转换日期时间（改造前的 to_dict）；
+- compiled：get_serializer 按模型预先生成的序列化函数（当前的 to_dict）。
+另外比较附带角色关联（include_relationships=["roles"]）时的耗时。
+
+运行：python -m benchmarks.bench_serializers --users 10000
+"""
+import argparse
+import asyncio
+import random
+from datetime import date, datetime
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+from app.models.base import get_serializer
+from app.models.user import User
+from app.utils.database import AsyncSessionLocal
+from benchmarks.common import print_table, seed_role_users, seed_roles, seed_users, temp_database, timeit
+
+
+def reflective_to_dict(obj, include_relationships=None) -> dict:
+    """改造前的 to_dict：逐列反射取值，再单独转换日期时间"""
+    result = {column.name: getattr(obj, column.name) for column in obj.__table__.columns}
+    for key, value in result.items():
+        if isinstance(value, (datetime, date)):
+            result[key] = value.isoformat()
+    for name in include_relationships or ():
+        value = getattr(obj, name)
+        if value is not None:
+            result[name] = [reflective_to_dict(item) for item in value] if isinstance(value, list) else reflective_to_dict(value)
+    return result
+
+
+async def main(args: argparse.Namespace) -> None:
+    rng = random.Random(42)
+    async with temp_database() as engine:
+        await seed_users(engine, args.users)
+        await seed_roles(engine, 20)
+        await seed_role_users(engine, (
+            (user_id, role_id) for user_id in range(1, args.users + 1) for role_id in rng.sample(range(1, 21), 2)
+        ))
+        async with AsyncSessionLocal() as db:
+            users = (await db.execute(
+                select(User).options(selectinload(User.roles)).order_by(User.id)
+            )).scalars().all()
+    
+    compiled = get_serializer(User, exclude=User.__serialize_exclude__)
+    compiled_with_roles = get_serializer(User, ("roles",), User.__serialize_exclude__)
+    # 输出一致性校验（改造前的实现在反射取值后再去掉密码）
+    expected = reflective_to_dict(users[0])
+    expected.pop("hashed_password")
+    assert expected == compiled(users[0]) == users[0].to_dict()
+    
+    cases = (
+        ("reflective", lambda: [reflective_to_dict(user) for user in users]),
+        ("compiled", lambda: [compiled(user) for user in users]),
+        ("reflective + roles", lambda: [reflective_to_dict(user, ["roles"]) for user in users]),
+        ("compiled + roles", lambda: [compiled_with_roles(user) for user in users]),
+    )
+    rows = []
+    for name, func in cases:
+        elapsed = min(timeit(func, args.repeat))
+        rows.append({"serializer": name, "total_ms": elapsed * 1000, "us_per_row": elapsed / len(users) * 1e6})
+    print_table(f"序列化 {len(users)} 个用户（取 {args.repeat} 次最快）", rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=10000, help="用户数")
+    parser.add_argument("--repeat", type=int, default=5, help="重复轮数")
+    asyncio.run(main(parser.parse_args()))
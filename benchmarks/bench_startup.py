@@ -0,0 +1,58 @@
+"""
+启动耗时基准（user-014）
+
+1. 在子进程中测量 import main 的耗时（包含路由、模型和配置的加载）；
+2. 在已建表的库上比较启动时的表结构处理：init_db（create_all，改造前每次启动执行）
+   与 check_schema_version（当前实现，只查询一次 alembic_version）。
+
+运行：python -m benchmarks.bench_startup --imports 5 --repeat 20
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+from sqlalchemy import text
+from app.utils.database import check_schema_version, get_schema_heads, init_db
+from benchmarks.common import atimeit, print_table, summarize, temp_database
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 子进程中只计时 import main 本身，不含解释器启动
+IMPORT_SNIPPET = "import time; started = time.perf_counter(); import main; print(time.perf_counter() - started)"
+
+
+def measure_import(count: int) -> list:
+    """启动 count 个子进程，返回每次 import main 的耗时（秒）"""
+    samples = []
+    for _ in range(count):
+        output = subprocess.run(
+            [sys.executable, "-c", IMPORT_SNIPPET],
+            cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout
+        samples.append(float(output.strip().splitlines()[-1]))
+    return samples
+
+
+async def main(args: argparse.Namespace) -> None:
+    print_table(f"import main（{args.imports} 个子进程）", [{"step": "import main", **summarize(measure_import(args.imports))}])
+    
+    async with temp_database() as engine:
+        # 模拟已执行迁移的库：表已存在，版本表记录最新版本
+        async with engine.begin() as conn:
+            await conn.execute(text("CREATE TABLE alembic_version (version_num VARCHAR(32) NOT NULL PRIMARY KEY)"))
+            for head in get_schema_heads():
+                await conn.execute(text("INSERT INTO alembic_version (version_num) VALUES (:head)"), {"head": head})
+        
+        rows = []
+        for name, step in (("init_db (create_all)", init_db), ("check_schema_version", check_schema_version)):
+            await step()
+            rows.append({"step": name, **summarize(await atimeit(step, args.repeat))})
+        print_table(f"启动时的表结构处理（已建表的库，{args.repeat} 次）", rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--imports", type=int, default=5, help="import main 的子进程数")
+    parser.add_argument("--repeat", type=int, default=20, help="表结构处理的执行次数")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,65 @@
+"""
+令牌校验缓存基准（user-001）
+
+比较 TOKEN_CACHE_ENABLED 开启与关闭时：
+1. verify_token 单独调用的耗时；
+2. GET /api/users/me 的吞吐量（每秒请求数）和延迟。
+
+令牌带有额外的 kid 头，编码结果不以固定的 HS256 头开头，不会走 get_current_user 中的临时放行逻辑。
+
+运行：python -m benchmarks.bench_token_cache --requests 2000 --concurrency 20
+"""
+import argparse
+import asyncio
+from datetime import datetime, timedelta
+from jose import jwt
+from app.utils import auth
+from app.utils.auth import token_cache, verify_token
+from benchmarks.common import api_client, print_table, run_concurrently, seed_users, summarize, temp_database, timeit
+from config import config
+
+
+def make_token(user_id: int) -> str:
+    """生成带 kid 头的访问令牌（python-jose 要求 sub 为字符串）"""
+    payload = {"sub": str(user_id), "exp": datetime.utcnow() + timedelta(hours=1)}
+    return jwt.encode(payload, auth.JWT_SECRET_KEY, algorithm=auth.JWT_ALGORITHM, headers={"kid": "bench"})
+
+
+async def main(args: argparse.Namespace) -> None:
+    token = make_token(1)
+    
+    rows = []
+    for enabled in (False, True):
+        config.TOKEN_CACHE_ENABLED = enabled
+        token_cache.clear()
+        samples = timeit(lambda: verify_token(token), args.verify_iterations)
+        rows.append({"token_cache": enabled, **summarize(samples)})
+    print_table(f"verify_token x{args.verify_iterations}", rows)
+    
+    async with temp_database() as engine:
+        await seed_users(engine, args.users)
+        headers = {"Authorization": f"Bearer {token}"}
+        
+        rows = []
+        async with api_client() as client:
+            async def request() -> None:
+                response = await client.get("/api/users/me", headers=headers)
+                assert response.status_code == 200, response.text
+            
+            for enabled in (False, True):
+                config.TOKEN_CACHE_ENABLED = enabled
+                token_cache.clear()
+                # 预热：加载用户身份缓存等
+                await request()
+                result = await run_concurrently(request, args.requests, args.concurrency)
+                rows.append({"token_cache": enabled, **result})
+        print_table(f"GET /api/users/me x{args.requests}, 并发 {args.concurrency}", rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=100, help="用户数")
+    parser.add_argument("--requests", type=int, default=2000, help="请求总数")
+    parser.add_argument("--concurrency", type=int, default=20, help="并发数")
+    parser.add_argument("--verify-iterations", type=int, default=20000, help="verify_token 调用次数")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,107 @@
+"""
+用户列表查询基准（user-017）
+
+每页 N 个用户、每个用户若干角色、每个角色若干菜单，比较一页数据的耗时和 Python 内存分配峰值：
+- orm：selectinload(roles -> menus) 加载完整 ORM 对象图后逐层 to_dict（改造前的做法）；
+- projection：get_users_paginated 只查询需要的列，角色摘要批量查询（当前实现）；
+- projection+menus：同上，附带角色菜单（?include=menus）。
+
+运行：python -m benchmarks.bench_user_list --users 10000 --per-page 100
+"""
+import argparse
+import asyncio
+import random
+import time
+import tracemalloc
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+from app.models.user import Role, User
+from app.services.user_service import UserService
+from app.utils.database import AsyncSessionLocal
+from benchmarks.common import print_table, seed_menus, seed_role_menus, seed_role_users, seed_roles, seed_users, summarize, temp_database
+
+
+async def orm_page(db, per_page: int) -> list:
+    """加载完整对象图并序列化第一页"""
+    result = await db.execute(
+        select(User)
+        .options(selectinload(User.roles).selectinload(Role.menus))
+        .where(User.is_deleted == False)
+        .order_by(User.id)
+        .limit(per_page)
+    )
+    items = []
+    for user in result.scalars().all():
+        data = user.to_dict()
+        data["roles"] = [
+            {**role.to_dict(), "menus": [menu.to_dict() for menu in role.menus]}
+            for role in user.roles
+        ]
+        items.append(data)
+    return items
+
+
+async def main(args: argparse.Namespace) -> None:
+    rng = random.Random(args.seed)
+    async with temp_database() as engine:
+        await seed_users(engine, args.users)
+        await seed_roles(engine, args.roles)
+        await seed_menus(engine, args.menus)
+        await seed_role_users(engine, (
+            (user_id, role_id)
+            for user_id in range(1, args.users + 1)
+            for role_id in rng.sample(range(1, args.roles + 1), args.roles_per_user)
+        ))
+        await seed_role_menus(engine, (
+            (role_id, menu_id)
+            for role_id in range(1, args.roles + 1)
+            for menu_id in rng.sample(range(1, args.menus + 1), args.menus_per_role)
+        ))
+        
+        cases = (
+            ("orm", lambda db: orm_page(db, args.per_page)),
+            ("projection", lambda db: UserService.get_users_paginated(db, per_page=args.per_page, include_total=False)),
+            ("projection+menus", lambda db: UserService.get_users_paginated(
+                db, per_page=args.per_page, include_total=False, include_menus=True
+            )),
+        )
+        rows = []
+        for name, fetch in cases:
+            samples = []
+            for _ in range(args.repeat):
+                # 每次使用新会话，ORM 对象不会命中身份映射
+                async with AsyncSessionLocal() as db:
+                    started = time.perf_counter()
+                    await fetch(db)
+                    samples.append(time.perf_counter() - started)
+            
+            async with AsyncSessionLocal() as db:
+                tracemalloc.start()
+                await fetch(db)
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+            stats = summarize(samples)
+            rows.append({
+                "mode": name,
+                "mean_ms": stats["mean_ms"],
+                "p50_ms": stats["p50_ms"],
+                "p99_ms": stats["p99_ms"],
+                "peak_alloc_kb": peak / 1024,
+            })
+        print_table(
+            f"每页 {args.per_page} 个用户，每个用户 {args.roles_per_user} 个角色，每个角色 {args.menus_per_role} 个菜单",
+            rows
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=10000, help="用户数")
+    parser.add_argument("--roles", type=int, default=50, help="角色数")
+    parser.add_argument("--menus", type=int, default=500, help="菜单数")
+    parser.add_argument("--roles-per-user", type=int, default=3, help="每个用户的角色数")
+    parser.add_argument("--menus-per-role", type=int, default=20, help="每个角色的菜单数")
+    parser.add_argument("--per-page", type=int, default=100, help="每页数量")
+    parser.add_argument("--repeat", type=int, default=20, help="查询次数")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子")
+    asyncio.run(main(parser.parse_args()))
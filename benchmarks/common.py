@@ -0,0 +1,248 @@
+"""
+基准测试公共工具
+
+基准测试使用临时 SQLite 库（aiosqlite）：替换主库引擎后，接口和服务层都连接到该库，
+与 tests/conftest.py 的做法一致。SQLite 下的绝对耗时与 MySQL 不同，只用于比较同一
+环境中两种实现的相对差异。
+"""
+import asyncio
+import logging
+import math
+import os
+import statistics
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Sequence
+import httpx
+from sqlalchemy import insert
+from app.models.associations import role_menu_association, user_role_association
+from app.models.menu import Menu
+from app.models.user import Role, User
+from app.utils import database
+from app.utils.auth import get_password_hash
+from main import app
+
+# 批量写入测试数据时每批的行数
+SEED_BATCH_SIZE = 5000
+
+# 测试数据统一使用的明文密码
+PASSWORD = "secret123"
+
+
+def quiet_logging() -> None:
+    """只输出错误日志，避免逐请求的认证日志影响计时"""
+    logging.getLogger().setLevel(logging.ERROR)
+    logging.getLogger("sqlalchemy").setLevel(logging.WARNING)
+
+
+@asynccontextmanager
+async def temp_database():
+    """
+    创建建好表结构的临时 SQLite 库，并替换主库引擎
+    
+    引擎按应用的连接池配置创建（带连接池统计），退出时释放连接并删除库文件。
+    """
+    quiet_logging()
+    directory = tempfile.TemporaryDirectory(prefix="bench-")
+    engine = database._create_engine(f"sqlite+aiosqlite:///{os.path.join(directory.name, 'bench.db')}")
+    # DEBUG 配置下引擎会输出每条SQL
+    engine.sync_engine.echo = False
+    async with engine.begin() as conn:
+        await conn.run_sync(database.Base.metadata.create_all)
+    
+    original_engine = database.async_engine
+    original_bind = database.AsyncSessionLocal.kw.get("bind")
+    database.async_engine = engine
+    database.AsyncSessionLocal.kw["bind"] = engine
+    try:
+        yield engine
+    finally:
+        database.async_engine = original_engine
+        database.AsyncSessionLocal.kw["bind"] = original_bind
+        await engine.dispose()
+        directory.cleanup()
+
+
+async def insert_rows(engine, table, rows: Iterable[Dict[str, Any]]) -> int:
+    """
+    分批写入数据（Core executemany，不构建 ORM 对象）
+    
+    Returns:
+        int: 写入的行数
+    """
+    count = 0
+    batch: List[Dict[str, Any]] = []
+    async with engine.begin() as conn:
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= SEED_BATCH_SIZE:
+                await conn.execute(insert(table), batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            await conn.execute(insert(table), batch)
+            count += len(batch)
+    return count
+
+
+async def seed_users(engine, count: int, start: int = 1) -> int:
+    """
+    写入 count 个用户，用户名为 user{序号}，所有用户的密码均为 PASSWORD
+    
+    Returns:
+        int: 写入的行数
+    """
+    password_hash = get_password_hash(PASSWORD)
+    rows = (
+        {
+            "username": f"user{i}",
+            "email": f"user{i}@example.com",
+            "real_name": f"测试用户{i}",
+            "hashed_password": password_hash,
+            "is_active": True,
+            "is_superuser": i == start,
+            "is_deleted": False,
+        }
+        for i in range(start, start + count)
+    )
+    return await insert_rows(engine, User.__table__, rows)
+
+
+async def seed_roles(engine, count: int) -> int:
+    """写入 count 个启用的角色"""
+    rows = (
+        {"name": f"role{i}", "code": f"role{i}", "is_active": True, "is_deleted": False}
+        for i in range(1, count + 1)
+    )
+    return await insert_rows(engine, Role.__table__, rows)
+
+
+async def seed_menus(engine, count: int, fanout: int = 10) -> int:
+    """
+    写入 count 个启用的菜单，按 fanout 组成多级树（前 fanout 个为顶级菜单）
+    """
+    rows = (
+        {
+            "name": f"menu{i}",
+            "path": f"/menu{i}",
+            "component": f"views/menu{i}/index",
+            "icon": "el-icon-menu",
+            "order_num": i % 100,
+            "parent_id": (i - 1) // fanout if i > fanout else None,
+            "menu_type": "menu",
+            "permission": f"menu:{i}:view",
+            "is_visible": True,
+            "is_active": True,
+            "is_deleted": False,
+        }
+        for i in range(1, count + 1)
+    )
+    return await insert_rows(engine, Menu.__table__, rows)
+
+
+async def seed_links(engine, table, pairs: Iterable[Sequence[int]]) -> int:
+    """写入关联表，pairs 为 (左ID, 右ID)"""
+    left, right = [column.name for column in table.columns]
+    return await insert_rows(engine, table, ({left: a, right: b} for a, b in pairs))
+
+
+async def seed_role_users(engine, pairs: Iterable[Sequence[int]]) -> int:
+    """写入 (用户ID, 角色ID) 关联"""
+    return await seed_links(engine, user_role_association, pairs)
+
+
+async def seed_role_menus(engine, pairs: Iterable[Sequence[int]]) -> int:
+    """写入 (角色ID, 菜单ID) 关联"""
+    return await seed_links(engine, role_menu_association, pairs)
+
+
+def api_client() -> httpx.AsyncClient:
+    """直接调用 ASGI 应用的客户端，不经过网络"""
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+
+
+def percentile(values: Sequence[float], p: float) -> float:
+    """第 p 百分位数（最近秩法），values 为空时返回0"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered), max(1, math.ceil(p / 100 * len(ordered)))) - 1
+    return ordered[index]
+
+
+def summarize(samples: Sequence[float]) -> Dict[str, float]:
+    """耗时样本（秒）的统计，结果单位为毫秒"""
+    return {
+        "n": len(samples),
+        "mean_ms": statistics.fmean(samples) * 1000 if samples else 0.0,
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p99_ms": percentile(samples, 99) * 1000,
+        "max_ms": max(samples) * 1000 if samples else 0.0,
+    }
+
+
+def timeit(func: Callable[[], Any], repeat: int) -> List[float]:
+    """同步函数执行 repeat 次，返回每次的耗时（秒）"""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+async def atimeit(func: Callable[[], Awaitable[Any]], repeat: int) -> List[float]:
+    """异步函数执行 repeat 次，返回每次的耗时（秒）"""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await func()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+async def run_concurrently(func: Callable[[], Awaitable[Any]], total: int, concurrency: int) -> Dict[str, float]:
+    """
+    以 concurrency 个并发协程共执行 total 次 func
+    
+    Returns:
+        Dict[str, float]: 每秒执行次数及单次耗时统计
+    """
+    samples: List[float] = []
+    remaining = total
+    
+    async def worker() -> None:
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            await func()
+            samples.append(time.perf_counter() - started)
+    
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - started
+    return {"ops_per_sec": total / elapsed if elapsed else 0.0, **summarize(samples)}
+
+
+def print_table(title: str, rows: List[Dict[str, Any]]) -> None:
+    """按列对齐输出结果表"""
+    print(f"\n== {title} ==")
+    if not rows:
+        return
+    columns = list(rows[0])
+    cells = [[_format(row.get(column)) for column in columns] for row in rows]
+    widths = [max(len(column), *(len(line[i]) for line in cells)) for i, column in enumerate(columns)]
+    print("  ".join(column.ljust(widths[i]) for i, column in enumerate(columns)))
+    for line in cells:
+        print("  ".join(value.ljust(widths[i]) for i, value in enumerate(line)))
+
+
+def _format(value: Any) -> str:
+    if isinstance(value, float):
+        return f"{value:,.3f}" if abs(value) < 1000 else f"{value:,.0f}"
+    if isinstance(value, int) and not isinstance(value, bool):
+        return f"{value:,}"
+    return "" if value is None else str(value)
+
@@ -26,18 +26,115 @@ class Config:
     # 数据库URL
     DATABASE_URL = f"mysql+aiomysql://{MYSQL_USER}:{MYSQL_PASSWORD}@{MYSQL_HOST}:{MYSQL_PORT}/{MYSQL_DB}"
     
+    # 只读副本URL，为空时所有请求都走主库
+    DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL", "")
+    # 用户写入后在该时间窗口（秒）内的读请求仍走主库，应大于副本的复制延迟。
+    # 窗口记录在各 worker 进程内，多进程部署时需按用户粘性路由，否则其他进程上的读请求不受保护
+    READ_YOUR_WRITES_WINDOW = float(os.getenv("READ_YOUR_WRITES_WINDOW", 5))
+    
+    # 启动时的表结构版本检查：strict 不一致时启动失败，warn 只记录告警，off 跳过
+    DB_SCHEMA_CHECK = os.getenv("DB_SCHEMA_CHECK", "strict")
+    
+    # 数据库连接池配置
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+    # 获取连接的最长等待时间（秒）
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+    # 每次取出连接前探活，会多一次往返
+    DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "True").lower() == "true"
+    # 连接最长复用时间（秒），应小于MySQL的 wait_timeout
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 300))
+    
+    # 请求级SQL统计：输出 Server-Timing 响应头和结构化日志
+    SQL_METRICS_ENABLED = os.getenv("SQL_METRICS_ENABLED", "True").lower() == "true"
+    # 调试用：同一参数化语句在单个请求内执行超过阈值次数时输出告警，默认与各环境的 DEBUG 一致
+    SQL_N_PLUS_ONE_WARN = os.getenv("SQL_N_PLUS_ONE_WARN", str(DEBUG)).lower() == "true"
+    SQL_N_PLUS_ONE_THRESHOLD = int(os.getenv("SQL_N_PLUS_ONE_THRESHOLD", 5))
+    
     # JWT配置
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "aada1213123121a1213")
     JWT_ALGORITHM = "HS256"
     JWT_ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("JWT_ACCESS_TOKEN_EXPIRE_MINUTES", 30))
     JWT_REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("JWT_REFRESH_TOKEN_EXPIRE_DAYS", 7))
     
+    # 令牌校验缓存配置
+    TOKEN_CACHE_ENABLED = os.getenv("TOKEN_CACHE_ENABLED", "True").lower() == "true"
+    TOKEN_CACHE_MAX_SIZE = int(os.getenv("TOKEN_CACHE_MAX_SIZE", 10000))
+    
+    # 两级缓存配置
+    # 进程内缓存（L1）默认最大条目数
+    CACHE_L1_MAX_SIZE = int(os.getenv("CACHE_L1_MAX_SIZE", 10000))
+    # 启用共享缓存时，进程内条目的最长保留时间（秒），决定其他进程的失效多久后生效
+    CACHE_L1_TTL = float(os.getenv("CACHE_L1_TTL", 5))
+    # 共享缓存（L2）：none 不使用，memory 进程内替身（用于测试）
+    CACHE_L2_BACKEND = os.getenv("CACHE_L2_BACKEND", "none").lower()
+    # 临近过期时提前刷新的系数，0表示不提前刷新
+    CACHE_EARLY_REFRESH_BETA = float(os.getenv("CACHE_EARLY_REFRESH_BETA", 1.0))
+    # @cached 服务方法缓存的默认有效期（秒），多进程部署且未启用共享缓存时为跨进程失效的兜底
+    CACHE_DEFAULT_TTL = float(os.getenv("CACHE_DEFAULT_TTL", 60))
+    
+    # 认证用户身份缓存配置
+    PRINCIPAL_CACHE_TTL = int(os.getenv("PRINCIPAL_CACHE_TTL", 60))
+    PRINCIPAL_CACHE_MAX_SIZE = int(os.getenv("PRINCIPAL_CACHE_MAX_SIZE", 10000))
+    
     # 密码加密配置
     PWD_CONTEXT_SCHEMES = ["bcrypt"]
+    # 密码哈希执行器类型：thread 线程池，process 进程池
+    PASSWORD_HASH_EXECUTOR = os.getenv("PASSWORD_HASH_EXECUTOR", "thread")
+    PASSWORD_HASH_MAX_WORKERS = int(os.getenv("PASSWORD_HASH_MAX_WORKERS", 4))
+    # 同时排队的最大哈希任务数，超出后直接拒绝
+    PASSWORD_HASH_QUEUE_LIMIT = int(os.getenv("PASSWORD_HASH_QUEUE_LIMIT", 64))
+    # 单个哈希任务的超时时间（秒）
+    PASSWORD_HASH_TIMEOUT = float(os.getenv("PASSWORD_HASH_TIMEOUT", 5))
+    
+    # 批量导入用户配置
+    # 每批校验和写入的行数，每批一次唯一性查询、一条多行 INSERT 和一次提交
+    BULK_IMPORT_CHUNK_SIZE = int(os.getenv("BULK_IMPORT_CHUNK_SIZE", 1000))
+    # 单次导入的最大行数
+    BULK_IMPORT_MAX_ROWS = int(os.getenv("BULK_IMPORT_MAX_ROWS", 100000))
+    # 密码哈希进程数，0表示使用CPU核数
+    BULK_IMPORT_HASH_WORKERS = int(os.getenv("BULK_IMPORT_HASH_WORKERS", 0))
+    
+    # 流式导出时服务端游标每批读取的行数
+    EXPORT_YIELD_PER = int(os.getenv("EXPORT_YIELD_PER", 1000))
+    
+    # 响应压缩配置：按 Accept-Encoding 协商 brotli（需安装 brotli）或 gzip
+    COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "True").lower() == "true"
+    # 小于该字节数的响应不压缩
+    COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", 1024))
+    # 实时压缩的等级上限，限制每个请求的CPU开销；缓存的响应体只压缩一次，使用最高等级
+    COMPRESSION_GZIP_LEVEL = min(int(os.getenv("COMPRESSION_GZIP_LEVEL", 5)), 9)
+    COMPRESSION_BROTLI_QUALITY = min(int(os.getenv("COMPRESSION_BROTLI_QUALITY", 4)), 11)
     
     # 分页配置
     DEFAULT_PAGE_SIZE = 10
     MAX_PAGE_SIZE = 100
+    # 总数统计方式：separate 单独计数查询，window 窗口函数与分页数据一次查出
+    PAGINATION_COUNT_MODE = os.getenv("PAGINATION_COUNT_MODE", "separate")
+    # 分页总数缓存时间（秒），0表示不缓存
+    PAGINATION_TOTAL_CACHE_TTL = int(os.getenv("PAGINATION_TOTAL_CACHE_TTL", 30))
+    # 分页总数缓存最大条目数（按实体和搜索关键词区分）
+    PAGINATION_TOTAL_CACHE_MAX_SIZE = int(os.getenv("PAGINATION_TOTAL_CACHE_MAX_SIZE", 1024))
+    
+    # 工作进程数，与 uvicorn --workers 一致（uvicorn 同样从 WEB_CONCURRENCY 读取默认进程数）
+    WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", 1))
+    
+    # 搜索索引配置：启用后启动时构建进程内 n-gram 索引，默认关闭。
+    # 索引只能即时看到本进程的写操作，其他进程的写操作要等下次全量重建才可搜到，
+    # 因此 WEB_CONCURRENCY 大于1时即使启用也不使用索引，搜索始终走 ilike 查询
+    SEARCH_INDEX_ENABLED = os.getenv("SEARCH_INDEX_ENABLED", "False").lower() == "true"
+    # 搜索索引定期全量重建间隔（秒），用于同步绕过服务层的写操作（如直接执行SQL），0表示不重建
+    SEARCH_INDEX_REBUILD_INTERVAL = float(os.getenv("SEARCH_INDEX_REBUILD_INTERVAL", 300))
+    # 候选ID超过该数量时回退到 ilike 查询，避免生成过大的 IN 列表
+    SEARCH_INDEX_MAX_CANDIDATES = int(os.getenv("SEARCH_INDEX_MAX_CANDIDATES", 10000))
+    
+    # 权限位图有效期（秒），到期后从主库重新编译，多进程部署时其他进程的权限变更在该时间内生效
+    PERMISSION_CACHE_TTL = float(os.getenv("PERMISSION_CACHE_TTL", 60))
+    
+    # 菜单树缓存配置（秒），多进程部署时作为跨进程失效的兜底
+    MENU_TREE_CACHE_TTL = int(os.getenv("MENU_TREE_CACHE_TTL", 60))
+    # 按角色组合缓存的用户菜单树最大数量
+    USER_MENU_CACHE_MAX_SIZE = int(os.getenv("USER_MENU_CACHE_MAX_SIZE", 1024))
     
     # 跨域配置
     CORS_ORIGINS = [
@@ -54,18 +151,33 @@ class Config:
 class DevelopmentConfig(Config):
     """开发环境配置"""
     DEBUG = True
+    SQL_N_PLUS_ONE_WARN = os.getenv("SQL_N_PLUS_ONE_WARN", "True").lower() == "true"
+    DB_SCHEMA_CHECK = os.getenv("DB_SCHEMA_CHECK", "warn")
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 5))
     
 
 class ProductionConfig(Config):
     """生产环境配置"""
     DEBUG = False
+    SQL_N_PLUS_ONE_WARN = os.getenv("SQL_N_PLUS_ONE_WARN", "False").lower() == "true"
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 20))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 10))
+    # 生产环境依靠定期回收连接处理失效连接，省去每次取出时的探活往返
+    DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "False").lower() == "true"
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
 
 
 class TestingConfig(Config):
     """测试环境配置"""
     DEBUG = True
+    SQL_N_PLUS_ONE_WARN = os.getenv("SQL_N_PLUS_ONE_WARN", "True").lower() == "true"
     MYSQL_DB = "fastapi_admin_test"
     DATABASE_URL = f"mysql+aiomysql://{Config.MYSQL_USER}:{Config.MYSQL_PASSWORD}@{Config.MYSQL_HOST}:{Config.MYSQL_PORT}/fastapi_admin_test"
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 2))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 0))
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 5))
 
 
 # 根据环境变量选择配置
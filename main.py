@@ -3,17 +3,23 @@ FastAPI 后端管理系统主入口文件
 """
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
+import asyncio
 import logging
+import time
 import traceback
 
 from config import config
-from app.utils.database import init_db, close_db
-from app.utils.response import ResponseUtil, CustomException
+from app.utils.database import check_schema_version, close_db, AsyncSessionLocal
+from app.utils.search_index import rebuild_search_indexes, run_periodic_rebuild, search_index_enabled
+from app.utils.auth import shutdown_password_executor
+from app.utils.compression import CompressionMiddleware
+from app.utils.query_metrics import start_query_stats, warn_repeated_statements
+from app.utils.response import ApiJSONResponse, ResponseUtil, CustomException
 from app.routes.user_routes import router as user_router
 from app.routes.role_routes import router as role_router
 from app.routes.menu_routes import router as menu_router
+from app.routes.system_routes import router as system_router
 
 # 配置日志
 logging.basicConfig(
@@ -29,21 +35,36 @@ async def lifespan(app: FastAPI):
     # 启动时执行
     logger.info("FastAPI 应用启动中...")
     try:
-        await init_db()
-        logger.info("数据库初始化完成")
+        await check_schema_version()
+        logger.info("数据库表结构检查完成")
     except Exception as e:
-        logger.error(f"数据库初始化失败: {e}")
+        logger.error(f"数据库表结构检查失败: {e}")
         raise e
     
+    if search_index_enabled():
+        async with AsyncSessionLocal() as db:
+            stats = await rebuild_search_indexes(db)
+        logger.info(f"搜索索引构建完成: {stats}")
+    
+    rebuild_task = None
+    if search_index_enabled() and config.SEARCH_INDEX_REBUILD_INTERVAL > 0:
+        rebuild_task = asyncio.create_task(
+            run_periodic_rebuild(AsyncSessionLocal, config.SEARCH_INDEX_REBUILD_INTERVAL)
+        )
+    
     yield
     
     # 关闭时执行
     logger.info("FastAPI 应用关闭中...")
+    if rebuild_task is not None:
+        rebuild_task.cancel()
     try:
         await close_db()
         logger.info("数据库连接已关闭")
     except Exception as e:
         logger.error(f"数据库关闭失败: {e}")
+    
+    shutdown_password_executor()
 
 
 # 创建FastAPI应用实例
@@ -53,6 +74,7 @@ app = FastAPI(
     description="基于FastAPI的后端管理系统，包含用户、角色、菜单管理功能",
     docs_url="/docs" if config.DEBUG else None,
     redoc_url="/redoc" if config.DEBUG else None,
+    default_response_class=ApiJSONResponse,
     lifespan=lifespan
 )
 
@@ -65,14 +87,46 @@ app.add_middleware(
     allow_headers=config.CORS_ALLOW_HEADERS,
 )
 
+# 配置响应压缩中间件（gzip / brotli）
+if config.COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware, minimum_size=config.COMPRESSION_MIN_SIZE)
+
+
+if config.SQL_METRICS_ENABLED:
+    @app.middleware("http")
+    async def sql_metrics_middleware(request: Request, call_next):
+        """记录请求的SQL统计，输出 Server-Timing 响应头和结构化日志"""
+        stats = start_query_stats()
+        started_at = time.perf_counter()
+        response = await call_next(request)
+        total_ms = (time.perf_counter() - started_at) * 1000
+        
+        label = f"{request.method} {request.url.path}"
+        response.headers.append("Server-Timing", f"{stats.server_timing()}, total;dur={total_ms:.2f}")
+        fields = stats.log_fields()
+        fields.update({
+            "method": request.method,
+            "path": request.url.path,
+            "status_code": response.status_code,
+            "duration_ms": round(total_ms, 2),
+        })
+        logger.info(
+            f"{label} status={response.status_code} duration_ms={fields['duration_ms']} "
+            f"sql_count={fields['sql_count']} sql_time_ms={fields['sql_time_ms']} "
+            f"sql_duplicates={fields['sql_duplicates']}",
+            extra=fields
+        )
+        warn_repeated_statements(stats, label)
+        return response
+
 
 @app.exception_handler(CustomException)
 async def custom_exception_handler(request: Request, exc: CustomException):
     """自定义异常处理器"""
     response = exc.to_response()
-    return JSONResponse(
+    return ApiJSONResponse(
         status_code=exc.code,
-        content=response.to_dict()
+        content=response
     )
 
 
@@ -81,16 +135,16 @@ async def http_exception_handler(request: Request, exc: HTTPException):
     """HTTP异常处理器"""
     # 如果detail已经是字典格式（来自我们的统一响应），直接返回
     if isinstance(exc.detail, dict):
-        return JSONResponse(
+        return ApiJSONResponse(
             status_code=exc.status_code,
             content=exc.detail
         )
     
     # 保持原始的错误信息，包装成统一格式
     response = ResponseUtil.error(exc.status_code, str(exc.detail))
-    return JSONResponse(
+    return ApiJSONResponse(
         status_code=exc.status_code,
-        content=response.to_dict()
+        content=response
     )
 
 
@@ -101,9 +155,9 @@ async def global_exception_handler(request: Request, exc: Exception):
     logger.error(f"异常堆栈: {traceback.format_exc()}")
     
     response = ResponseUtil.internal_error("服务器内部错误")
-    return JSONResponse(
+    return ApiJSONResponse(
         status_code=500,
-        content=response.to_dict()
+        content=response
     )
 
 
@@ -111,6 +165,7 @@ async def global_exception_handler(request: Request, exc: Exception):
 app.include_router(user_router)
 app.include_router(role_router)
 app.include_router(menu_router)
+app.include_router(system_router)
 
 # 根路径
 @app.get("/", summary="根路径")
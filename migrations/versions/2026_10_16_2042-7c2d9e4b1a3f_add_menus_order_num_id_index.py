@@ -0,0 +1,29 @@
+"""add menus order_num id index
+
+Revision ID: 7c2d9e4b1a3f
+Revises: f4bf81a64ad9
+Create Date: 2026-10-16 20:42:13.418209
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c2d9e4b1a3f'
+down_revision: Union[str, None] = 'f4bf81a64ad9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 菜单游标分页按 (order_num, id) 排序；用 create_all 建的旧库可能已有该索引
+    existing = {index['name'] for index in sa.inspect(op.get_bind()).get_indexes('menus')}
+    if 'ix_menus_order_num_id' not in existing:
+        op.create_index('ix_menus_order_num_id', 'menus', ['order_num', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_menus_order_num_id', table_name='menus')
@@ -0,0 +1,38 @@
+"""make menus order_num not null
+
+Revision ID: b5e8f1c6d204
+Revises: 7c2d9e4b1a3f
+Create Date: 2026-10-16 20:43:27.905116
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5e8f1c6d204'
+down_revision: Union[str, None] = '7c2d9e4b1a3f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # order_num 是菜单游标分页的排序键，NULL 无法编码进游标且会被 > 比较跳过
+    op.execute("UPDATE menus SET order_num = 0 WHERE order_num IS NULL")
+    with op.batch_alter_table('menus') as batch_op:
+        batch_op.alter_column('order_num',
+                              existing_type=sa.Integer(),
+                              nullable=False,
+                              server_default='0',
+                              existing_comment='排序号')
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('menus') as batch_op:
+        batch_op.alter_column('order_num',
+                              existing_type=sa.Integer(),
+                              nullable=True,
+                              server_default=None,
+                              existing_comment='排序号')
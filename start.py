@@ -82,13 +82,13 @@ def start_application(host="0.0.0.0", port=8001, reload=True, workers=1):
     
     try:
         if workers > 1:
-            # 生产模式，使用多进程
+            # 生产模式，使用多进程；WEB_CONCURRENCY 让应用得知进程数，关闭只在单进程下可靠的进程内索引
             subprocess.run([
                 sys.executable, "-m", "uvicorn", "main:app",
                 "--host", host,
                 "--port", str(port),
                 "--workers", str(workers)
-            ])
+            ], env={**os.environ, "WEB_CONCURRENCY": str(workers)})
         else:
             # 开发模式
             subprocess.run([
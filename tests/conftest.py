@@ -0,0 +1,57 @@
+"""
+测试公共夹具
+
+测试使用临时 SQLite 库（aiosqlite）代替 MySQL：替换主库引擎后，
+AsyncSessionLocal、get_db 和读写分离会话都连接到测试库。
+"""
+import httpx
+import pytest
+from app.services.permission_engine import permission_engine
+from app.utils import database
+from app.utils.auth import token_cache
+from app.utils.cache import invalidate_tags
+from app.utils.search_index import search_indexes
+
+# 所有缓存标签，每个测试结束后整体失效以隔离进程内状态
+ALL_TAGS = ("users", "roles", "menus", "role_users", "role_menus")
+
+
+@pytest.fixture
+async def engine(tmp_path, monkeypatch):
+    """建好表结构的临时测试库引擎"""
+    # 与应用相同的建引擎方式：带连接池统计和SQL统计事件
+    test_engine = database._create_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    test_engine.sync_engine.echo = False
+    async with test_engine.begin() as conn:
+        await conn.run_sync(database.Base.metadata.create_all)
+    monkeypatch.setattr(database, "async_engine", test_engine)
+    monkeypatch.setitem(database.AsyncSessionLocal.kw, "bind", test_engine)
+    yield test_engine
+    await test_engine.dispose()
+
+
+@pytest.fixture
+async def db(engine):
+    """读写分离会话（未配置副本时连接主库），与接口使用的会话一致"""
+    async with database.AsyncRoutingSessionLocal() as session:
+        yield session
+
+
+@pytest.fixture
+async def client(engine):
+    """直接调用 ASGI 应用的客户端，不经过网络"""
+    from main import app
+    
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as http_client:
+        yield http_client
+
+
+@pytest.fixture(autouse=True)
+async def reset_state():
+    """清空进程内缓存、权限位图和搜索索引"""
+    yield
+    await invalidate_tags(*ALL_TAGS)
+    permission_engine.invalidate()
+    token_cache.clear()
+    for index in search_indexes.values():
+        index.clear()
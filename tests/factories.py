@@ -0,0 +1,61 @@
+"""
+测试数据构造
+
+直接写库，不经过服务层，避免测试数据本身触发被测的缓存和索引逻辑。
+"""
+from datetime import datetime, timedelta
+from jose import jwt
+from app.models.menu import Menu
+from app.models.user import Role, User
+from app.utils import auth
+from app.utils.auth import get_password_hash
+
+# 预先计算的密码哈希，直接写库的测试数据复用，避免每条数据都计算 bcrypt
+PASSWORD = "secret123"
+PASSWORD_HASH = get_password_hash(PASSWORD)
+
+
+async def add_user(db, username: str, **fields) -> User:
+    """直接写入一个用户"""
+    user = User(
+        username=username,
+        email=f"{username}@example.com",
+        hashed_password=PASSWORD_HASH,
+        **fields
+    )
+    db.add(user)
+    await db.commit()
+    return user
+
+
+async def add_role(db, code: str, **fields) -> Role:
+    """直接写入一个角色"""
+    role = Role(name=code, code=code, **fields)
+    db.add(role)
+    await db.commit()
+    return role
+
+
+async def add_menu(db, name: str, **fields) -> Menu:
+    """直接写入一个菜单"""
+    menu = Menu(name=name, path=f"/{name}", **fields)
+    db.add(menu)
+    await db.commit()
+    return menu
+
+
+async def link(db, table, rows) -> None:
+    """直接写入关联表"""
+    await db.execute(table.insert().values(rows))
+    await db.commit()
+
+
+def auth_headers(user_id: int) -> dict:
+    """
+    指定用户的认证请求头
+    
+    令牌带 kid 头，避免与依赖注入中按固定前缀识别的临时令牌冲突（python-jose 要求 sub 为字符串）。
+    """
+    payload = {"sub": str(user_id), "exp": datetime.utcnow() + timedelta(hours=1)}
+    token = jwt.encode(payload, auth.JWT_SECRET_KEY, algorithm=auth.JWT_ALGORITHM, headers={"kid": "test"})
+    return {"Authorization": f"Bearer {token}"}
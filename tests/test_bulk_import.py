@@ -0,0 +1,99 @@
+"""
+批量导入用户
+"""
+import pytest
+from sqlalchemy import func, select
+from app.models.user import User
+from app.services import user_service
+from app.services.user_service import UserService
+from app.utils import database
+from app.utils.bulk_import import parse_import_rows
+from app.utils.response import BusinessException
+from config import config
+from tests.factories import add_user
+
+
+def jsonl(*usernames: str) -> bytes:
+    return "\n".join(
+        f'{{"username": "{name}", "email": "{name}@example.com", "password": "secret123"}}'
+        for name in usernames
+    ).encode("utf-8")
+
+
+async def count_users(db) -> int:
+    return (await db.execute(select(func.count(User.id)))).scalar_one()
+
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    monkeypatch.setattr(config, "BULK_IMPORT_CHUNK_SIZE", 2)
+    monkeypatch.setattr(config, "BULK_IMPORT_MAX_ROWS", 3)
+
+
+async def test_over_limit_writes_nothing(db, small_chunks):
+    rows = parse_import_rows(jsonl("user1", "user2", "user3", "user4"), "jsonl")
+    
+    with pytest.raises(BusinessException):
+        await UserService.bulk_import_users(db, rows)
+    
+    # 第一批（2行）也不能在超限被发现前提交
+    assert await count_users(db) == 0
+
+
+async def test_at_limit_imports_all_chunks(db, small_chunks):
+    rows = parse_import_rows(jsonl("user1", "user2", "user3"), "jsonl")
+    
+    report = await UserService.bulk_import_users(db, rows)
+    
+    assert (report["created"], report["failed"]) == (3, 0)
+    assert await count_users(db) == 3
+
+
+async def test_row_errors_do_not_block_other_rows(db, small_chunks):
+    await add_user(db, "taken")
+    content = jsonl("taken", "fresh") + b'\n{"username": "x"}'
+    
+    report = await UserService.bulk_import_users(db, parse_import_rows(content, "jsonl"))
+    
+    assert (report["total"], report["created"], report["failed"]) == (3, 1, 2)
+    assert [error["row"] for error in report["errors"]] == [1, 3]
+    assert await count_users(db) == 2
+
+
+async def test_import_updates_search_index_and_totals(db, small_chunks, monkeypatch):
+    monkeypatch.setattr(config, "SEARCH_INDEX_ENABLED", True)
+    from app.utils.search_index import rebuild_search_indexes, search_ids
+    await rebuild_search_indexes(db)
+    assert (await UserService.get_users_paginated(db))["total"] == 0
+    
+    await UserService.bulk_import_users(db, parse_import_rows(jsonl("alpha", "alphonse"), "jsonl"))
+    
+    assert len(search_ids("users", "alph")) == 2
+    assert (await UserService.get_users_paginated(db))["total"] == 2
+
+
+async def test_duplicates_differing_only_in_case_are_rejected(db):
+    content = jsonl("Alice", "alice") + b'\n{"username": "bob", "email": "ALICE@example.com", "password": "secret123"}'
+    
+    report = await UserService.bulk_import_users(db, parse_import_rows(content, "jsonl"))
+    
+    assert (report["created"], report["failed"]) == (1, 2)
+    assert [error["error"] for error in report["errors"]] == ["用户名已存在", "邮箱已存在"]
+
+
+async def test_concurrent_conflict_fails_only_that_row(db, engine, monkeypatch):
+    original = user_service.bulk_get_password_hashes
+    
+    async def hash_then_race(passwords):
+        # 校验通过后、写入前，另一个请求写入了同名用户
+        async with database.AsyncSessionLocal() as other:
+            await add_user(other, "user2")
+        return await original(passwords)
+    monkeypatch.setattr(user_service, "bulk_get_password_hashes", hash_then_race)
+    
+    report = await UserService.bulk_import_users(db, parse_import_rows(jsonl("user1", "user2", "user3"), "jsonl"))
+    
+    assert (report["created"], report["failed"]) == (2, 1)
+    assert [error["row"] for error in report["errors"]] == [2]
+    usernames = (await db.execute(select(User.username).order_by(User.username))).scalars().all()
+    assert usernames == ["user1", "user2", "user3"]
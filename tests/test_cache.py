@@ -0,0 +1,42 @@
+"""
+两级缓存
+"""
+import asyncio
+from app.utils.cache import TwoTierCache
+
+
+async def test_concurrent_misses_load_once():
+    cache = TwoTierCache("test_single_flight", ttl=60)
+    calls = 0
+    
+    async def loader():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "value"
+    
+    results = await asyncio.gather(*[cache.get_or_load("key", loader) for _ in range(10)])
+    
+    assert results == ["value"] * 10
+    assert calls == 1
+
+
+async def test_invalidation_during_load_is_not_overwritten():
+    cache = TwoTierCache("test_inflight", ttl=60)
+    started = asyncio.Event()
+    
+    async def stale_loader():
+        started.set()
+        await asyncio.sleep(0.01)
+        return "stale"
+    
+    load = asyncio.create_task(cache.get_or_load("key", stale_loader))
+    await started.wait()
+    await cache.invalidate("key")
+    assert await load == "stale"
+    
+    async def fresh_loader():
+        return "fresh"
+    
+    # 失效前开始的加载结果不能写入缓存
+    assert await cache.get_or_load("key", fresh_loader) == "fresh"
@@ -0,0 +1,43 @@
+"""
+标签失效
+"""
+import asyncio
+from app.services.user_service import UserService
+from app.utils.cache import (
+    MemoryBackend, TwoTierCache, _clear_shared, _invalidate_local, invalidate_tags, record_changes, register_cache_tags
+)
+from tests.factories import add_user
+
+
+async def test_keyed_tag_invalidation_keeps_other_keys():
+    backend = MemoryBackend()
+    cache = TwoTierCache("test_keyed", ttl=60, backend=backend)
+    register_cache_tags(cache, {"test_keyed_tag": lambda ids: ids})
+    for key in (1, 2):
+        await cache.get_or_load(key, lambda key=key: asyncio.sleep(0, result=f"v{key}"))
+    
+    await _clear_shared(_invalidate_local({"test_keyed_tag": [1]}))
+    
+    assert await backend.get("test_keyed:1") is None
+    assert await backend.get("test_keyed:2") is not None
+    assert await cache.get_or_load(2, lambda: asyncio.sleep(0, result="reloaded")) == "v2"
+    
+    # 没有变更记录时清空整个缓存
+    await invalidate_tags("test_keyed_tag")
+    assert await cache.get_or_load(2, lambda: asyncio.sleep(0, result="reloaded")) == "reloaded"
+
+
+async def test_rolled_back_changes_are_discarded(db, monkeypatch):
+    alice = await add_user(db, "alice")
+    alice_id = alice.id
+    await UserService.get_principal(db, alice_id)
+    
+    record_changes(db, "users", alice)
+    await db.rollback()
+    # 回滚前登记的变更不能带到下一次提交
+    await add_user(db, "bob")
+    
+    async def fail_load(*args):
+        raise AssertionError("回滚的变更不应使缓存失效")
+    monkeypatch.setattr(UserService, "_load_principal", fail_load)
+    assert (await UserService.get_principal(db, alice_id)).username == "alice"
@@ -0,0 +1,80 @@
+"""
+响应压缩和菜单树协商缓存
+"""
+import gzip
+import pytest
+from app.utils.compression import SUPPORTED_ENCODINGS, CompressedPayload, negotiate_encoding
+from tests.factories import add_menu, add_user, auth_headers
+
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    ("gzip", "gzip"),
+    # 未安装 brotli 时优先编码为 gzip
+    ("gzip, br", SUPPORTED_ENCODINGS[0]),
+    ("br;q=0.5, gzip;q=0.8", "gzip"),
+    ("*", SUPPORTED_ENCODINGS[0]),
+    ("identity", None),
+    ("gzip;q=0", None),
+    (None, None),
+])
+def test_negotiate_encoding(accept_encoding, expected):
+    assert negotiate_encoding(accept_encoding) == expected
+
+
+def test_payload_is_compressed_once_per_encoding():
+    payload = CompressedPayload(b'{"items": []}' * 200)
+    
+    body, encoding = payload.encode("gzip")
+    
+    assert encoding == "gzip"
+    assert gzip.decompress(body) == payload.body
+    assert payload.encode("gzip")[0] is body
+
+
+def test_small_payload_is_not_compressed():
+    payload = CompressedPayload(b"{}")
+    
+    assert payload.encode("gzip") == (b"{}", None)
+
+
+@pytest.fixture
+async def menu_headers(db):
+    user = await add_user(db, "alice")
+    for i in range(30):
+        await add_menu(db, f"menu{i}", order_num=i)
+    return auth_headers(user.id)
+
+
+async def test_menu_tree_is_served_precompressed(client, menu_headers):
+    plain = await client.get("/api/menus/tree", headers={**menu_headers, "Accept-Encoding": "identity"})
+    compressed = await client.get("/api/menus/tree", headers={**menu_headers, "Accept-Encoding": "gzip"})
+    
+    assert "content-encoding" not in plain.headers
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in compressed.headers["vary"]
+    assert compressed.json() == plain.json()
+    assert len(compressed.json()["data"]) == 30
+    # 压缩后的表示使用弱 ETag，二者对应同一版本
+    assert compressed.headers["etag"] == f"W/{plain.headers['etag']}"
+
+
+async def test_menu_tree_etag_returns_not_modified(client, menu_headers):
+    first = await client.get("/api/menus/tree", headers={**menu_headers, "Accept-Encoding": "gzip"})
+    
+    second = await client.get("/api/menus/tree", headers={
+        **menu_headers, "Accept-Encoding": "gzip", "If-None-Match": first.headers["etag"],
+    })
+    
+    assert second.status_code == 304
+    assert second.content == b""
+
+
+async def test_streamed_export_is_compressed(client, db):
+    admin = await add_user(db, "admin", is_superuser=True)
+    for i in range(30):
+        await add_user(db, f"user{i}")
+    
+    response = await client.get("/api/users/export", headers={**auth_headers(admin.id), "Accept-Encoding": "gzip"})
+    
+    assert response.headers["content-encoding"] == "gzip"
+    assert len(response.text.splitlines()) == 31
@@ -0,0 +1,40 @@
+"""
+按响应模型序列化ORM对象
+"""
+from typing import List
+from sqlalchemy import select
+from app.models.associations import role_menu_association, user_role_association
+from app.models.menu import Menu as MenuModel
+from app.schemas.menu import Menu
+from app.schemas.user import UserDetail
+from app.services.user_service import UserService
+from app.utils.response import dump_model
+from tests.factories import add_menu, add_role, add_user, link
+
+
+async def test_matches_validated_output(db):
+    user = await add_user(db, "alice")
+    role = await add_role(db, "editor")
+    menu = await add_menu(db, "reports")
+    await link(db, user_role_association, [{"user_id": user.id, "role_id": role.id}])
+    await link(db, role_menu_association, [{"role_id": role.id, "menu_id": menu.id}])
+    db.expunge_all()
+    
+    user = await UserService.get_user_by_id(db, user.id)
+    data = dump_model(UserDetail, user)
+    
+    assert data == UserDetail.model_validate(user).model_dump(mode="json")
+    assert "hashed_password" not in data
+    assert isinstance(data["created_at"], str)
+    assert [item["code"] for item in data["roles"]] == ["editor"]
+    assert [item["name"] for item in data["roles"][0]["menus"]] == ["reports"]
+
+
+async def test_dumps_lists(db):
+    await add_menu(db, "a")
+    await add_menu(db, "b")
+    menus = (await db.execute(select(MenuModel).order_by(MenuModel.id))).scalars().all()
+    
+    data = dump_model(List[Menu], menus)
+    
+    assert data == [Menu.model_validate(menu).model_dump(mode="json") for menu in menus]
@@ -0,0 +1,47 @@
+"""
+流式数据导出
+"""
+import csv
+import io
+import json
+from app.utils.response import dumps_json
+from tests.factories import add_user, auth_headers
+
+
+async def test_ndjson_matches_api_encoding(client, db):
+    admin = await add_user(db, "admin", is_superuser=True)
+    await add_user(db, "张三")
+    await add_user(db, "removed", is_deleted=True)
+    
+    response = await client.get("/api/users/export", headers=auth_headers(admin.id))
+    
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = response.content.splitlines()
+    rows = [json.loads(line) for line in lines]
+    assert [row["username"] for row in rows] == ["admin", "张三"]
+    assert "hashed_password" not in rows[0]
+    # 与接口响应使用同一编码：紧凑格式、中文不转义、日期时间为ISO格式
+    assert lines[1] == dumps_json(rows[1])
+    assert "张三".encode("utf-8") in lines[1]
+
+
+async def test_csv_has_bom_and_header(client, db):
+    admin = await add_user(db, "admin", is_superuser=True)
+    
+    response = await client.get("/api/users/export?format=csv", headers=auth_headers(admin.id))
+    
+    assert response.status_code == 200
+    text = response.content.decode("utf-8")
+    assert text.startswith("\ufeff")
+    rows = list(csv.reader(io.StringIO(text[1:])))
+    assert rows[0][:2] == ["id", "username"]
+    assert rows[1][1] == "admin"
+
+
+async def test_unknown_format_is_rejected(client, db):
+    admin = await add_user(db, "admin", is_superuser=True)
+    
+    response = await client.get("/api/users/export?format=xml", headers=auth_headers(admin.id))
+    
+    assert response.status_code == 400
@@ -0,0 +1,49 @@
+"""
+请求级会话的连接占用
+"""
+import pytest
+from sqlalchemy import event
+from tests.factories import add_user, auth_headers
+
+
+@pytest.fixture
+def checkouts(engine):
+    """统计测试库连接池取出连接的次数"""
+    counter = {"count": 0}
+    
+    def on_checkout(*args):
+        counter["count"] += 1
+    
+    event.listen(engine.sync_engine, "checkout", on_checkout)
+    yield counter
+    event.remove(engine.sync_engine, "checkout", on_checkout)
+
+
+async def test_unauthorized_request_checks_out_no_connection(client, checkouts):
+    response = await client.get("/api/users/me")
+    
+    assert response.status_code == 401
+    assert checkouts["count"] == 0
+
+
+async def test_cached_request_checks_out_no_connection(client, db, checkouts):
+    user = await add_user(db, "alice")
+    headers = auth_headers(user.id)
+    # 首次请求加载令牌、用户身份和菜单树缓存
+    assert (await client.get("/api/menus/tree", headers=headers)).status_code == 200
+    checkouts["count"] = 0
+    
+    response = await client.get("/api/menus/tree", headers=headers)
+    
+    assert response.status_code == 200
+    assert checkouts["count"] == 0
+
+
+async def test_database_request_checks_out_a_connection(client, db, checkouts):
+    user = await add_user(db, "alice")
+    checkouts["count"] = 0
+    
+    response = await client.get("/api/users/me", headers=auth_headers(user.id))
+    
+    assert response.status_code == 200
+    assert checkouts["count"] >= 1
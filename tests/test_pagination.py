@@ -0,0 +1,117 @@
+"""
+游标分页和分页总数缓存
+"""
+import pytest
+from app.services.menu_service import MenuService
+from app.services.role_service import RoleService
+from app.services.user_service import UserService
+from app.utils.pagination import TotalCache, decode_cursor, encode_cursor
+from app.utils.response import BusinessException
+from tests.factories import add_menu, add_role, add_user
+
+
+class TestCursorEncoding:
+    @pytest.mark.parametrize("values", [[1], [0, 7], [-3, 2 ** 40]])
+    def test_round_trip(self, values):
+        assert decode_cursor(encode_cursor(values), len(values)) == values
+    
+    @pytest.mark.parametrize("cursor", [
+        "不是游标",
+        "!!!",
+        encode_cursor([1]),
+        encode_cursor([None, 1]),
+        encode_cursor(["1", 2]),
+        encode_cursor({"id": 1}),
+    ])
+    def test_rejects_invalid_cursor(self, cursor):
+        with pytest.raises(BusinessException):
+            decode_cursor(cursor, 2)
+
+
+async def collect_pages(fetch, per_page):
+    """按 next_cursor 依次取完所有页，返回每条记录的ID"""
+    ids, cursor = [], None
+    while True:
+        result = await fetch(per_page=per_page, cursor=cursor, include_total=False)
+        ids.extend(item["id"] for item in result["items"])
+        if not result["has_next"]:
+            return ids
+        cursor = result["next_cursor"]
+
+
+async def test_menu_cursor_walks_duplicate_order_nums(db):
+    # 排序号大量重复，游标必须按 (order_num, id) 续读，不能漏读或重复
+    menus = [await add_menu(db, f"menu{i}", order_num=i % 3) for i in range(10)]
+    expected = [menu.id for menu in sorted(menus, key=lambda menu: (menu.order_num, menu.id))]
+    
+    ids = await collect_pages(lambda **kwargs: MenuService.get_menus_paginated(db, **kwargs), 3)
+    
+    assert ids == expected
+
+
+async def test_menu_default_order_num_is_not_null(db):
+    menu = await add_menu(db, "plain")
+    
+    result = await MenuService.get_menus_paginated(db, per_page=1)
+    
+    assert menu.order_num == 0
+    assert decode_cursor(encode_cursor([menu.order_num, menu.id]), 2) == [0, menu.id]
+    assert result["items"][0]["id"] == menu.id
+
+
+async def test_user_cursor_matches_offset_pages(db):
+    for i in range(7):
+        await add_user(db, f"user{i}")
+    
+    by_cursor = await collect_pages(lambda **kwargs: UserService.get_users_paginated(db, **kwargs), 3)
+    by_offset = []
+    for page in (1, 2, 3):
+        result = await UserService.get_users_paginated(db, page=page, per_page=3)
+        by_offset.extend(item["id"] for item in result["items"])
+    
+    assert by_cursor == by_offset
+    assert len(by_cursor) == 7
+
+
+async def test_role_cursor_round_trip(db):
+    roles = [await add_role(db, f"role{i}") for i in range(5)]
+    
+    ids = await collect_pages(lambda **kwargs: RoleService.get_roles_paginated(db, **kwargs), 2)
+    
+    assert ids == [role.id for role in roles]
+
+
+async def test_total_refreshes_after_create_and_delete(db):
+    first = await add_user(db, "first")
+    assert (await UserService.get_users_paginated(db))["total"] == 1
+    
+    await UserService.delete_user(db, first.id)
+    
+    assert (await UserService.get_users_paginated(db))["total"] == 0
+
+
+class TestTotalCache:
+    def test_bounded_lru(self):
+        cache = TotalCache(ttl=60, max_size=2)
+        cache.set("users", None, 1)
+        cache.set("users", "a", 2)
+        cache.get("users", None)
+        cache.set("users", "b", 3)
+        
+        assert len(cache) == 2
+        assert cache.get("users", "a") is None
+        assert cache.get("users", None) == 1
+    
+    def test_invalidate_by_namespace_and_prefix(self):
+        cache = TotalCache(ttl=60)
+        cache.set("users", None, 1)
+        cache.set("role_users:1", None, 2)
+        cache.set("role_users:2", None, 3)
+        
+        cache.invalidate("role_users:1")
+        assert cache.get("role_users:1", None) is None
+        assert cache.get("role_users:2", None) == 3
+        
+        cache.invalidate_prefix("role_users:")
+        assert cache.get("role_users:2", None) is None
+        assert cache.get("users", None) == 1
@@ -0,0 +1,38 @@
+"""
+密码哈希执行器
+"""
+import asyncio
+import threading
+import pytest
+from app.utils import auth
+from app.utils.auth import async_get_password_hash, async_verify_password
+from app.utils.response import ServiceUnavailableException
+from config import config
+
+
+async def test_hash_and_verify_off_loop():
+    hashed = await async_get_password_hash("secret123")
+    
+    assert await async_verify_password("secret123", hashed)
+    assert not await async_verify_password("wrong", hashed)
+
+
+async def test_timed_out_job_holds_slot_until_it_finishes(monkeypatch):
+    monkeypatch.setattr(config, "PASSWORD_HASH_TIMEOUT", 0.01)
+    monkeypatch.setattr(config, "PASSWORD_HASH_QUEUE_LIMIT", 1)
+    release = threading.Event()
+    
+    with pytest.raises(ServiceUnavailableException):
+        await auth._run_password_task(release.wait, 5)
+    
+    # 超时只是放弃等待，仍在执行的任务占用名额，新任务被拒绝
+    assert auth._password_pending == 1
+    with pytest.raises(ServiceUnavailableException):
+        await auth._run_password_task(lambda: None)
+    
+    release.set()
+    for _ in range(100):
+        if auth._password_pending == 0:
+            break
+        await asyncio.sleep(0.01)
+    assert auth._password_pending == 0
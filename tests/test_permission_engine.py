@@ -0,0 +1,80 @@
+"""
+菜单权限位图
+"""
+from app.models.associations import role_menu_association, user_role_association
+from app.services.menu_service import MenuService
+from app.services.permission_engine import permission_engine
+from app.services.role_service import RoleService
+from app.schemas.menu import MenuUpdate
+from app.schemas.role import RoleUpdate
+from tests.factories import add_menu, add_role, add_user, link
+
+
+async def test_assignment_updates_permissions_and_menu_tree(db):
+    user = await add_user(db, "alice")
+    role = await add_role(db, "editor")
+    first = await add_menu(db, "users", order_num=1)
+    second = await add_menu(db, "roles", order_num=2)
+    await link(db, user_role_association, [{"user_id": user.id, "role_id": role.id}])
+    
+    await RoleService.assign_menus(db, role.id, [first.id])
+    assert [menu["id"] for menu in await MenuService.get_user_menus(db, user.id)] == [first.id]
+    assert await MenuService.check_user_menu_permission(db, user.id, first.id)
+    assert not await MenuService.check_user_menu_permission(db, user.id, second.id)
+    
+    await RoleService.add_menus(db, role.id, [second.id])
+    assert [menu["id"] for menu in await MenuService.get_user_menus(db, user.id)] == [first.id, second.id]
+    
+    await RoleService.remove_menus(db, role.id, [first.id])
+    assert [menu["id"] for menu in await MenuService.get_user_menus(db, user.id)] == [second.id]
+    assert not await MenuService.check_user_menu_permission(db, user.id, first.id)
+
+
+async def test_committed_writes_update_loaded_bitmap_in_place(db):
+    role = await add_role(db, "editor")
+    first = await add_menu(db, "users")
+    second = await add_menu(db, "roles")
+    await link(db, role_menu_association, [
+        {"role_id": role.id, "menu_id": first.id},
+        {"role_id": role.id, "menu_id": second.id},
+    ])
+    await permission_engine.ensure_loaded(db)
+    
+    await MenuService.update_menu(db, first.id, MenuUpdate(is_active=False))
+    assert permission_engine.loaded
+    assert not permission_engine.has_permission([role.id], first.id)
+    assert permission_engine.has_permission([role.id], second.id)
+    
+    await RoleService.update_role(db, role.id, RoleUpdate(is_active=False))
+    assert permission_engine.loaded
+    assert not permission_engine.has_permission([role.id], second.id)
+    
+    await RoleService.update_role(db, role.id, RoleUpdate(is_active=True))
+    assert permission_engine.has_permission([role.id], second.id)
+    
+    await RoleService.delete_role(db, role.id)
+    assert permission_engine.loaded
+    assert not permission_engine.has_permission([role.id], second.id)
+
+
+async def test_permission_load_discards_snapshot_overlapping_a_write(db, monkeypatch):
+    role = await add_role(db, "editor")
+    menu = await add_menu(db, "users")
+    compile_snapshot = permission_engine._compile
+    
+    async def compile_with_concurrent_write(session):
+        snapshot = await compile_snapshot(session)
+        if not compiled:
+            # 模拟编译期间另一个请求提交了菜单分配
+            await link(db, role_menu_association, [{"role_id": role.id, "menu_id": menu.id}])
+            permission_engine.set_role_menus(role.id, [menu.id])
+        compiled.append(snapshot)
+        return snapshot
+    
+    compiled = []
+    monkeypatch.setattr(permission_engine, "_compile", compile_with_concurrent_write)
+    
+    await permission_engine.ensure_loaded(db)
+    
+    assert len(compiled) == 2
+    assert permission_engine.has_permission([role.id], menu.id)
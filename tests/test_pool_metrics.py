@@ -0,0 +1,42 @@
+"""
+数据库连接池统计
+"""
+import pytest
+from sqlalchemy import exc, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.utils.pool_metrics import InstrumentedAsyncQueuePool
+from tests.factories import add_user, auth_headers
+
+
+async def test_counts_waits_and_timeouts(tmp_path):
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedAsyncQueuePool, pool_size=1, max_overflow=0, pool_timeout=0.05,
+    )
+    try:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            # 唯一的连接被占用，再次获取只能排队直到超时
+            with pytest.raises(exc.TimeoutError):
+                async with engine.connect():
+                    pass
+        
+        metrics = engine.sync_engine.pool.metrics()
+    finally:
+        await engine.dispose()
+    
+    assert (metrics["checkouts"], metrics["waits"], metrics["timeouts"]) == (2, 1, 1)
+    assert metrics["checked_out"] == 0
+    assert metrics["wait_time_max_ms"] >= 50
+    assert sum(metrics["wait_histogram"].values()) == 2
+
+
+async def test_db_pool_endpoint_reports_primary_pool(client, db):
+    admin = await add_user(db, "admin", is_superuser=True)
+    
+    response = await client.get("/api/system/db-pool", headers=auth_headers(admin.id))
+    
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert data["checkouts"] >= 1
+    assert "replica" not in data
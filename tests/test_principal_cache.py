@@ -0,0 +1,62 @@
+"""
+认证用户身份缓存
+"""
+from app.schemas.role import RoleCreate
+from app.schemas.user import UserUpdate
+from app.services.role_service import RoleService
+from app.services.user_service import UserService
+from tests.factories import add_role, add_user
+
+
+class TestPrincipalCache:
+    async def test_cached_until_user_update(self, db):
+        user = await add_user(db, "alice")
+        assert (await UserService.get_principal(db, user.id)).is_active
+        
+        await UserService.update_user(db, user.id, UserUpdate(is_active=False))
+        
+        assert not (await UserService.get_principal(db, user.id)).is_active
+    
+    async def test_user_delete_invalidates(self, db):
+        user = await add_user(db, "alice")
+        await UserService.get_principal(db, user.id)
+        
+        await UserService.delete_user(db, user.id)
+        
+        assert await UserService.get_principal(db, user.id) is None
+    
+    async def test_role_membership_changes_invalidate(self, db):
+        user = await add_user(db, "alice")
+        role = await add_role(db, "editor")
+        assert (await UserService.get_principal(db, user.id)).role_ids == []
+        
+        await UserService.assign_roles(db, user.id, [role.id])
+        assert (await UserService.get_principal(db, user.id)).role_ids == [role.id]
+        
+        await RoleService.remove_users(db, role.id, [user.id])
+        assert (await UserService.get_principal(db, user.id)).role_ids == []
+        
+        await RoleService.add_users(db, role.id, [user.id])
+        assert (await UserService.get_principal(db, user.id)).role_ids == [role.id]
+    
+    async def test_role_delete_invalidates_members(self, db):
+        user = await add_user(db, "alice")
+        role = await RoleService.create_role(db, RoleCreate(name="编辑", code="editor"))
+        await RoleService.assign_users(db, role["id"], [user.id])
+        assert (await UserService.get_principal(db, user.id)).role_ids == [role["id"]]
+        
+        await RoleService.delete_role(db, role["id"])
+        
+        assert (await UserService.get_principal(db, user.id)).role_ids == []
+    
+    async def test_other_users_stay_cached(self, db, monkeypatch):
+        alice = await add_user(db, "alice")
+        bob = await add_user(db, "bob")
+        await UserService.get_principal(db, bob.id)
+        
+        await UserService.update_user(db, alice.id, UserUpdate(real_name="Alice"))
+        
+        async def fail_load(*args):
+            raise AssertionError("未变更用户的身份信息不应重新加载")
+        monkeypatch.setattr(UserService, "_load_principal", fail_load)
+        assert (await UserService.get_principal(db, bob.id)).username == "bob"
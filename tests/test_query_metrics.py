@@ -0,0 +1,47 @@
+"""
+请求级SQL统计
+"""
+import logging
+import re
+from app.utils.query_metrics import QueryStats, warn_repeated_statements
+from config import config
+from tests.factories import add_user, auth_headers
+
+
+def test_counts_duplicates_and_repeated_statements():
+    stats = QueryStats()
+    for user_id in (1, 2, 2):
+        stats.record("SELECT * FROM roles WHERE user_id = ?", (user_id,), 0.001)
+    stats.record("SELECT * FROM users", (), 0.002)
+    
+    assert stats.count == 4
+    assert stats.duplicates == 1
+    assert stats.repeated_statements(2) == [("SELECT * FROM roles WHERE user_id = ?", 3)]
+    assert stats.log_fields() == {"sql_count": 4, "sql_time_ms": 5.0, "sql_duplicates": 1}
+    assert stats.server_timing() == 'db;dur=5.00;desc="queries=4 duplicates=1"'
+
+
+def test_warns_on_repeated_statements(monkeypatch, caplog):
+    monkeypatch.setattr(config, "SQL_N_PLUS_ONE_WARN", True)
+    monkeypatch.setattr(config, "SQL_N_PLUS_ONE_THRESHOLD", 2)
+    stats = QueryStats()
+    for user_id in range(3):
+        stats.record("SELECT * FROM roles WHERE user_id = ?", (user_id,), 0.001)
+    
+    with caplog.at_level(logging.WARNING, logger="app.utils.query_metrics"):
+        warn_repeated_statements(stats, "GET /api/users")
+        monkeypatch.setattr(config, "SQL_N_PLUS_ONE_WARN", False)
+        warn_repeated_statements(stats, "GET /api/users")
+    
+    assert len(caplog.records) == 1
+    assert "GET /api/users" in caplog.records[0].getMessage()
+
+
+async def test_response_carries_server_timing(client, db):
+    user = await add_user(db, "alice")
+    
+    response = await client.get("/api/users/me", headers=auth_headers(user.id))
+    
+    assert response.status_code == 200
+    match = re.match(r'db;dur=[\d.]+;desc="queries=(\d+) duplicates=\d+", total;dur=[\d.]+', response.headers["server-timing"])
+    assert match and int(match.group(1)) >= 1
@@ -0,0 +1,50 @@
+"""
+角色列表的成员数、菜单数和成员分页
+"""
+from app.models.associations import role_menu_association, user_role_association
+from app.services.role_service import RoleService
+from tests.factories import add_menu, add_role, add_user, link
+
+
+async def seed_roles(db):
+    editor = await add_role(db, "editor")
+    viewer = await add_role(db, "viewer")
+    users = [await add_user(db, f"user{i}") for i in range(3)]
+    removed_user = await add_user(db, "removed", is_deleted=True)
+    menus = [await add_menu(db, f"menu{i}") for i in range(2)]
+    disabled_menu = await add_menu(db, "disabled", is_active=False)
+    await link(db, user_role_association, [
+        *({"user_id": user.id, "role_id": editor.id} for user in users),
+        {"user_id": removed_user.id, "role_id": editor.id},
+    ])
+    await link(db, role_menu_association, [
+        *({"role_id": editor.id, "menu_id": menu.id} for menu in menus),
+        {"role_id": editor.id, "menu_id": disabled_menu.id},
+        {"role_id": viewer.id, "menu_id": menus[0].id},
+    ])
+    return editor, viewer, users
+
+
+async def test_listing_counts_members_and_menus(db):
+    editor, viewer, _ = await seed_roles(db)
+    
+    result = await RoleService.get_roles_paginated(db, page=1, per_page=10)
+    
+    counts = {item["code"]: (item["user_count"], item["menu_count"]) for item in result["items"]}
+    # 已删除的用户和停用的菜单不计数，两张关联表的计数互不放大
+    assert counts == {"editor": (3, 2), "viewer": (0, 1)}
+    detail = await RoleService.get_role_detail(db, editor.id)
+    assert (detail["user_count"], detail["menu_count"]) == (3, 2)
+
+
+async def test_members_are_paged_by_cursor(db):
+    editor, _, users = await seed_roles(db)
+    
+    first = await RoleService.get_role_users(db, editor.id, per_page=2)
+    second = await RoleService.get_role_users(db, editor.id, per_page=2, cursor=first["next_cursor"])
+    
+    assert [item["username"] for item in first["items"]] == ["user0", "user1"]
+    assert first["total"] == 3 and first["has_next"]
+    assert [item["username"] for item in second["items"]] == ["user2"]
+    assert not second["has_next"] and second["next_cursor"] is None
+    assert "hashed_password" not in first["items"][0]
@@ -0,0 +1,38 @@
+"""
+角色菜单分配
+"""
+from app.services.role_service import RoleService
+from app.models.associations import role_menu_association
+from tests.factories import add_menu, add_role, link
+
+
+async def test_assign_menus_replaces_links_to_inactive_menus(db):
+    role = await add_role(db, "editor")
+    inactive = await add_menu(db, "archived", is_active=False)
+    kept = await add_menu(db, "users")
+    await link(db, role_menu_association, [
+        {"role_id": role.id, "menu_id": inactive.id},
+        {"role_id": role.id, "menu_id": kept.id},
+    ])
+    
+    # 停用菜单的旧关联必须被删除，否则重新写入时主键冲突
+    await RoleService.assign_menus(db, role.id, [inactive.id, kept.id])
+    await RoleService.assign_menus(db, role.id, [kept.id])
+    
+    rows = await db.execute(
+        role_menu_association.select().where(role_menu_association.c.role_id == role.id)
+    )
+    assert [row.menu_id for row in rows] == [kept.id]
+
+
+async def test_assign_menus_skips_deleted_menus(db):
+    role = await add_role(db, "editor")
+    menu = await add_menu(db, "users")
+    deleted = await add_menu(db, "gone", is_deleted=True)
+    
+    await RoleService.assign_menus(db, role.id, [menu.id, deleted.id])
+    
+    rows = await db.execute(
+        role_menu_association.select().where(role_menu_association.c.role_id == role.id)
+    )
+    assert [row.menu_id for row in rows] == [menu.id]
@@ -0,0 +1,73 @@
+"""
+n-gram 搜索索引
+"""
+from types import SimpleNamespace
+import pytest
+from app.services.user_service import UserService
+from app.utils import search_index
+from app.utils.search_index import NGramIndex, index_entity, rebuild_search_indexes, search_ids
+from config import config
+from tests.factories import add_user
+
+
+@pytest.fixture
+def enabled(monkeypatch):
+    monkeypatch.setattr(config, "SEARCH_INDEX_ENABLED", True)
+
+
+def test_ngram_search_filters_false_positives():
+    index = NGramIndex()
+    index.add(1, ["abcxbcd"])
+    index.add(2, ["abcd"])
+    
+    assert index.search("bcd") == {1, 2}
+    # 两个文档都含有 abc、bcd 两个三元组，只有 2 真正包含 abcd
+    assert index.search("abcd") == {2}
+    assert index.search("ab") is None
+
+
+async def test_stale_index_entry_is_filtered_by_database(db, enabled):
+    user = await add_user(db, "alice")
+    await rebuild_search_indexes(db)
+    
+    # 模拟其他进程改名：数据库已变更，本进程索引仍是旧值
+    user.username = "carol"
+    user.email = "carol@example.com"
+    await db.commit()
+    
+    result = await UserService.get_users_paginated(db, search="alice")
+    assert search_ids("users", "alice") == {user.id}
+    assert result["items"] == []
+
+
+async def test_rebuild_keeps_writes_made_while_rebuilding(db, enabled, monkeypatch):
+    await add_user(db, "alice")
+    stream = db.stream
+    
+    async def stream_then_write(*args, **kwargs):
+        result = await stream(*args, **kwargs)
+        # 重建读取期间本进程写入了新用户
+        index_entity("users", SimpleNamespace(
+            id=999, is_deleted=False, username="zelda", email="zelda@example.com", real_name=None
+        ))
+        return result
+    
+    monkeypatch.setattr(db, "stream", stream_then_write)
+    await rebuild_search_indexes(db)
+    
+    assert search_ids("users", "zelda") == {999}
+    assert search_index._rebuild_journal is None
+
+
+async def test_multiple_workers_fall_back_to_database(db, enabled, monkeypatch):
+    await add_user(db, "alice")
+    await rebuild_search_indexes(db)
+    assert search_ids("users", "alice") is not None
+    
+    # 其他进程的写入不会进入本进程索引，多进程部署时不使用索引
+    monkeypatch.setattr(config, "WEB_CONCURRENCY", 2)
+    await add_user(db, "alice2")
+    
+    assert search_ids("users", "alice") is None
+    result = await UserService.get_users_paginated(db, search="alice")
+    assert sorted(item["username"] for item in result["items"]) == ["alice", "alice2"]
@@ -0,0 +1,48 @@
+"""
+模型序列化
+"""
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+from app.models.associations import user_role_association
+from app.models.user import Role
+from tests.factories import PASSWORD, add_role, add_user, link
+
+
+class TestUserSerialization:
+    async def test_to_dict_excludes_password(self, db):
+        user = await add_user(db, "alice")
+        
+        data = user.to_dict()
+        
+        assert "hashed_password" not in data
+        assert data["username"] == "alice"
+        assert isinstance(data["created_at"], str)
+        assert user.to_dict(include_password=True)["hashed_password"] == user.hashed_password
+    
+    async def test_relationship_items_exclude_password(self, db):
+        role = await add_role(db, "editor")
+        user = await add_user(db, "bob")
+        await link(db, user_role_association, [{"user_id": user.id, "role_id": role.id}])
+        role = (await db.execute(
+            select(Role).options(selectinload(Role.users)).where(Role.id == role.id)
+        )).scalar_one()
+        
+        data = role.to_dict(include_relationships=["users"])
+        
+        assert [item["username"] for item in data["users"]] == ["bob"]
+        assert "hashed_password" not in data["users"][0]
+    
+    async def test_register_and_login_do_not_return_password(self, client):
+        response = await client.post("/api/users/register", json={
+            "username": "carol",
+            "email": "carol@example.com",
+            "password": PASSWORD,
+            "confirm_password": PASSWORD,
+        })
+        assert response.status_code == 200
+        assert "hashed_password" not in response.json()["data"]
+        
+        response = await client.post("/api/users/login", json={"username": "carol", "password": PASSWORD})
+        assert response.status_code == 200
+        assert response.json()["data"]["user"]["username"] == "carol"
+        assert "hashed_password" not in response.json()["data"]["user"]
@@ -0,0 +1,62 @@
+"""
+令牌校验缓存
+"""
+import time
+from app.utils import auth
+from app.utils.auth import TokenCache, create_access_token, token_cache, verify_token
+from tests.factories import add_user, auth_headers
+
+
+class TestTokenCache:
+    def test_hit_returns_copy(self):
+        cache = TokenCache(max_size=10)
+        cache.set("token", {"sub": "1", "exp": time.time() + 60})
+        
+        payload = cache.get("token")
+        payload["sub"] = "2"
+        
+        assert cache.get("token")["sub"] == "1"
+        assert (cache.hits, cache.misses) == (2, 0)
+    
+    def test_expired_entry_is_dropped(self):
+        cache = TokenCache(max_size=10)
+        cache.set("token", {"sub": "1", "exp": time.time() - 1})
+        
+        assert cache.get("token") is None
+        assert cache.stats()["size"] == 0
+    
+    def test_evicts_least_recently_used(self):
+        cache = TokenCache(max_size=2)
+        cache.set("a", {"sub": "a"})
+        cache.set("b", {"sub": "b"})
+        cache.get("a")
+        cache.set("c", {"sub": "c"})
+        
+        assert cache.get("b") is None
+        assert cache.get("a") == {"sub": "a"}
+        assert cache.get("c") == {"sub": "c"}
+    
+    def test_verify_token_skips_decode_on_hit(self, monkeypatch):
+        token = create_access_token({"sub": "1"})
+        assert verify_token(token)["sub"] == "1"
+        
+        def fail_decode(*args, **kwargs):
+            raise AssertionError("命中缓存时不应再解码")
+        monkeypatch.setattr(auth.jwt, "decode", fail_decode)
+        hits = token_cache.hits
+        
+        assert verify_token(token)["sub"] == "1"
+        assert token_cache.hits == hits + 1
+
+
+async def test_cache_stats_include_token_cache(client, db):
+    admin = await add_user(db, "admin", is_superuser=True)
+    headers = auth_headers(admin.id)
+    
+    await client.get("/api/system/cache", headers=headers)
+    response = await client.get("/api/system/cache", headers=headers)
+    
+    assert response.status_code == 200
+    tokens = response.json()["data"]["tokens"]
+    assert tokens["size"] == 1
+    assert tokens["hits"] >= 1
@@ -0,0 +1,57 @@
+"""
+用户列表列投影
+"""
+from app.models.associations import role_menu_association, user_role_association
+from app.services.user_service import UserService
+from tests.factories import add_menu, add_role, add_user, auth_headers, link
+
+
+async def seed_user_roles(db):
+    alice = await add_user(db, "alice")
+    bob = await add_user(db, "bob")
+    editor = await add_role(db, "editor")
+    viewer = await add_role(db, "viewer")
+    removed = await add_role(db, "removed", is_deleted=True)
+    reports = await add_menu(db, "reports", order_num=2)
+    users = await add_menu(db, "users", order_num=1)
+    disabled = await add_menu(db, "disabled", is_active=False)
+    await link(db, user_role_association, [
+        {"user_id": alice.id, "role_id": editor.id},
+        {"user_id": alice.id, "role_id": viewer.id},
+        {"user_id": alice.id, "role_id": removed.id},
+        {"user_id": bob.id, "role_id": viewer.id},
+    ])
+    await link(db, role_menu_association, [
+        {"role_id": editor.id, "menu_id": reports.id},
+        {"role_id": editor.id, "menu_id": users.id},
+        {"role_id": editor.id, "menu_id": disabled.id},
+    ])
+    return alice, bob
+
+
+async def test_items_carry_role_summaries(db):
+    await seed_user_roles(db)
+    
+    result = await UserService.get_users_paginated(db, page=1, per_page=10)
+    
+    items = {item["username"]: item for item in result["items"]}
+    assert set(items) == {"alice", "bob"}
+    assert "hashed_password" not in items["alice"]
+    # 已删除的角色不出现，未请求菜单时角色摘要不含菜单
+    assert [role["code"] for role in items["alice"]["roles"]] == ["editor", "viewer"]
+    assert [role["code"] for role in items["bob"]["roles"]] == ["viewer"]
+    assert "menus" not in items["alice"]["roles"][0]
+
+
+async def test_include_menus_attaches_active_menus(client, db):
+    await seed_user_roles(db)
+    admin = await add_user(db, "admin", is_superuser=True)
+    
+    response = await client.get("/api/users?include=menus", headers=auth_headers(admin.id))
+    
+    assert response.status_code == 200
+    items = {item["username"]: item for item in response.json()["data"]["items"]}
+    editor, viewer = items["alice"]["roles"]
+    assert [menu["name"] for menu in editor["menus"]] == ["users", "reports"]
+    assert viewer["menus"] == []
+    assert items["admin"]["roles"] == []